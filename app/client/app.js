@@ -50,13 +50,13 @@ async function searchProducts(query) {
     return data.products;
 }
 
-async function extractSearchIntent(transcript) {
-    var res = await fetch(API_BASE + "/voice/extract", {
+async function voiceSearch(transcript) {
+    var res = await fetch(API_BASE + "/voice/search", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ transcript: transcript }),
     });
-    if (!res.ok) throw new Error("Failed to extract search intent");
+    if (!res.ok) throw new Error("Failed to run voice search");
     return res.json();
 }
 
@@ -344,13 +344,10 @@ function startListening(triggeredBy) {
 
 // --- WebSocket-based realtime transcription (primary path) ---
 
-function int16ToBase64(int16Array) {
-    var bytes = new Uint8Array(int16Array.buffer);
-    var binary = "";
-    for (var i = 0; i < bytes.length; i++) {
-        binary += String.fromCharCode(bytes[i]);
-    }
-    return btoa(binary);
+// The backend relays raw PCM frames to ElevenLabs and commits on silence
+function relayUrl() {
+    var scheme = window.location.protocol === "https:" ? "wss://" : "ws://";
+    return scheme + window.location.host + API_BASE + "/transcribe/stream";
 }
 
 function startWebSocketRecording() {
@@ -359,25 +356,18 @@ function startWebSocketRecording() {
     setVoiceStatus("Connecting...");
     setPartialTranscript("");
 
-    // Step 1: Get token from backend
-    fetch(API_BASE + "/transcribe/token", { method: "POST" })
-        .then(function (res) {
-            if (!res.ok) throw new Error("Token request failed: " + res.status);
-            return res.json();
-        })
-        .then(function (data) {
-            if (!isRecording) return; // user cancelled
-            connectWebSocket(data.ws_url);
-        })
-        .catch(function (err) {
-            console.warn("WebSocket token failed, falling back:", err);
-            fallbackToMediaRecorder();
-        });
+    try {
+        connectWebSocket(relayUrl());
+    } catch (err) {
+        console.warn("WebSocket relay failed, falling back:", err);
+        fallbackToMediaRecorder();
+    }
 }
 
 function connectWebSocket(wsUrl) {
-    console.log("[VOICE] Connecting WebSocket to:", wsUrl.substring(0, 60) + "...");
+    console.log("[VOICE] Connecting WebSocket to:", wsUrl);
     var ws = new WebSocket(wsUrl);
+    var sessionStarted = false;
     activeWebSocket = ws;
 
     ws.onopen = function () {
@@ -400,6 +390,7 @@ function connectWebSocket(wsUrl) {
         console.log("[VOICE] WS message:", msg.message_type, msg.text || "");
 
         if (msg.message_type === "session_started") {
+            sessionStarted = true;
             console.log("[VOICE] Session config:", JSON.stringify(msg.config));
             setVoiceStatus("Listening...");
             if (isRecording) {
@@ -421,22 +412,30 @@ function connectWebSocket(wsUrl) {
             msg.message_type === "quota_exceeded"
         ) {
             console.warn("[VOICE] WebSocket error:", msg);
-            stopListening();
+            if (isRecording && !sessionStarted) {
+                fallbackToMediaRecorder();
+            } else {
+                stopListening();
+            }
         }
     };
 
     ws.onerror = function (evt) {
         console.warn("[VOICE] WebSocket connection error", evt);
-        ws.close();
-        if (isRecording) {
+        if (activeWebSocket === ws && isRecording) {
             fallbackToMediaRecorder();
+        } else {
+            ws.close();
         }
     };
 
     ws.onclose = function (evt) {
         console.log("[VOICE] WebSocket closed, code:", evt.code, "reason:", evt.reason);
-        if (activeWebSocket === ws) {
-            activeWebSocket = null;
+        if (activeWebSocket !== ws) return;
+        activeWebSocket = null;
+        // The relay closes before session_started when ElevenLabs is unavailable
+        if (isRecording && !sessionStarted) {
+            fallbackToMediaRecorder();
         }
     };
 }
@@ -492,14 +491,7 @@ function startAudioCapture(ws) {
                                         maxAmp,
                                     );
                                 }
-                                ws.send(
-                                    JSON.stringify({
-                                        message_type: "input_audio_chunk",
-                                        audio_base_64: int16ToBase64(e.data.pcmChunk),
-                                        commit: false,
-                                        sample_rate: 16000,
-                                    }),
-                                );
+                                ws.send(chunk);
                             }
                         };
                         source.connect(processor);
@@ -518,40 +510,100 @@ function startAudioCapture(ws) {
         });
 }
 
+function downsampleToInt16(input, sampleRate) {
+    var ratio = sampleRate / 16000;
+    var outputLen = Math.floor(input.length / ratio);
+    var output = new Int16Array(outputLen);
+    for (var i = 0; i < outputLen; i++) {
+        var idx = Math.floor(i * ratio);
+        var sample = Math.max(-1, Math.min(1, input[idx]));
+        output[i] = sample * 32767;
+    }
+    return output;
+}
+
 function setupScriptProcessor(audioCtx, stream, ws) {
     var source = audioCtx.createMediaStreamSource(stream);
     var processor = audioCtx.createScriptProcessor(4096, 1, 1);
     activeSource = source;
     activeProcessor = processor;
-    var ratio = audioCtx.sampleRate / 16000;
 
     processor.onaudioprocess = function (e) {
         if (ws.readyState !== WebSocket.OPEN) return;
-        var input = e.inputBuffer.getChannelData(0);
-        var outputLen = Math.floor(input.length / ratio);
-        var output = new Int16Array(outputLen);
-        for (var i = 0; i < outputLen; i++) {
-            var idx = Math.floor(i * ratio);
-            var sample = Math.max(-1, Math.min(1, input[idx]));
-            output[i] = sample * 32767;
-        }
-        ws.send(
-            JSON.stringify({
-                message_type: "input_audio_chunk",
-                audio_base_64: int16ToBase64(output),
-                commit: false,
-                sample_rate: 16000,
-            }),
-        );
+        ws.send(downsampleToInt16(e.inputBuffer.getChannelData(0), audioCtx.sampleRate));
     };
 
     source.connect(processor);
     processor.connect(audioCtx.destination);
 }
 
-// --- MediaRecorder fallback (used when WebSocket fails) ---
+// --- Recorder fallback (used when WebSocket fails) ---
 
-var hasMediaRecorder = typeof MediaRecorder !== "undefined" && hasMicrophone;
+// Records 16 kHz mono PCM and uploads it as WAV, which the backend can
+// trim and resample before speech-to-text (it cannot decode webm/opus).
+// Exposes the subset of the MediaRecorder API used below.
+var hasMediaRecorder = !!(window.AudioContext || window.webkitAudioContext) && hasMicrophone;
+
+function encodeWav(chunks) {
+    var length = 0;
+    chunks.forEach(function (chunk) {
+        length += chunk.length;
+    });
+    if (length === 0) return null;
+
+    var view = new DataView(new ArrayBuffer(44 + length * 2));
+    function writeString(offset, text) {
+        for (var i = 0; i < text.length; i++) view.setUint8(offset + i, text.charCodeAt(i));
+    }
+    writeString(0, "RIFF");
+    view.setUint32(4, 36 + length * 2, true);
+    writeString(8, "WAVE");
+    writeString(12, "fmt ");
+    view.setUint32(16, 16, true);
+    view.setUint16(20, 1, true); // PCM
+    view.setUint16(22, 1, true); // mono
+    view.setUint32(24, 16000, true);
+    view.setUint32(28, 16000 * 2, true);
+    view.setUint16(32, 2, true);
+    view.setUint16(34, 16, true);
+    writeString(36, "data");
+    view.setUint32(40, length * 2, true);
+
+    var offset = 44;
+    chunks.forEach(function (chunk) {
+        for (var i = 0; i < chunk.length; i++, offset += 2) {
+            view.setInt16(offset, chunk[i], true);
+        }
+    });
+    return new Blob([view], { type: "audio/wav" });
+}
+
+function createWavRecorder(stream) {
+    var audioCtx = new (window.AudioContext || window.webkitAudioContext)();
+    var source = audioCtx.createMediaStreamSource(stream);
+    var processor = audioCtx.createScriptProcessor(4096, 1, 1);
+    var chunks = [];
+    var recorder = { state: "inactive", mimeType: "audio/wav", onstop: null };
+
+    processor.onaudioprocess = function (e) {
+        if (recorder.state !== "recording") return;
+        chunks.push(downsampleToInt16(e.inputBuffer.getChannelData(0), audioCtx.sampleRate));
+    };
+    recorder.start = function () {
+        source.connect(processor);
+        processor.connect(audioCtx.destination);
+        recorder.state = "recording";
+    };
+    recorder.stop = function () {
+        if (recorder.state !== "recording") return;
+        recorder.state = "inactive";
+        processor.disconnect();
+        source.disconnect();
+        audioCtx.close().catch(function () {});
+        if (recorder.onstop) recorder.onstop(encodeWav(chunks));
+    };
+    return recorder;
+}
 
 var SILENCE_THRESHOLD = 10;
 var SILENCE_DURATION = 1500;
@@ -563,8 +615,9 @@ var mediaRecorder = null;
 function fallbackToMediaRecorder() {
     // Clean up any WebSocket state
     if (activeWebSocket) {
-        activeWebSocket.close();
+        var ws = activeWebSocket;
         activeWebSocket = null;
+        ws.close();
     }
     cleanupAudio();
 
@@ -579,7 +632,6 @@ function fallbackToMediaRecorder() {
 }
 
 function startMediaRecorderFallback() {
-    var chunks = [];
     navigator.mediaDevices
         .getUserMedia({ audio: true })
         .then(function (stream) {
@@ -591,26 +643,17 @@ function startMediaRecorderFallback() {
             }
 
             activeStream = stream;
-            mediaRecorder = new MediaRecorder(stream);
-
-            mediaRecorder.ondataavailable = function (event) {
-                if (event.data.size > 0) {
-                    chunks.push(event.data);
-                }
-            };
+            mediaRecorder = createWavRecorder(stream);
 
-            mediaRecorder.onstop = function () {
+            mediaRecorder.onstop = function (audioBlob) {
                 stream.getTracks().forEach(function (track) {
                     track.stop();
                 });
                 activeStream = null;
-                if (chunks.length === 0) {
+                if (!audioBlob) {
                     stopListening();
                     return;
                 }
-                var audioBlob = new Blob(chunks, {
-                    type: mediaRecorder.mimeType || "audio/webm",
-                });
                 uploadAudio(audioBlob);
             };
 
@@ -734,13 +777,7 @@ function commitAndStop() {
     if (activeWebSocket && activeWebSocket.readyState === WebSocket.OPEN) {
         setVoiceStatus("Transcribing...");
         console.log("[VOICE] Sending commit, waiting for transcript...");
-        activeWebSocket.send(
-            JSON.stringify({
-                message_type: "input_audio_chunk",
-                audio_base_64: "",
-                commit: true,
-            }),
-        );
+        activeWebSocket.send(JSON.stringify({ message_type: "commit" }));
         // Wait briefly for final committed_transcript, then process
         var ws = activeWebSocket;
         commitTimeoutId = setTimeout(function () {
@@ -798,7 +835,7 @@ function uploadAudio(audioBlob) {
     setVoiceStatus("Transcribing...");
 
     var formData = new FormData();
-    formData.append("file", audioBlob, "recording.webm");
+    formData.append("file", audioBlob, "recording.wav");
 
     fetch(API_BASE + "/transcribe", {
         method: "POST",
@@ -827,7 +864,9 @@ async function applyVoiceSearchExtraction(transcript) {
     try {
         setVoiceStatus("Understanding...");
         voiceIndicator.style.display = "block";
-        var extraction = await extractSearchIntent(transcript);
+        // Extraction and retrieval run server-side in a single round trip
+        var data = await voiceSearch(transcript);
+        var extraction = data.extraction;
 
         // Apply extracted query to search input
         if (extraction.query) {
@@ -845,13 +884,7 @@ async function applyVoiceSearchExtraction(transcript) {
             ratingFilter.value = String(Math.floor(extraction.min_rating));
         }
 
-        // Trigger search with all applied filters
-        if (extraction.query) {
-            var results = await searchProducts(extraction.query);
-            renderProducts(filterAndSort(results));
-        } else {
-            await loadProducts();
-        }
+        renderProducts(filterAndSort(data.products));
     } catch (err) {
         console.error("Voice extraction failed, falling back:", err);
         // Fallback: just do regular search with raw transcript
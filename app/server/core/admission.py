@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import NoReturn
+
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot get a slot in time."""
+
+
+class AdmissionController:
+    """Bound the number of concurrent operations, with a short wait queue.
+
+    Up to `max_in_flight` operations run at once. Up to `max_queue` more
+    wait at most `queue_timeout` seconds for a slot; anything beyond
+    that is rejected immediately so callers can degrade quickly instead
+    of piling up.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+    ) -> None:
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self.admitted = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(
+        cls, name: str, max_in_flight: int, max_queue: int, queue_timeout: float
+    ) -> "AdmissionController":
+        """Build a controller whose limits can be overridden with
+        ADMISSION_<NAME>_MAX_IN_FLIGHT, _MAX_QUEUE and _QUEUE_TIMEOUT_SECONDS."""
+        prefix = f"ADMISSION_{name.upper()}_"
+        return cls(
+            name,
+            max_in_flight=int(os.environ.get(prefix + "MAX_IN_FLIGHT", str(max_in_flight))),
+            max_queue=int(os.environ.get(prefix + "MAX_QUEUE", str(max_queue))),
+            queue_timeout=float(
+                os.environ.get(prefix + "QUEUE_TIMEOUT_SECONDS", str(queue_timeout))
+            ),
+        )
+
+    async def acquire(self, deadline: float | None = None) -> None:
+        """Take a slot, queueing for at most `queue_timeout` seconds.
+
+        `deadline` is a time.monotonic() value after which the caller no
+        longer needs the slot: the wait is capped to it, and a caller whose
+        deadline has already passed is rejected without queueing.
+        """
+        timeout = self.queue_timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                self._reject("deadline exceeded")
+
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue full")
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            with span(f"{self.name}_queue"):
+                await asyncio.wait_for(waiter, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up; pass it on
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("queue timeout")
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.admitted += 1
+
+    def release(self) -> None:
+        # Hand the slot straight to the oldest live waiter, if any
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _reject(self, reason: str) -> NoReturn:
+        self.rejected += 1
+        logger.warning("[ADMISSION] %s rejected (%s)", self.name, reason)
+        raise AdmissionRejected(f"{self.name} overloaded: {reason}")
+
+    @asynccontextmanager
+    async def slot(self, deadline: float | None = None) -> AsyncIterator[None]:
+        await self.acquire(deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,263 @@
+import hashlib
+import io
+import logging
+import os
+import wave
+from collections import Counter
+from dataclasses import dataclass
+from typing import BinaryIO
+
+import numpy as np
+from starlette.datastructures import UploadFile
+
+logger = logging.getLogger(__name__)
+
+TARGET_SAMPLE_RATE = 16000
+MAX_UPLOAD_BYTES = int(os.environ.get("TRANSCRIBE_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+READ_CHUNK_BYTES = 64 * 1024
+
+# Energy VAD used to trim leading and trailing silence (RMS on the Int16 scale)
+VAD_THRESHOLD = float(os.environ.get("TRANSCRIBE_VAD_THRESHOLD", "500"))
+VAD_FRAME_MS = 20
+VAD_PADDING_MS = 200
+
+WAV_CONTENT_TYPES = frozenset({"audio/wav", "audio/x-wav", "audio/wave"})
+
+_stats: Counter[str] = Counter()
+
+
+class AudioError(Exception):
+    """Raised when an upload cannot be accepted or contains no speech."""
+
+
+@dataclass
+class Upload:
+    """A size-checked upload, rewound so it can be read again."""
+
+    file: BinaryIO
+    size: int
+    sha256: str
+
+
+@dataclass
+class PreparedAudio:
+    """Audio ready for speech-to-text, with durations when it could be decoded."""
+
+    data: bytes
+    content_type: str
+    duration_seconds: float | None = None
+    trimmed_duration_seconds: float | None = None
+
+
+async def read_upload(file: UploadFile, max_bytes: int | None = None) -> Upload:
+    """Check an upload's size in chunks, rejecting it as soon as it exceeds `max_bytes`.
+
+    The body stays in the upload's spooled file (on disk past 1 MB) rather
+    than being copied into memory; its SHA-256 is computed on the way.
+
+    Raises:
+        AudioError: If the upload is larger than the limit.
+    """
+    limit = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    if file.size is not None and file.size > limit:
+        _stats["rejected_too_large"] += 1
+        raise AudioError("Audio file too large")
+
+    total = 0
+    digest = hashlib.sha256()
+    while chunk := await file.read(READ_CHUNK_BYTES):
+        total += len(chunk)
+        if total > limit:
+            _stats["rejected_too_large"] += 1
+            raise AudioError("Audio file too large")
+        digest.update(chunk)
+    await file.seek(0)
+    _stats["uploads"] += 1
+    _stats["bytes_in"] += total
+    return Upload(file=file.file, size=total, sha256=digest.hexdigest())
+
+
+def _pcm_to_float(raw: bytes, width: int) -> np.ndarray:
+    """Convert little-endian PCM of `width` bytes per sample to float32 on the Int16 scale."""
+    if width == 1:
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) * 256
+    if width == 2:
+        return np.frombuffer(raw, dtype="<i2").astype(np.float32)
+    if width == 3:
+        padded = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        as_int = (
+            padded[:, 0].astype(np.int32)
+            | (padded[:, 1].astype(np.int32) << 8)
+            | (padded[:, 2].astype(np.int32) << 16)
+        )
+        as_int = np.where(as_int >= 1 << 23, as_int - (1 << 24), as_int)
+        return as_int.astype(np.float32) / 256
+    if width == 4:
+        return np.frombuffer(raw, dtype="<i4").astype(np.float32) / 65536
+    raise wave.Error(f"unsupported sample width {width}")
+
+
+class _Resampler:
+    """Resample mono audio to TARGET_SAMPLE_RATE one block at a time."""
+
+    def __init__(self, rate: int) -> None:
+        self.rate = rate
+        self._consumed = 0
+        self._produced = 0
+        # Last sample of the previous block, so interpolation spans the seam
+        self._last = np.zeros(0, dtype=np.float32)
+
+    def feed(self, block: np.ndarray) -> np.ndarray:
+        if self.rate == TARGET_SAMPLE_RATE or len(block) == 0:
+            return block
+        if self.rate % TARGET_SAMPLE_RATE == 0:
+            # Integer ratio (32/48 kHz): average each group, a cheap low-pass.
+            # Blocks are whole seconds, so only the last can leave a remainder.
+            factor = self.rate // TARGET_SAMPLE_RATE
+            usable = len(block) - len(block) % factor
+            return block[:usable].reshape(-1, factor).mean(axis=1)
+        source = np.concatenate([self._last, block])
+        first = self._consumed - len(self._last)
+        self._consumed += len(block)
+        stop = (self._consumed - 1) * TARGET_SAMPLE_RATE // self.rate + 1
+        target_times = np.arange(self._produced, stop) / TARGET_SAMPLE_RATE
+        self._produced = max(stop, self._produced)
+        self._last = block[-1:]
+        source_times = (first + np.arange(len(source))) / self.rate
+        return np.interp(target_times, source_times, source).astype(np.float32)
+
+
+def _decode_wav(source: BinaryIO) -> tuple[np.ndarray, float, int, int]:
+    """Decode PCM WAV a second at a time into 16 kHz mono float32 samples.
+
+    Only the downmixed, resampled signal is kept, never the whole input.
+    Returns the samples, the input duration, sample rate and channel count.
+    """
+    with wave.open(source, "rb") as wav:
+        width = wav.getsampwidth()
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        if rate <= 0:
+            raise wave.Error(f"invalid sample rate {rate}")
+        resampler = _Resampler(rate)
+        blocks: list[np.ndarray] = []
+        frames = 0
+        while raw := wav.readframes(rate):
+            samples = _pcm_to_float(raw, width)
+            samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels)
+            frames += len(samples)
+            blocks.append(resampler.feed(samples.mean(axis=1)))
+    mono = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+    return mono, frames / rate, rate, channels
+
+
+def trim_silence(samples: np.ndarray, threshold: float = VAD_THRESHOLD) -> np.ndarray:
+    """Drop leading and trailing silence from 16 kHz mono samples.
+
+    Frames whose RMS energy reaches `threshold` count as speech; a little
+    padding is kept around the first and last speech frame. Returns an
+    empty array when no frame is speech.
+    """
+    frame = TARGET_SAMPLE_RATE * VAD_FRAME_MS // 1000
+    frames = len(samples) // frame
+    if frames == 0:
+        return samples[:0]
+    energy = np.sqrt(np.mean(samples[: frames * frame].reshape(frames, frame) ** 2, axis=1))
+    speech = np.flatnonzero(energy >= threshold)
+    if speech.size == 0:
+        return samples[:0]
+    padding = TARGET_SAMPLE_RATE * VAD_PADDING_MS // 1000
+    start = max(int(speech[0]) * frame - padding, 0)
+    end = min((int(speech[-1]) + 1) * frame + padding, len(samples))
+    return samples[start:end]
+
+
+def _encode_wav(samples: np.ndarray) -> bytes:
+    pcm = np.clip(np.round(samples), -32768, 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(TARGET_SAMPLE_RATE)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def prepare_audio(source: BinaryIO, content_type: str) -> PreparedAudio:
+    """Convert an upload to trimmed 16 kHz mono PCM WAV when possible.
+
+    WAV uploads (matched on the base MIME type, ignoring parameters) are
+    decoded as they are read, downmixed, resampled and trimmed of leading
+    and trailing silence. Compressed formats (webm, ogg, mp3) cannot be
+    decoded without a codec library and are passed through unchanged;
+    the web client records WAV for this reason.
+
+    Args:
+        source: The upload, positioned at its start.
+        content_type: MIME type of the upload.
+
+    Returns:
+        The audio to send to speech-to-text.
+
+    Raises:
+        AudioError: If a decoded recording contains no speech.
+    """
+    base_type = content_type.split(";", 1)[0].strip().lower()
+    if base_type not in WAV_CONTENT_TYPES:
+        return _passthrough(source, content_type)
+
+    try:
+        mono, duration, rate, channels = _decode_wav(source)
+    except (wave.Error, EOFError, ValueError) as e:
+        logger.info("[AUDIO] Could not decode WAV, passing through: %s", e)
+        source.seek(0)
+        return _passthrough(source, content_type)
+
+    trimmed = trim_silence(mono)
+    trimmed_duration = len(trimmed) / TARGET_SAMPLE_RATE
+    _stats["decoded"] += 1
+    _stats["ms_trimmed"] += round((duration - trimmed_duration) * 1000)
+    if len(trimmed) == 0:
+        raise AudioError("No speech detected")
+
+    output = _encode_wav(trimmed)
+    _stats["bytes_out"] += len(output)
+    logger.info(
+        "[AUDIO] %.2fs %d Hz x%d -> %.2fs 16 kHz mono (%d bytes)",
+        duration,
+        rate,
+        channels,
+        trimmed_duration,
+        len(output),
+    )
+    return PreparedAudio(
+        data=output,
+        content_type="audio/wav",
+        duration_seconds=round(duration, 3),
+        trimmed_duration_seconds=round(trimmed_duration, 3),
+    )
+
+
+def _passthrough(source: BinaryIO, content_type: str) -> PreparedAudio:
+    data = source.read()
+    _stats["passthrough"] += 1
+    _stats["bytes_out"] += len(data)
+    return PreparedAudio(data=data, content_type=content_type)
+
+
+def preprocessing_stats() -> dict[str, int]:
+    """Return upload, byte and trimming counters."""
+    return {
+        "uploads": _stats["uploads"],
+        "decoded": _stats["decoded"],
+        "passthrough": _stats["passthrough"],
+        "rejected_too_large": _stats["rejected_too_large"],
+        "bytes_in": _stats["bytes_in"],
+        "bytes_out": _stats["bytes_out"],
+        "ms_trimmed": _stats["ms_trimmed"],
+    }
+
+
+def reset_stats() -> None:
+    """Reset preprocessing counters. Used for testing."""
+    _stats.clear()
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import threading
+from collections import Counter
+from collections.abc import Awaitable
+from typing import TypeVar
+
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Non-standard status (nginx convention) for requests the client abandoned
+CLIENT_CLOSED_REQUEST = 499
+
+DISCONNECT_POLL_INTERVAL = 0.05
+
+# route name -> number of requests cancelled because the client went away
+_cancellations: Counter[str] = Counter()
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client disconnects before the response is ready."""
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+async def run_unless_disconnected(
+    request: Request,
+    route: str,
+    work: Awaitable[T],
+    cancel_event: threading.Event | None = None,
+) -> T:
+    """Await `work`, cancelling it if the client disconnects first.
+
+    Args:
+        request: The incoming request to watch for disconnects.
+        route: Route name used to count cancellations.
+        work: The awaitable doing the upstream work.
+        cancel_event: Optional event set on disconnect, so work running in a
+            worker thread can skip its remaining stages.
+
+    Returns:
+        The result of `work`.
+
+    Raises:
+        ClientDisconnected: If the client went away before `work` finished.
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.create_task(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    finally:
+        watcher.cancel()
+
+    if task.done():
+        return task.result()
+
+    task.cancel()
+    if cancel_event is not None:
+        cancel_event.set()
+    _cancellations[route] += 1
+    logger.info("[CANCEL] Client disconnected, cancelled %s", route)
+    raise ClientDisconnected(route)
+
+
+def cancellation_stats() -> dict[str, int]:
+    """Return the number of cancelled requests per route."""
+    return dict(_cancellations)
+
+
+def reset_stats() -> None:
+    """Reset cancellation counters. Used for testing."""
+    _cancellations.clear()
@@ -0,0 +1,57 @@
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, Hashable
+
+from starlette.responses import Response
+
+from .singleflight import SingleFlight
+
+# route name -> in-flight renders of that route's responses
+_flights: defaultdict[str, SingleFlight[bytes]] = defaultdict(SingleFlight)
+
+
+async def coalesced_response(
+    route: str,
+    key: Hashable,
+    render: Callable[[], Awaitable[bytes]],
+    finish: Callable[[bytes], bytes] | None = None,
+) -> Response:
+    """Serve identical concurrent requests from one computation.
+
+    Requests for the same `route` and `key` that arrive while a render is
+    in flight share its result, including the serialized JSON body.
+
+    Args:
+        route: Route name used to group keys and count coalescing.
+        key: Normalized request parameters.
+        render: Coroutine function producing the JSON response body.
+        finish: Applied to the shared body for each request, to add the
+            parts that differ between requests with the same key.
+
+    Returns:
+        A JSON response with the shared body.
+    """
+    body = await _flights[route].do(key, render)
+    if finish is not None:
+        body = finish(body)
+    return Response(content=body, media_type="application/json")
+
+
+def coalescing_stats() -> dict[str, dict[str, float | int]]:
+    """Return per-route request, execution and coalescing counters."""
+    result: dict[str, dict[str, float | int]] = {}
+    for route, flight in sorted(_flights.items()):
+        requests = flight.executions + flight.coalesced
+        result[route] = {
+            "requests": requests,
+            "executions": flight.executions,
+            "coalesced": flight.coalesced,
+            "coalesced_ratio": round(flight.coalesced / requests, 3) if requests else 0.0,
+            "in_flight": flight.in_flight(),
+        }
+    return result
+
+
+def reset_stats() -> None:
+    """Reset coalescing counters. Used for testing."""
+    for flight in _flights.values():
+        flight.reset_stats()
@@ -1,7 +1,28 @@
+import asyncio
+import logging
 import os
+import re
 import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from .memory import track, track_file
+from .metrics import CallbackMetric, Histogram
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db", "voxstore.db")
+track_file("catalog_db", lambda: DB_PATH)
+
+# Opt-in statement tracing; statements slower than SLOW_QUERY_MS are logged
+# with their query plan
+SQL_TRACE = os.environ.get("SQL_TRACE", "false").lower() == "true"
+SLOW_QUERY_MS = float(os.environ.get("SQL_SLOW_QUERY_MS", "50"))
+# How often the cached catalog counters are re-read; see catalog_stats()
+CATALOG_REFRESH_SECONDS = float(os.environ.get("CATALOG_REFRESH_SECONDS", "15"))
 
 SEED_PRODUCTS = [
     (
@@ -563,7 +584,10 @@ SEED_PRODUCTS = [
 
 def get_connection() -> sqlite3.Connection:
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    if _tracing:
+        conn = sqlite3.connect(DB_PATH, factory=TracedConnection)
+    else:
+        conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -594,6 +618,31 @@ def init_db():
         )
     """)
 
+    # Single-row catalog version and product count, kept current by
+    # triggers so readers never have to count the products table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_meta (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            product_count INTEGER NOT NULL
+        )
+    """)
+    cursor.execute(
+        "INSERT OR IGNORE INTO catalog_meta (id, version, product_count)"
+        " VALUES (1, 0, (SELECT COUNT(*) FROM products))"
+    )
+    cursor.executescript("""
+        CREATE TRIGGER IF NOT EXISTS products_insert_version AFTER INSERT ON products BEGIN
+            UPDATE catalog_meta SET version = version + 1, product_count = product_count + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS products_delete_version AFTER DELETE ON products BEGIN
+            UPDATE catalog_meta SET version = version + 1, product_count = product_count - 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS products_update_version AFTER UPDATE ON products BEGIN
+            UPDATE catalog_meta SET version = version + 1;
+        END;
+    """)
+
     # Seed products if table is empty
     cursor.execute("SELECT COUNT(*) FROM products")
     if cursor.fetchone()[0] == 0:
@@ -605,3 +654,313 @@ def init_db():
 
     conn.commit()
     conn.close()
+    refresh_catalog_stats()
+
+
+def load_catalog() -> list[dict]:
+    """Return every product, in id order (the order the embedding cache is keyed on)."""
+    conn = get_connection()
+    try:
+        return [dict(row) for row in conn.execute("SELECT * FROM products ORDER BY id")]
+    finally:
+        conn.close()
+
+
+# --- Catalog counters ---
+
+# Last read of catalog_meta; served to health checks without touching SQLite
+_catalog: dict[str, Any] = {"version": 0, "products": 0, "refreshed_at": 0.0, "error": None}
+_refresh_task: asyncio.Task[None] | None = None
+
+
+def refresh_catalog_stats() -> None:
+    """Re-read the catalog version and product count into the in-memory cache."""
+    try:
+        conn = get_connection()
+        try:
+            row = conn.execute("SELECT version, product_count FROM catalog_meta").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        _catalog["error"] = str(e)
+        logger.warning("[DB] Catalog refresh failed: %s", e)
+        return
+    _catalog.update(
+        version=row["version"], products=row["product_count"], refreshed_at=time.time(), error=None
+    )
+
+
+def catalog_stats() -> dict[str, Any]:
+    """Return the cached catalog version and product count, without any I/O.
+
+    `error` is set when the last refresh failed; the counts are then
+    from the last successful one.
+    """
+    return dict(_catalog)
+
+
+async def _refresh_loop() -> None:
+    while True:
+        await asyncio.sleep(CATALOG_REFRESH_SECONDS)
+        await asyncio.to_thread(refresh_catalog_stats)
+
+
+def start_catalog_refresher() -> None:
+    """Periodically re-read catalog counters, picking up writes from other workers."""
+    global _refresh_task
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_loop())
+
+
+async def stop_catalog_refresher() -> None:
+    """Stop re-reading catalog counters. Called on app shutdown."""
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+
+
+# --- Statement tracing ---
+
+_tracing = SQL_TRACE
+_lock = threading.Lock()
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@dataclass
+class StatementStats:
+    calls: int = 0
+    timed: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    slow: int = 0
+
+
+_statements: dict[str, StatementStats] = {}
+_slow_log: deque[dict[str, Any]] = deque(maxlen=50)
+track("sql_statements", lambda: _statements)
+track("sql_slow_log", lambda: _slow_log)
+
+STATEMENT_LATENCY = Histogram(
+    "voxstore_sql_statement_duration_seconds",
+    "Time to execute and fetch each normalized SQL statement (when SQL_TRACE is on).",
+    ("statement",),
+)
+
+
+def normalize_statement(sql: str) -> str:
+    """Replace literals and placeholder lists so equivalent statements group."""
+    sql = _LITERAL_RE.sub("?", sql)
+    sql = _LIST_RE.sub("(...)", sql)
+    return _SPACE_RE.sub(" ", sql).strip()
+
+
+def _on_statement(sql: str) -> None:
+    # sqlite3 trace callback: every statement SQLite runs, including
+    # implicit BEGIN/COMMIT, with parameters expanded
+    key = normalize_statement(sql)
+    if key.startswith("EXPLAIN"):
+        return
+    with _lock:
+        _statements.setdefault(key, StatementStats()).calls += 1
+
+
+def _explain(conn: sqlite3.Connection, sql: str, params: Any) -> list[str]:
+    # A plain cursor, so the EXPLAIN itself is not timed and recorded
+    try:
+        rows = sqlite3.Cursor(conn).execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.Error as e:
+        return [f"unavailable: {e}"]
+    return [row[-1] for row in rows]
+
+
+def _record(conn: sqlite3.Connection, sql: str, params: Any, elapsed: float, rows: int) -> None:
+    key = normalize_statement(sql)
+    elapsed_ms = elapsed * 1000
+    slow = elapsed_ms >= SLOW_QUERY_MS
+    with _lock:
+        stats = _statements.setdefault(key, StatementStats())
+        stats.timed += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        stats.rows += rows
+        stats.slow += slow
+    STATEMENT_LATENCY.labels(key).observe(elapsed)
+    if not slow:
+        return
+
+    plan = _explain(conn, sql, params) if params is not None else []
+    _slow_log.append(
+        {"statement": key, "duration_ms": round(elapsed_ms, 2), "rows": rows, "plan": plan}
+    )
+    logger.warning(
+        "[SLOW_SQL] %.1f ms, %d rows: %s | plan: %s",
+        elapsed_ms,
+        rows,
+        key,
+        "; ".join(plan) or "n/a",
+    )
+
+
+class _TracedCursor(sqlite3.Cursor):
+    """Cursor that times each statement from execute through its last fetch."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        super().__init__(conn)
+        self._sql: str | None = None
+        self._params: Any = None
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def execute(self, sql: str, parameters: Any = (), /) -> "_TracedCursor":
+        self._finish()
+        self._sql, self._params = sql, parameters
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self._elapsed += time.perf_counter() - start
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters: Any, /) -> "_TracedCursor":
+        self._finish()
+        # No single parameter set to explain the plan with
+        self._sql, self._params = sql, None
+        start = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        finally:
+            self._elapsed += time.perf_counter() - start
+        return self
+
+    def fetchone(self) -> Any:
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._elapsed += time.perf_counter() - start
+        self._rows += row is not None
+        return row
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        return rows
+
+    def __next__(self) -> Any:
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        finally:
+            self._elapsed += time.perf_counter() - start
+        self._rows += 1
+        return row
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def _finish(self) -> None:
+        if self._sql is None:
+            return
+        sql, params, elapsed = self._sql, self._params, self._elapsed
+        # SELECTs count fetched rows; writes report rowcount
+        rows = self._rows or max(self.rowcount, 0)
+        self._sql, self._params, self._elapsed, self._rows = None, None, 0.0, 0
+        _record(self.connection, sql, params, elapsed, rows)
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose statements are traced and timed.
+
+    A statement is recorded when its cursor runs another statement or is
+    closed, or when the connection is closed, so fetch time and row
+    counts are included.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._cursors: list[_TracedCursor] = []
+        self.set_trace_callback(_on_statement)
+
+    def cursor(self, factory: Any = _TracedCursor) -> Any:
+        cursor = super().cursor(factory)
+        if isinstance(cursor, _TracedCursor):
+            self._cursors.append(cursor)
+        return cursor
+
+    def execute(self, sql: str, parameters: Any = (), /) -> Any:
+        return self.cursor().execute(sql, parameters)
+
+    def close(self) -> None:
+        for cursor in self._cursors:
+            cursor._finish()
+        self._cursors.clear()
+        super().close()
+
+
+def enable_tracing(enabled: bool = True) -> None:
+    """Turn statement tracing on or off for connections opened afterwards."""
+    global _tracing
+    _tracing = enabled
+
+
+def statement_stats() -> dict[str, dict[str, Any]]:
+    """Return aggregate stats per normalized statement."""
+    with _lock:
+        return {key: asdict(stats) for key, stats in _statements.items()}
+
+
+def slow_queries() -> list[dict[str, Any]]:
+    """Return the most recent slow statements with their query plans."""
+    return list(_slow_log)
+
+
+def reset_tracing() -> None:
+    """Clear statement stats and the slow-query log. Used for testing."""
+    with _lock:
+        _statements.clear()
+    _slow_log.clear()
+    STATEMENT_LATENCY.clear()
+
+
+def _statement_values(field: str) -> dict[tuple[str, ...], float]:
+    with _lock:
+        return {(key,): getattr(stats, field) for key, stats in _statements.items()}
+
+
+CallbackMetric(
+    "voxstore_sql_statement_calls_total",
+    "SQL statements run by SQLite, including implicit ones (when SQL_TRACE is on).",
+    "counter",
+    ("statement",),
+    lambda: _statement_values("calls"),
+)
+CallbackMetric(
+    "voxstore_sql_statement_rows_total",
+    "Rows returned or changed per SQL statement (when SQL_TRACE is on).",
+    "counter",
+    ("statement",),
+    lambda: _statement_values("rows"),
+)
+CallbackMetric(
+    "voxstore_sql_slow_statements_total",
+    "Executions over SQL_SLOW_QUERY_MS per SQL statement (when SQL_TRACE is on).",
+    "counter",
+    ("statement",),
+    lambda: _statement_values("slow"),
+)
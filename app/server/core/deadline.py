@@ -0,0 +1,123 @@
+import logging
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Clients may ask for a shorter budget than the route default, in seconds
+DEADLINE_HEADER = "x-request-timeout"
+
+# Absolute time.monotonic() deadline of the current request, if any.
+# Context variables are copied into tasks and asyncio.to_thread workers,
+# so every outbound call made on behalf of the request sees it.
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+# stage name -> calls skipped because the budget was already spent
+_skipped: Counter[str] = Counter()
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget is spent before a stage starts."""
+
+
+def parse_timeout(header: str | None, default: float) -> float:
+    """Return the request budget: the header value, capped at `default`."""
+    if header:
+        try:
+            requested = float(header)
+        except ValueError:
+            return default
+        if requested > 0:
+            return min(requested, default)
+    return default
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[float]:
+    """Run the enclosed block with a deadline `seconds` from now.
+
+    A scope never extends an enclosing deadline, only shortens it.
+    """
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def get_deadline() -> float | None:
+    """Return the current absolute deadline (time.monotonic()), if any."""
+    return _deadline.get()
+
+
+def remaining() -> float | None:
+    """Return the seconds left in the current budget, or None if unbounded."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check(stage: str) -> float | None:
+    """Return the remaining budget, skipping `stage` if it is already spent.
+
+    Raises:
+        DeadlineExceeded: If the deadline has passed.
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        _skipped[stage] += 1
+        logger.info("[DEADLINE] Budget spent, skipping %s", stage)
+        raise DeadlineExceeded(f"Deadline exceeded before {stage}")
+    return left
+
+
+def cap(timeout: float, stage: str) -> float:
+    """Return `timeout` shortened to the remaining budget.
+
+    Raises:
+        DeadlineExceeded: If the deadline has passed.
+    """
+    left = check(stage)
+    return timeout if left is None else min(timeout, left)
+
+
+class DeadlineMiddleware:
+    """Give each HTTP request on a budgeted route a deadline.
+
+    The budget is the route default from `defaults` (keyed by path),
+    shortened by the X-Request-Timeout header when the client sends one.
+    """
+
+    def __init__(self, app: ASGIApp, defaults: dict[str, float]) -> None:
+        self.app = app
+        self.defaults = defaults
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        default = self.defaults.get(scope["path"]) if scope["type"] == "http" else None
+        if default is None:
+            await self.app(scope, receive, send)
+            return
+        seconds = parse_timeout(Headers(scope=scope).get(DEADLINE_HEADER), default)
+        with deadline_scope(seconds):
+            await self.app(scope, receive, send)
+
+
+def deadline_stats() -> dict[str, int]:
+    """Return the number of skipped calls per stage."""
+    return dict(_skipped)
+
+
+def reset_stats() -> None:
+    """Reset skip counters. Used for testing."""
+    _skipped.clear()
@@ -1,26 +1,49 @@
+import asyncio
 import hashlib
 import logging
 import os
+import zipfile
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
 
 import numpy as np
-from openai import OpenAI
+
+from . import deadline
+from .memory import track
+from .metrics import track_upstream
+from .startup import stage
+from .tracing import span
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
 EMBEDDING_MODEL = "baai/bge-large-en-v1.5"
+EMBED_TIMEOUT = 10.0
 _CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db")
 
 # In-memory cache: product_id -> normalized embedding vector
 _product_embeddings: dict[int, np.ndarray] = {}
-_client: OpenAI | None = None
+_client: "OpenAI | None" = None
+track("embeddings", lambda: _product_embeddings)
+
+# "idle" until a build is started, then "building" until it ends as
+# "ready", "disabled" (no API key or no products) or "failed"
+_index_state = "idle"
+_build_task: asyncio.Task[None] | None = None
 
 
-def _get_client() -> OpenAI:
+def _get_client() -> "OpenAI":
     global _client
     if _client is None:
         api_key = os.environ.get("OPENROUTER_API_KEY", "")
         if not api_key:
             raise RuntimeError("OPENROUTER_API_KEY environment variable is not set")
+        # Imported on first use (and by the startup warmup), not at server import
+        from openai import OpenAI
+
         _client = OpenAI(
             base_url="https://openrouter.ai/api/v1",
             api_key=api_key,
@@ -48,6 +71,33 @@ def _cache_path(key: str) -> str:
     return os.path.join(_CACHE_DIR, f"embeddings_{key}.npz")
 
 
+def _mmap_member(path: str, name: str) -> np.ndarray | None:
+    """Memory-map an array stored uncompressed in an .npz file.
+
+    Every worker process maps the same file, so the matrix sits in the OS
+    page cache once instead of being copied into each worker. Returns
+    None for compressed members.
+    """
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(f"{name}.npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        local_header = f.read(30)
+        name_len = int.from_bytes(local_header[26:28], "little")
+        extra_len = int.from_bytes(local_header[28:30], "little")
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    order = "F" if fortran_order else "C"
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape, order=order, offset=offset)
+
+
 def _load_cache(products: list[dict], texts: list[str]) -> bool:
     """Try to load embeddings from disk cache. Returns True if successful."""
     key = _cache_key(texts)
@@ -57,9 +107,13 @@ def _load_cache(products: list[dict], texts: list[str]) -> bool:
     try:
         data = np.load(path)
         ids = data["ids"]
-        vecs = data["vecs"]
-        for i, product_id in enumerate(ids):
-            _product_embeddings[int(product_id)] = vecs[i]
+        vecs = _mmap_member(path, "vecs")
+        if vecs is None:
+            vecs = data["vecs"]
+        else:
+            # Fault the pages in now rather than on the first search
+            vecs.sum()
+        _product_embeddings.update({int(product_id): vecs[i] for i, product_id in enumerate(ids)})
         logger.info("[EMBEDDINGS] Loaded %d embeddings from disk cache", len(ids))
         return True
     except Exception as e:
@@ -74,12 +128,38 @@ def _save_cache(texts: list[str]) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
     ids = np.array(list(_product_embeddings.keys()), dtype=np.int64)
     vecs = np.stack(list(_product_embeddings.values()))
-    np.savez(path, ids=ids, vecs=vecs)
+    # Workers may build at the same time; never let one read a partial file
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, ids=ids, vecs=vecs)
+    os.replace(tmp, path)
     logger.info("[EMBEDDINGS] Saved cache to %s", os.path.basename(path))
 
 
+@contextmanager
+def _build_lock(path: str) -> Iterator[None]:
+    """Hold an exclusive lock next to the cache file across processes.
+
+    Workers starting without a cache file take turns, so only the first
+    calls the embedding API and the rest map the file it saved.
+    """
+    try:
+        import fcntl
+    except ImportError:  # Windows: no cross-process lock
+        yield
+        return
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
 def init_embeddings(products: list[dict]) -> None:
-    """Embed all products at startup, using disk cache when available."""
+    """Embed all products at startup, using disk cache when available.
+
+    Only one process at a time computes embeddings for a given catalog.
+    """
     if not products:
         logger.warning("[EMBEDDINGS] No products to embed")
         return
@@ -91,54 +171,129 @@ def init_embeddings(products: list[dict]) -> None:
 
     texts = [f"{p['name']} {p['description']} {p['category']}" for p in products]
 
-    if _load_cache(products, texts):
-        return
+    if not _load_cache(products, texts):
+        _build_once(products, texts)
+
+
+def _build_once(products: list[dict], texts: list[str]) -> None:
+    path = _cache_path(_cache_key(texts))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _build_lock(path):
+        # Another worker may have saved the cache while we waited
+        if not _load_cache(products, texts):
+            _embed_products(products, texts)
+
 
+def _embed_products(products: list[dict], texts: list[str]) -> None:
     client = _get_client()
     response = client.embeddings.create(model=EMBEDDING_MODEL, input=texts)
 
+    # Published in one step so searches never see a partial index
+    vectors = {}
     for i, product in enumerate(products):
         vec = np.array(response.data[i].embedding, dtype=np.float32)
-        _product_embeddings[product["id"]] = _normalize(vec)
+        vectors[product["id"]] = _normalize(vec)
+    _product_embeddings.update(vectors)
 
     logger.info("[EMBEDDINGS] Computed embeddings for %d products", len(_product_embeddings))
     _save_cache(texts)
 
 
 def embed_query(query: str) -> np.ndarray:
-    """Embed a search query."""
+    """Embed a search query within the remaining request budget."""
     client = _get_client()
-    response = client.embeddings.create(model=EMBEDDING_MODEL, input=query)
+    timeout = deadline.cap(EMBED_TIMEOUT, "embedding")
+    with track_upstream("openrouter", "embedding"):
+        response = client.embeddings.create(model=EMBEDDING_MODEL, input=query, timeout=timeout)
     vec = np.array(response.data[0].embedding, dtype=np.float32)
     return _normalize(vec)
 
 
 def semantic_search(
-    query: str, threshold: float = 0.6, max_results: int = 10
+    query: str,
+    threshold: float = 0.6,
+    max_results: int = 10,
+    query_vec: np.ndarray | None = None,
 ) -> list[tuple[int, float]]:
-    """Return product IDs with similarity scores above threshold, sorted by score."""
+    """Return product IDs with similarity scores above threshold, sorted by score.
+
+    Pass `query_vec` to reuse an embedding computed ahead of time.
+    """
     if not _product_embeddings:
         return []
 
-    query_vec = embed_query(query)
+    if query_vec is None:
+        with span("embed"):
+            query_vec = embed_query(query)
 
-    results: list[tuple[int, float]] = []
-    for product_id, product_vec in _product_embeddings.items():
-        score = float(np.dot(query_vec, product_vec))
-        if score >= threshold:
-            results.append((product_id, score))
+    with span("score"):
+        results: list[tuple[int, float]] = []
+        for product_id, product_vec in list(_product_embeddings.items()):
+            score = float(np.dot(query_vec, product_vec))
+            if score >= threshold:
+                results.append((product_id, score))
 
-    results.sort(key=lambda x: x[1], reverse=True)
+        results.sort(key=lambda x: x[1], reverse=True)
     return results[:max_results]
 
 
+def _build_index(load_products: Callable[[], list[dict]]) -> None:
+    global _index_state
+    try:
+        with stage("init_embeddings"):
+            init_embeddings(load_products())
+    except Exception as e:
+        _index_state = "failed"
+        logger.warning("[EMBEDDINGS] Index build failed: %s", e)
+        return
+    _index_state = "ready" if _product_embeddings else "disabled"
+    logger.info("[EMBEDDINGS] Index %s", _index_state)
+
+
+def start_index_build(load_products: Callable[[], list[dict]]) -> None:
+    """Load the catalog and build the embedding index in a worker thread.
+
+    Returns immediately so the app can serve while the index builds;
+    `is_building()` is true until it is done.
+    """
+    global _index_state, _build_task
+    if _build_task is not None:
+        return
+    _index_state = "building"
+    _build_task = asyncio.create_task(asyncio.to_thread(_build_index, load_products))
+
+
+async def stop_index_build() -> None:
+    """Stop waiting for an unfinished build; its thread runs to completion."""
+    global _build_task
+    if _build_task is not None:
+        _build_task.cancel()
+        try:
+            await _build_task
+        except asyncio.CancelledError:
+            pass
+        _build_task = None
+
+
+def index_state() -> str:
+    """Return the embedding index state: idle, building, ready, disabled or failed."""
+    return _index_state
+
+
+def is_building() -> bool:
+    """Check if the embedding index is still being built."""
+    return _index_state == "building"
+
+
 def is_available() -> bool:
     """Check if semantic search is available (embeddings loaded)."""
     return len(_product_embeddings) > 0
 
 
 def clear_cache() -> None:
-    """Clear cached embeddings and client. Used for testing."""
-    global _client
+    """Clear cached embeddings, client and index state. Used for testing."""
+    global _client, _index_state, _build_task
     _product_embeddings.clear()
     _client = None
+    _index_state = "idle"
+    _build_task = None
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from .memory import track, track_file
+from .models import VoiceSearchExtraction
+from .text import normalize_query
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "db", "extraction_cache.db"
+)
+CACHE_TTL_SECONDS = float(os.environ.get("EXTRACTION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+MAX_MEMORY_ENTRIES = int(os.environ.get("EXTRACTION_CACHE_MAX_ENTRIES", "1024"))
+MAX_DISK_ENTRIES = int(os.environ.get("EXTRACTION_CACHE_MAX_DISK_ENTRIES", "20000"))
+
+# In-memory LRU: cache key -> (expires_at, extraction)
+_memory: OrderedDict[str, tuple[float, VoiceSearchExtraction]] = OrderedDict()
+_stats: Counter[str] = Counter()
+# One connection for the process, opened by init_cache()
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+track("extraction_cache", lambda: _memory)
+track_file("extraction_cache_db", lambda: CACHE_DB_PATH)
+
+
+def cache_key(transcript: str, version: str) -> str | None:
+    """Build a cache key from the normalized transcript and prompt/model version.
+
+    Returns None for transcripts that normalize to nothing.
+    """
+    normalized = normalize_query(transcript)
+    if not normalized:
+        return None
+    digest = hashlib.sha256(normalized.encode()).hexdigest()[:32]
+    return f"{version}:{digest}"
+
+
+def init_cache() -> None:
+    """Open the SQLite tier and create its table. Called once, on first use."""
+    global _conn
+    with _lock:
+        if _conn is not None:
+            return
+        os.makedirs(os.path.dirname(CACHE_DB_PATH), exist_ok=True)
+        # Shared by the worker threads that run disk lookups; _lock serializes them
+        conn = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_extraction_expires_at ON extraction_cache (expires_at)"
+        )
+        _conn = conn
+
+
+def _connection() -> sqlite3.Connection:
+    if _conn is None:
+        init_cache()
+    assert _conn is not None
+    return _conn
+
+
+def _remember(key: str, expires_at: float, value: VoiceSearchExtraction) -> None:
+    _memory[key] = (expires_at, value)
+    _memory.move_to_end(key)
+    while len(_memory) > MAX_MEMORY_ENTRIES:
+        _memory.popitem(last=False)
+
+
+def _read(key: str, now: float) -> tuple[str, float] | None:
+    try:
+        conn = _connection()
+        with _lock:
+            row = conn.execute(
+                "SELECT value, expires_at FROM extraction_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] <= now:
+                conn.execute("DELETE FROM extraction_cache WHERE key = ?", (key,))
+                conn.commit()
+                row = None
+    except sqlite3.Error as e:
+        logger.warning("[EXTRACT_CACHE] Read failed: %s", e)
+        return None
+    return row
+
+
+def _write(key: str, value: str, expires_at: float) -> None:
+    try:
+        conn = _connection()
+        with _lock:
+            conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            # Rows that are never read again would otherwise stay forever
+            expired = conn.execute(
+                "DELETE FROM extraction_cache WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            # Counted inside this write transaction, so the bound holds
+            # across worker processes sharing the file
+            rows = conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
+            evicted = 0
+            if rows > MAX_DISK_ENTRIES:
+                # Every entry has the same TTL: the soonest to expire is the oldest
+                evicted = conn.execute(
+                    """
+                    DELETE FROM extraction_cache WHERE key IN (
+                        SELECT key FROM extraction_cache ORDER BY expires_at LIMIT ?
+                    )
+                    """,
+                    (rows - MAX_DISK_ENTRIES,),
+                ).rowcount
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.warning("[EXTRACT_CACHE] Write failed: %s", e)
+        return
+    _stats["disk_expired"] += max(expired, 0)
+    _stats["disk_evictions"] += max(evicted, 0)
+
+
+async def get(key: str) -> VoiceSearchExtraction | None:
+    """Look up an extraction, checking the in-memory LRU before SQLite.
+
+    Memory hits return without leaving the event loop; the SQLite lookup
+    runs in a worker thread.
+    """
+    now = time.time()
+    entry = _memory.get(key)
+    if entry is not None:
+        expires_at, value = entry
+        if expires_at > now:
+            _memory.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return value.model_copy()
+        del _memory[key]
+
+    row = await asyncio.to_thread(_read, key, now)
+    if row is None:
+        _stats["misses"] += 1
+        return None
+
+    value = VoiceSearchExtraction.model_validate_json(row[0])
+    _remember(key, row[1], value)
+    _stats["disk_hits"] += 1
+    return value.model_copy()
+
+
+async def put(key: str, value: VoiceSearchExtraction) -> None:
+    """Store an extraction in memory, then write it to SQLite in a worker thread."""
+    expires_at = time.time() + CACHE_TTL_SECONDS
+    _remember(key, expires_at, value.model_copy())
+    await asyncio.to_thread(_write, key, value.model_dump_json(), expires_at)
+
+
+def cache_stats() -> dict[str, int]:
+    """Return hit/miss/pruning counters and the in-memory entry count."""
+    return {
+        "memory_hits": _stats["memory_hits"],
+        "disk_hits": _stats["disk_hits"],
+        "misses": _stats["misses"],
+        "disk_expired": _stats["disk_expired"],
+        "disk_evictions": _stats["disk_evictions"],
+        "memory_entries": len(_memory),
+    }
+
+
+def clear_cache() -> None:
+    """Clear both cache tiers and counters. Used for testing."""
+    global _conn
+    _memory.clear()
+    _stats.clear()
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+    if os.path.exists(CACHE_DB_PATH):
+        os.unlink(CACHE_DB_PATH)
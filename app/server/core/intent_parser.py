@@ -0,0 +1,213 @@
+import logging
+import os
+import re
+from collections import Counter
+
+from .db import get_connection
+from .memory import track
+from .models import VoiceSearchExtraction
+from .text import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# "on": answer confident transcripts locally and skip the LLM
+# "shadow": always use the LLM, but compare its output with the parser's
+# "off": never use the parser
+INTENT_PARSER_MODE = os.environ.get("INTENT_PARSER_MODE", "on")
+
+# The fixed rules from llm_extraction.SYSTEM_PROMPT, as token tables
+CATEGORY_NAMES = {
+    "electronics": "Electronics",
+    "clothing": "Clothing",
+    "clothes": "Clothing",
+    "home": "Home",
+    "books": "Books",
+    "sports": "Sports",
+}
+
+CATEGORY_KEYWORDS = {
+    **dict.fromkeys(
+        ["camping", "hiking", "outdoor", "fitness", "exercise", "gym", "workout", "yoga"], "Sports"
+    ),
+    **dict.fromkeys(["tech", "gadget", "computer", "phone", "audio", "digital"], "Electronics"),
+    **dict.fromkeys(["kitchen", "cooking", "decor", "furniture", "household"], "Home"),
+    **dict.fromkeys(["reading", "novel", "literature", "textbook", "study"], "Books"),
+    **dict.fromkeys(["fashion", "wear", "outfit", "apparel", "shoes"], "Clothing"),
+}
+
+QUALITY_WORDS = {
+    **dict.fromkeys(["good", "quality", "reliable", "well-rated", "decent"], 4.0),
+    **dict.fromkeys(["best", "top", "excellent", "amazing", "great"], 4.5),
+}
+
+SORT_WORDS = {
+    **dict.fromkeys(["cheap", "cheapest", "affordable", "budget", "inexpensive"], "price_asc"),
+    **dict.fromkeys(["expensive", "priciest"], "price_desc"),
+}
+
+RATING_SORT_PHRASES = re.compile(r"\b(?:top|best|highest)[ -]rated\b")
+
+STAR_RATING = re.compile(
+    r"\b(?:at least |minimum |min )?(\d(?:\.\d)?|one|two|three|four|five)[ -]stars?"
+    r"(?: (?:and|or) (?:up|above|more|higher))?\b"
+)
+NUMBER_WORDS = {"one": 1.0, "two": 2.0, "three": 3.0, "four": 4.0, "five": 5.0}
+
+FILLER_WORDS = frozenset(
+    "i im i'm want need looking look for show me find get buy search searching some a an "
+    "the please can you could give any something that is are of to my like would id with "
+    "products product items item stuff things rated".split()
+)
+
+# Signals the rules cannot express; these transcripts go to the LLM
+AMBIGUOUS_WORDS = frozenset(
+    "not no without except or but under below less over above more than dollars bucks "
+    "premium priced price cheaper nice".split()
+)
+
+# Catalog token -> categories of the products whose names contain it
+_vocabulary: dict[str, set[str]] | None = None
+_stats: Counter[str] = Counter()
+track("intent_vocabulary", lambda: _vocabulary)
+
+
+def _load_vocabulary() -> dict[str, set[str]]:
+    global _vocabulary
+    if _vocabulary is None:
+        conn = get_connection()
+        try:
+            rows = conn.execute("SELECT name, category FROM products").fetchall()
+        finally:
+            conn.close()
+        vocabulary: dict[str, set[str]] = {}
+        for name, category in rows:
+            for token in normalize_query(name).split():
+                for form in {token, token.rstrip("s"), token + "s"}:
+                    vocabulary.setdefault(form, set()).add(category)
+        _vocabulary = vocabulary
+    return _vocabulary
+
+
+def parse_intent(transcript: str) -> VoiceSearchExtraction | None:
+    """Extract search parameters with deterministic rules.
+
+    Returns None when the transcript is ambiguous and should go to the LLM:
+    unknown words, price limits, negations or conflicting filters.
+    """
+    text = normalize_query(transcript)
+    if not text:
+        return None
+
+    min_rating: float | None = None
+    sort: str | None = None
+
+    stars = STAR_RATING.findall(text)
+    if len(stars) > 1:
+        return None
+    if stars:
+        value = stars[0]
+        min_rating = NUMBER_WORDS.get(value) or float(value)
+        if not 1.0 <= min_rating <= 5.0:
+            return None
+        text = STAR_RATING.sub(" ", text)
+
+    if RATING_SORT_PHRASES.search(text):
+        sort = "rating"
+        text = RATING_SORT_PHRASES.sub(" ", text)
+
+    vocabulary = _load_vocabulary()
+    categories: set[str] = set()
+    product_categories: list[set[str]] = []
+    query_tokens: list[str] = []
+
+    for token in text.split():
+        if token in AMBIGUOUS_WORDS or token.isdigit():
+            return None
+        if token in FILLER_WORDS:
+            continue
+        if token in CATEGORY_NAMES:
+            categories.add(CATEGORY_NAMES[token])
+            continue
+        if token in SORT_WORDS:
+            if sort is not None and sort != SORT_WORDS[token]:
+                return None
+            sort = SORT_WORDS[token]
+            continue
+        if token in QUALITY_WORDS:
+            # Explicit star ratings win over quality language
+            if min_rating is None or not stars:
+                min_rating = max(min_rating or 0.0, QUALITY_WORDS[token])
+            continue
+        if token in CATEGORY_KEYWORDS:
+            categories.add(CATEGORY_KEYWORDS[token])
+            if token not in vocabulary:
+                continue
+        if token not in vocabulary:
+            return None
+        product_categories.append(vocabulary[token])
+        query_tokens.append(token)
+
+    if not query_tokens or len(categories) > 1:
+        return None
+    category = next(iter(categories), None)
+    if category is not None and any(category not in cats for cats in product_categories):
+        return None
+
+    return VoiceSearchExtraction(
+        query=" ".join(query_tokens), min_rating=min_rating, sort=sort, category=category
+    )
+
+
+def try_fast_path(transcript: str) -> VoiceSearchExtraction | None:
+    """Return the parser's result when the fast path is enabled and confident."""
+    if INTENT_PARSER_MODE != "on":
+        return None
+    result = parse_intent(transcript)
+    _stats["fast_path_hits" if result is not None else "deferrals"] += 1
+    return result
+
+
+def record_shadow(transcript: str, llm_result: VoiceSearchExtraction, llm_ms: float) -> None:
+    """Compare the parser with an LLM extraction when running in shadow mode."""
+    if INTENT_PARSER_MODE != "shadow":
+        return
+    parsed = parse_intent(transcript)
+    if parsed is None:
+        _stats["shadow_deferrals"] += 1
+        return
+    _stats["shadow_comparisons"] += 1
+    _stats["shadow_llm_ms_saved"] += round(llm_ms)
+    llm_normalized = llm_result.model_copy(update={"query": normalize_query(llm_result.query)})
+    if parsed == llm_normalized:
+        _stats["shadow_agreements"] += 1
+    else:
+        logger.info(
+            "[INTENT] Shadow mismatch for %r: rules=%s llm=%s", transcript, parsed, llm_result
+        )
+
+
+def parser_stats() -> dict[str, float | str]:
+    """Return fast-path and shadow-evaluation counters."""
+    comparisons = _stats["shadow_comparisons"]
+    return {
+        "mode": INTENT_PARSER_MODE,
+        "fast_path_hits": _stats["fast_path_hits"],
+        "deferrals": _stats["deferrals"],
+        "shadow_comparisons": comparisons,
+        "shadow_agreements": _stats["shadow_agreements"],
+        "shadow_deferrals": _stats["shadow_deferrals"],
+        "shadow_agreement_rate": _stats["shadow_agreements"] / comparisons if comparisons else 0.0,
+        "shadow_llm_ms_saved": _stats["shadow_llm_ms_saved"],
+    }
+
+
+def warm_vocabulary() -> None:
+    """Build the catalog vocabulary ahead of the first transcript."""
+    _load_vocabulary()
+
+
+def clear_cache() -> None:
+    """Drop the catalog vocabulary and counters. Used for testing."""
+    global _vocabulary
+    _vocabulary = None
+    _stats.clear()
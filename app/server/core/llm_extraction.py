@@ -1,11 +1,22 @@
 import asyncio
+import hashlib
+import json
 import logging
 import os
+import time
+from typing import TYPE_CHECKING
 
-import instructor
-from litellm import completion
-
+from . import deadline, extraction_cache, intent_parser
+from .admission import AdmissionController, AdmissionRejected
+from .metrics import track_upstream
+from .model_router import ModelRouter
 from .models import VoiceSearchExtraction
+from .singleflight import SingleFlight
+from .startup import import_lock
+from .tracing import span
+
+if TYPE_CHECKING:
+    import instructor
 
 logger = logging.getLogger(__name__)
 
@@ -47,21 +58,58 @@ Rules:
 """
 
 
+# Part of every cache key, so editing the prompt, model list or schema
+# invalidates previously cached extractions
+PROMPT_VERSION = hashlib.sha256(
+    "\n".join(
+        [
+            SYSTEM_PROMPT,
+            *EXTRACTION_MODELS,
+            json.dumps(VoiceSearchExtraction.model_json_schema(), sort_keys=True),
+        ]
+    ).encode()
+).hexdigest()[:12]
+
+
 class LLMExtractionError(Exception):
     """Raised when LLM extraction fails."""
 
 
-_client: instructor.Instructor | None = None
+_client: "instructor.AsyncInstructor | None" = None
 
 
-def _get_client() -> instructor.Instructor:
+def _get_client() -> "instructor.AsyncInstructor":
     global _client
     if _client is None:
         api_key = os.environ.get("OPENROUTER_API_KEY", "")
         if not api_key:
             raise LLMExtractionError("OPENROUTER_API_KEY not set")
-        _client = instructor.from_litellm(completion)
-    return _client
+        # Imported on first use (and by the startup warmup), not at server import
+        with import_lock:
+            import instructor
+            from litellm import acompletion
+
+        _client = instructor.from_litellm(acompletion)  # type: ignore[assignment]
+    return _client  # type: ignore[return-value]
+
+
+LLM_CALL_TIMEOUT = 10.0
+
+_inflight: SingleFlight[VoiceSearchExtraction] = SingleFlight()
+# Dedicated bound on concurrent LLM extractions; overflow fails fast so
+# callers fall back to using the transcript as the query
+_llm_slots = AdmissionController(
+    "llm_extraction",
+    max_in_flight=int(os.environ.get("LLM_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.environ.get("LLM_MAX_QUEUE", "16")),
+    queue_timeout=float(os.environ.get("LLM_QUEUE_TIMEOUT_SECONDS", "0.5")),
+)
+_router: ModelRouter[VoiceSearchExtraction] = ModelRouter(
+    EXTRACTION_MODELS,
+    default_hedge_delay=float(os.environ.get("EXTRACTION_HEDGE_DELAY_SECONDS", "2.0")),
+    failure_threshold=int(os.environ.get("EXTRACTION_CIRCUIT_FAILURES", "3")),
+    cooldown=float(os.environ.get("EXTRACTION_CIRCUIT_COOLDOWN_SECONDS", "30")),
+)
 
 
 async def extract_voice_search(
@@ -69,8 +117,10 @@ async def extract_voice_search(
 ) -> VoiceSearchExtraction:
     """Extract structured search parameters from a voice transcript.
 
-    Uses Gemini 2.5 Flash via OpenRouter/LiteLLM with instructor
-    for structured Pydantic output.
+    Transcripts the rule-based intent parser is confident about are
+    answered locally. Otherwise results are cached by normalized
+    transcript, and concurrent requests for the same transcript share a
+    single LLM call.
 
     Args:
         transcript: The raw voice transcript text.
@@ -81,51 +131,106 @@ async def extract_voice_search(
     Raises:
         LLMExtractionError: If all LLM models fail.
     """
-    client = _get_client()
-    last_error: Exception | None = None
-
-    for model_name in EXTRACTION_MODELS:
-        try:
-            logger.info("[EXTRACT] Trying model %s", model_name)
-
-            def make_completion(
-                current_model: str = model_name,
-            ) -> VoiceSearchExtraction:
-                return client.completions.create(  # type: ignore[return-value]
-                    model=current_model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": SYSTEM_PROMPT,
-                        },
-                        {
-                            "role": "user",
-                            "content": transcript,
-                        },
-                    ],
-                    response_model=VoiceSearchExtraction,
-                    temperature=0.1,
-                    max_retries=2,
-                    timeout=10.0,
-                )
-
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(None, make_completion)
-
-            logger.info(
-                "[EXTRACT] Success with %s: %s",
-                model_name,
-                result,
-            )
-            return result
+    fast = intent_parser.try_fast_path(transcript)
+    if fast is not None:
+        logger.info("[EXTRACT] Rule-based match: %s", fast)
+        return fast
+
+    key = extraction_cache.cache_key(transcript, PROMPT_VERSION)
+    if key is None:
+        return await _extract_uncached(transcript)
+
+    cached = await extraction_cache.get(key)
+    if cached is not None:
+        logger.info("[EXTRACT] Cache hit for %r", transcript)
+        return cached
+
+    async def extract_and_store() -> VoiceSearchExtraction:
+        start = time.perf_counter()
+        result = await _extract_uncached(transcript)
+        intent_parser.record_shadow(transcript, result, (time.perf_counter() - start) * 1000)
+        await extraction_cache.put(key, result)
+        return result
+
+    result = await _inflight.do(key, extract_and_store)
+    return result.model_copy()
+
+
+def model_stats() -> dict[str, dict[str, float | int | str]]:
+    """Return rolling latency, error rate and circuit state per extraction model."""
+    return _router.stats()
+
+
+def circuit_states() -> dict[str, str]:
+    """Return the circuit breaker state per extraction model."""
+    return {model: _router.circuit_state(model) for model in _router.models}
+
+
+def extraction_stats() -> dict[str, int]:
+    """Return cache, request-coalescing and LLM concurrency counters for extraction."""
+    return {
+        **extraction_cache.cache_stats(),
+        "llm_calls": _inflight.executions,
+        "coalesced": _inflight.coalesced,
+        "llm_in_flight": _llm_slots.stats()["in_flight"],
+        "llm_queue_depth": _llm_slots.stats()["queue_depth"],
+        "llm_rejected": _llm_slots.rejected,
+    }
 
-        except Exception as e:
-            logger.warning(
-                "[EXTRACT] Model %s failed: %s",
-                model_name,
-                str(e)[:200],
+
+async def _extract_uncached(
+    transcript: str,
+) -> VoiceSearchExtraction:
+    """Extract structured search parameters by calling the LLM.
+
+    Uses Gemini 2.5 Flash via OpenRouter/LiteLLM with instructor
+    for structured Pydantic output, hedging to the fallback model when
+    the primary is slower than its rolling p95 latency.
+
+    Args:
+        transcript: The raw voice transcript text.
+
+    Returns:
+        VoiceSearchExtraction with query, optional filters and sort.
+
+    Raises:
+        LLMExtractionError: If all LLM models fail.
+        DeadlineExceeded: If the request deadline passed before the call.
+    """
+    # The first call may still be importing litellm; keep that off the loop
+    client = _client or await asyncio.to_thread(_get_client)
+
+    async def call_model(model_name: str) -> VoiceSearchExtraction:
+        logger.info("[EXTRACT] Trying model %s", model_name)
+        with span("llm_call", model_name), track_upstream("openrouter", model_name):
+            return await client.completions.create(
+                model=model_name,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": SYSTEM_PROMPT,
+                    },
+                    {
+                        "role": "user",
+                        "content": transcript,
+                    },
+                ],
+                response_model=VoiceSearchExtraction,
+                temperature=0.1,
+                max_retries=2,
+                timeout=deadline.cap(LLM_CALL_TIMEOUT, "llm"),
             )
-            last_error = e
-            continue
 
-    raise LLMExtractionError(f"All extraction models failed: {last_error}")
+    # Retries and hedged fallbacks all share what is left of the request budget
+    budget = deadline.check("llm")
+    try:
+        async with _llm_slots.slot(deadline.get_deadline()):
+            with span("llm"):
+                result = await asyncio.wait_for(_router.run(call_model), budget)
+    except AdmissionRejected as e:
+        raise LLMExtractionError(str(e)) from e
+    except Exception as e:
+        raise LLMExtractionError(f"All extraction models failed: {e}") from e
+
+    logger.info("[EXTRACT] Extracted: %s", result)
+    return result
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+import sentry_sdk
+
+from .metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR_ENABLED = os.environ.get("LOOP_MONITOR_ENABLED", "true").lower() != "false"
+LOOP_LAG_INTERVAL_SECONDS = float(os.environ.get("LOOP_LAG_INTERVAL_SECONDS", "0.25"))
+# Scheduling delay that counts as the loop being blocked
+LOOP_LAG_THRESHOLD_MS = float(os.environ.get("LOOP_LAG_THRESHOLD_MS", "200"))
+STACK_LIMIT = 30
+
+LOOP_LAG = Histogram(
+    "voxstore_event_loop_lag_seconds", "Delay between a timer's due time and when it ran."
+)
+LOOP_BLOCKED = Counter(
+    "voxstore_event_loop_blocked_total", "Times the event loop was blocked past the threshold."
+)
+
+
+class LoopMonitor:
+    """Measure event-loop scheduling delay and catch what blocks it.
+
+    A task sleeps for `interval` seconds in a loop and records how late
+    it wakes up. A watchdog thread watches the task's heartbeat; when it
+    is more than `threshold_ms` overdue, the loop thread's current stack
+    is captured while the blocking call is still running, logged, and
+    sent to Sentry.
+    """
+
+    def __init__(self, interval: float, threshold_ms: float) -> None:
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        self.samples = 0
+        self.blocked = 0
+        self.max_lag_ms = 0.0
+        self.last_lag_ms = 0.0
+        self.last_stack: str | None = None
+        self._beat = 0.0
+        self._reported_beat = 0.0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        """Start sampling. Must be called from the event loop thread."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._sample_loop())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the sampler task and the watchdog thread."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def _sample_loop(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._beat = now
+            lag = max(now - expected, 0.0)
+            self.samples += 1
+            self.last_lag_ms = lag * 1000
+            self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+            LOOP_LAG.labels().observe(lag)
+            if self.last_lag_ms >= self.threshold_ms:
+                logger.warning("[LOOP_LAG] Event loop was blocked for %.0f ms", self.last_lag_ms)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            overdue_ms = (time.perf_counter() - beat - self.interval) * 1000
+            if overdue_ms >= self.threshold_ms and beat != self._reported_beat:
+                # Once per stall, while the blocking call is still on the stack
+                self._reported_beat = beat
+                self._report(overdue_ms)
+
+    def _current_task_name(self) -> str | None:
+        # Read without the loop's cooperation; good enough for a report
+        current_tasks = getattr(asyncio.tasks, "_current_tasks", {})
+        task = current_tasks.get(self._loop)
+        if task is None:
+            return None
+        coro = task.get_coro()
+        return getattr(coro, "__qualname__", None) or task.get_name()
+
+    def _report(self, overdue_ms: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id or 0)
+        if frame is None:
+            return
+        summary = traceback.extract_stack(frame, limit=STACK_LIMIT)
+        stack = "".join(summary.format())
+        innermost = f"{summary[-1].filename}:{summary[-1].name}"
+        task = self._current_task_name()
+        self.blocked += 1
+        self.last_stack = stack
+        LOOP_BLOCKED.labels().inc()
+        logger.warning(
+            "[LOOP_LAG] Event loop blocked for %.0f ms+ in task %s:\n%s",
+            overdue_ms,
+            task or "<none>",
+            stack,
+        )
+        if sentry_sdk.get_client().is_active():
+            with sentry_sdk.new_scope() as scope:
+                scope.set_tag("blocking_task", task or "<none>")
+                scope.set_extra("stack", stack)
+                scope.set_extra("overdue_ms", round(overdue_ms))
+                # Group by where the loop was stuck, not by duration
+                scope.fingerprint = ["event-loop-blocked", innermost]
+                sentry_sdk.capture_message("Event loop blocked", level="warning")
+
+    def stats(self) -> dict[str, float | int]:
+        return {
+            "samples": self.samples,
+            "blocked": self.blocked,
+            "last_lag_ms": round(self.last_lag_ms, 2),
+            "max_lag_ms": round(self.max_lag_ms, 2),
+            "threshold_ms": self.threshold_ms,
+        }
+
+
+_monitor = LoopMonitor(LOOP_LAG_INTERVAL_SECONDS, LOOP_LAG_THRESHOLD_MS)
+
+
+def start_loop_monitor() -> None:
+    """Start the loop-lag monitor. Called from the app lifespan."""
+    if LOOP_MONITOR_ENABLED:
+        _monitor.start()
+
+
+async def stop_loop_monitor() -> None:
+    """Stop the loop-lag monitor. Called from the app lifespan."""
+    await _monitor.stop()
+
+
+def loop_lag_stats() -> dict[str, float | int]:
+    """Return loop-lag samples, blocked-loop reports and lag maxima."""
+    return _monitor.stats()
@@ -0,0 +1,188 @@
+import itertools
+import logging
+import os
+import sys
+import time
+import tracemalloc
+import types
+from collections import OrderedDict, deque
+from collections.abc import Callable, Sized
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TRACEMALLOC_FRAMES = int(os.environ.get("TRACEMALLOC_FRAMES", "10"))
+MAX_SNAPSHOTS = 5
+
+# name -> function returning the object that holds the cache
+_tracked: dict[str, Callable[[], object]] = {}
+# name -> function returning the path of a SQLite file
+_tracked_files: dict[str, Callable[[], str]] = {}
+_snapshots: OrderedDict[str, tracemalloc.Snapshot] = OrderedDict()
+_snapshot_seq = itertools.count(1)
+
+# Referenced by caches but not owned by them
+_NOT_FOLLOWED = (type, types.ModuleType, types.FunctionType, types.MethodType)
+
+
+class SnapshotNotFound(Exception):
+    """Raised when diffing against a tracemalloc snapshot that does not exist."""
+
+
+def track(name: str, get: Callable[[], object]) -> None:
+    """Include a module-level cache in memory reports.
+
+    `get` is called at report time, so it can return an object that is
+    rebound later (e.g. a lazily built dict).
+    """
+    _tracked[name] = get
+
+
+def track_file(name: str, get_path: Callable[[], str]) -> None:
+    """Include the on-disk size of a SQLite database in memory reports.
+
+    Its pages are read through the OS page cache, which counts towards
+    RSS as the file is used.
+    """
+    _tracked_files[name] = get_path
+
+
+def deep_sizeof(obj: object) -> int:
+    """Estimate the bytes held by `obj` and everything it references.
+
+    Follows containers, instance attributes and numpy views' base arrays;
+    shared objects are counted once. Classes, modules and functions are
+    not followed.
+    """
+    seen: set[int] = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, _NOT_FOLLOWED):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, np.ndarray):
+            # A view's data belongs to its base; count that array once
+            if current.base is not None:
+                stack.append(current.base)
+        elif isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, list | tuple | set | frozenset | deque):
+            stack.extend(list(current))
+        elif hasattr(current, "__dict__"):
+            stack.append(vars(current))
+        else:
+            slots = getattr(current, "__slots__", ())
+            slots = (slots,) if isinstance(slots, str) else slots
+            stack.extend(getattr(current, s) for s in slots if hasattr(current, s))
+    return total
+
+
+def process_rss() -> int | None:
+    """Return the resident set size of this process in bytes, if known."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def memory_report() -> dict[str, Any]:
+    """Return the process RSS, the estimated size of every tracked cache and file sizes."""
+    objects: dict[str, dict[str, int | None]] = {}
+    for name, get in list(_tracked.items()):
+        obj = get()
+        objects[name] = {
+            "bytes": deep_sizeof(obj),
+            "entries": len(obj) if isinstance(obj, Sized) else None,
+        }
+    files: dict[str, int | None] = {}
+    for name, get_path in list(_tracked_files.items()):
+        try:
+            files[name] = os.path.getsize(get_path())
+        except OSError:
+            files[name] = None
+    return {
+        "rss_bytes": process_rss(),
+        "objects": objects,
+        "files": files,
+        "tracemalloc": tracemalloc_status(),
+    }
+
+
+def tracemalloc_status() -> dict[str, Any]:
+    """Return whether tracemalloc is on, its traced totals and stored snapshot ids."""
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "traced_bytes": current,
+        "peak_bytes": peak,
+        "snapshots": list(_snapshots),
+    }
+
+
+def take_snapshot() -> str:
+    """Start tracemalloc if needed, take a snapshot and return its id.
+
+    Only allocations made after tracing starts are seen, so take a first
+    snapshot as the baseline before the load being investigated. The
+    oldest snapshot is dropped beyond MAX_SNAPSHOTS.
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        logger.info("[MEMORY] tracemalloc started (%d frames)", TRACEMALLOC_FRAMES)
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),)
+    )
+    snapshot_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{next(_snapshot_seq)}"
+    _snapshots[snapshot_id] = snapshot
+    while len(_snapshots) > MAX_SNAPSHOTS:
+        _snapshots.popitem(last=False)
+    return snapshot_id
+
+
+def diff_snapshots(start: str, end: str | None = None, limit: int = 20) -> dict[str, Any]:
+    """Compare two snapshots and return the biggest growth by allocation site.
+
+    Args:
+        start: Baseline snapshot id.
+        end: Later snapshot id; a new snapshot is taken when omitted.
+        limit: Number of allocation sites to return.
+
+    Raises:
+        SnapshotNotFound: If either id is unknown.
+    """
+    if end is None:
+        end = take_snapshot()
+    try:
+        before, after = _snapshots[start], _snapshots[end]
+    except KeyError as e:
+        raise SnapshotNotFound(f"Unknown snapshot {e.args[0]}") from e
+    stats = after.compare_to(before, "traceback")
+    return {
+        "start": start,
+        "end": end,
+        "size_diff_bytes": sum(s.size_diff for s in stats),
+        "top": [
+            {
+                "size_diff_bytes": s.size_diff,
+                "size_bytes": s.size,
+                "count_diff": s.count_diff,
+                "traceback": s.traceback.format(),
+            }
+            for s in stats[:limit]
+        ],
+    }
+
+
+def stop_tracing() -> None:
+    """Stop tracemalloc and drop stored snapshots."""
+    _snapshots.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logger.info("[MEMORY] tracemalloc stopped")
@@ -0,0 +1,413 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable
+from types import TracebackType
+from typing import Any, Generic, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .memory import track
+
+logger = logging.getLogger(__name__)
+
+# Shared directory where each worker publishes its metrics, so whichever
+# worker serves /metrics can report totals for all of them. Unset for a
+# single process.
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "5"))
+
+# Log-linear bucket bounds in seconds, 100 µs to 70 s with six buckets per
+# decade: HDR-style constant relative precision over a wide range.
+LATENCY_BUCKETS = tuple(round(m * 10.0**e, 6) for e in range(-4, 2) for m in (1, 1.5, 2, 3, 5, 7))
+
+Labels = tuple[str, ...]
+ChildT = TypeVar("ChildT")
+
+_registry: dict[str, "_Metric"] = {}
+_flush_task: asyncio.Task[None] | None = None
+track("metrics", lambda: _registry)
+
+
+# Updates are unlocked: most happen on the event loop thread, and a lock
+# would cost more than the update itself. A worker thread preempted
+# mid-increment can very rarely lose one count, which monitoring tolerates.
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self) -> None:
+        # One count per bound plus the +Inf bucket; not cumulative
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+
+    def time(self) -> "_Timer":
+        """Observe the duration of a `with` block."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_child", "_errors", "_start")
+
+    def __init__(self, child: _HistogramChild, errors: _CounterChild | None = None) -> None:
+        self._child = child
+        self._errors = errors
+        self._start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self._child.observe(time.perf_counter() - self._start)
+        if exc_type is not None and self._errors is not None:
+            self._errors.inc()
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        _registry[name] = self
+
+    @abstractmethod
+    def samples(self) -> dict[Labels, Any]:
+        """Return the current value per label tuple, as written to the worker snapshot."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop all recorded values. Used for testing."""
+
+
+class _LabeledMetric(_Metric, Generic[ChildT]):
+    """A metric recorded in-process, with one child per label tuple."""
+
+    def __init__(self, name: str, help: str, labelnames: Labels = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._children: dict[Labels, ChildT] = {}
+
+    @abstractmethod
+    def _new_child(self) -> ChildT: ...
+
+    def labels(self, *values: str) -> ChildT:
+        try:
+            return self._children[values]
+        except KeyError:
+            return self._children.setdefault(values, self._new_child())
+
+    def clear(self) -> None:
+        self._children.clear()
+
+
+class Counter(_LabeledMetric[_CounterChild]):
+    """Monotonic counter, summed across workers."""
+
+    type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def samples(self) -> dict[Labels, Any]:
+        return {labels: child.value for labels, child in list(self._children.items())}
+
+
+class Histogram(_LabeledMetric[_HistogramChild]):
+    """Latency histogram over LATENCY_BUCKETS, summed across workers."""
+
+    type = "histogram"
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild()
+
+    def samples(self) -> dict[Labels, Any]:
+        return {
+            labels: [*child.counts, child.sum] for labels, child in list(self._children.items())
+        }
+
+
+class CallbackMetric(_Metric):
+    """Counter or gauge whose values are read from `collect` at scrape time.
+
+    Used to export counters core/ modules already keep, at no cost on the
+    request path. Gauges are merged across live workers with `merge`
+    ("sum" or "max"; use "max" for values read from shared state).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        type: str,
+        labelnames: Labels,
+        collect: Callable[[], dict[Labels, float]],
+        merge: str = "sum",
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self.merge = merge
+        self._collect = collect
+
+    def samples(self) -> dict[Labels, Any]:
+        try:
+            return self._collect()
+        except Exception as e:
+            logger.warning("[METRICS] Collecting %s failed: %s", self.name, e)
+            return {}
+
+    def clear(self) -> None:
+        # Values are owned by the module `collect` reads them from
+        pass
+
+
+def track_upstream(service: str, operation: str) -> _Timer:
+    """Time an outbound call, counting it as an error if the block raises."""
+    return _Timer(
+        UPSTREAM_LATENCY.labels(service, operation), UPSTREAM_ERRORS.labels(service, operation)
+    )
+
+
+HTTP_REQUESTS = Counter(
+    "voxstore_http_requests_total", "HTTP requests served.", ("method", "route", "status")
+)
+HTTP_LATENCY = Histogram(
+    "voxstore_http_request_duration_seconds",
+    "Time to serve HTTP requests.",
+    ("method", "route", "status"),
+)
+UPSTREAM_LATENCY = Histogram(
+    "voxstore_upstream_request_duration_seconds",
+    "Time spent in calls to external APIs.",
+    ("service", "operation"),
+)
+UPSTREAM_ERRORS = Counter(
+    "voxstore_upstream_errors_total", "Failed calls to external APIs.", ("service", "operation")
+)
+DB_QUERY_LATENCY = Histogram(
+    "voxstore_db_query_duration_seconds", "Time spent in catalog queries.", ("query",)
+)
+
+
+class MetricsMiddleware:
+    """Count and time every HTTP request by method, route template and status."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The matched route's template keeps label cardinality bounded
+            route = getattr(scope.get("route"), "path", "other")
+            labels = (scope["method"], route, str(status))
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_LATENCY.labels(*labels).observe(time.perf_counter() - start)
+
+
+def snapshot() -> dict[str, dict[str, Any]]:
+    """Return this process's metrics in a JSON-serializable form."""
+    return {
+        name: {
+            "type": metric.type,
+            "help": metric.help,
+            "labelnames": list(metric.labelnames),
+            "merge": getattr(metric, "merge", "sum"),
+            "samples": [[list(labels), value] for labels, value in metric.samples().items()],
+        }
+        for name, metric in list(_registry.items())
+    }
+
+
+def merge_snapshots(
+    snapshots: list[dict[str, dict[str, Any]]], live: list[bool] | None = None
+) -> dict[str, dict[str, Any]]:
+    """Combine per-worker snapshots.
+
+    Counters and histograms are summed over every worker, including
+    exited ones, so totals never go backwards. Gauges only count workers
+    that are still alive.
+    """
+    merged: dict[str, dict[str, Any]] = {}
+    for index, snap in enumerate(snapshots):
+        alive = live[index] if live is not None else True
+        for name, metric in snap.items():
+            if metric["type"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = value
+                elif metric["type"] == "histogram":
+                    target["samples"][key] = [a + b for a, b in zip(current, value, strict=True)]
+                elif metric["merge"] == "max":
+                    target["samples"][key] = max(current, value)
+                else:
+                    target["samples"][key] = current + value
+    for metric in merged.values():
+        metric["samples"] = [[list(k), v] for k, v in metric["samples"].items()]
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names: list[str], values: list[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(snap: dict[str, dict[str, Any]]) -> str:
+    """Render a snapshot in the Prometheus text exposition format."""
+    lines: list[str] = []
+    for name, metric in sorted(snap.items()):
+        names = metric["labelnames"]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for labels, value in sorted(metric["samples"]):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_label_text(names, labels)} {_number(value)}")
+                continue
+            *counts, total = value
+            cumulative = 0
+            for bound, count in zip([*LATENCY_BUCKETS, "+Inf"], counts, strict=True):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_label_text(names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_label_text(names, labels)} {_number(total)}")
+            lines.append(f"{name}_count{_label_text(names, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(METRICS_DIR, f"worker-{pid}.json")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_snapshot() -> None:
+    """Publish this worker's metrics to METRICS_DIR."""
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = _snapshot_path(os.getpid())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot(), f)
+    os.replace(tmp, path)
+
+
+def collect() -> str:
+    """Return metrics for all workers in Prometheus text format.
+
+    Other workers' numbers are as of their last flush, at most
+    FLUSH_INTERVAL_SECONDS old.
+    """
+    if not METRICS_DIR:
+        return render(merge_snapshots([snapshot()]))
+
+    write_snapshot()
+    snapshots: list[dict[str, dict[str, Any]]] = []
+    live: list[bool] = []
+    for filename in os.listdir(METRICS_DIR):
+        if not (filename.startswith("worker-") and filename.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, filename)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning("[METRICS] Skipping %s: %s", filename, e)
+            continue
+        live.append(_pid_alive(int(filename[len("worker-") : -len(".json")])))
+    return render(merge_snapshots(snapshots, live))
+
+
+async def _flush_loop() -> None:
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(write_snapshot)
+        except OSError as e:
+            logger.warning("[METRICS] Flush failed: %s", e)
+
+
+def start_flusher() -> None:
+    """Periodically publish this worker's metrics when METRICS_DIR is set."""
+    global _flush_task
+    if METRICS_DIR and _flush_task is None:
+        _flush_task = asyncio.create_task(_flush_loop())
+
+
+async def stop_flusher() -> None:
+    """Stop publishing and write a final snapshot."""
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+        write_snapshot()
+
+
+def reset() -> None:
+    """Drop all recorded values, keeping registered metrics. Used for testing."""
+    for metric in _registry.values():
+        metric.clear()
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+WINDOW_SIZE = 100
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (which must be non-empty)."""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+@dataclass
+class ModelHealth:
+    """Rolling latency, error rate and circuit breaker state for one model."""
+
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=WINDOW_SIZE))
+    outcomes: deque[bool] = field(default_factory=lambda: deque(maxlen=WINDOW_SIZE))
+    consecutive_failures: int = 0
+    opened_at: float | None = None
+    # A trial call to a non-closed circuit is in flight
+    probing: bool = False
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+class CircuitOpenError(Exception):
+    """Raised when no model can be called because every circuit is open."""
+
+
+class ModelRouter(Generic[T]):
+    """Route calls across models in priority order with hedging.
+
+    The first healthy model is called; if it has not answered by its
+    rolling p95 latency, the next model is called as well and the first
+    successful result wins. A model that fails `failure_threshold` times
+    in a row is skipped until `cooldown` seconds have passed; after that
+    it is tried again by a single probe call, other callers still skipping
+    it, and a failed probe re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        models: list[str],
+        default_hedge_delay: float = 2.0,
+        min_samples: int = 10,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+    ) -> None:
+        self.models = list(models)
+        self.default_hedge_delay = default_hedge_delay
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._health = {model: ModelHealth() for model in self.models}
+
+    def circuit_state(self, model: str) -> str:
+        health = self._health[model]
+        if health.opened_at is None:
+            return "closed"
+        if health.probing:
+            return "open"
+        if time.monotonic() - health.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def candidates(self) -> list[str]:
+        """Models to try, in priority order, skipping open circuits."""
+        available = [m for m in self.models if self.circuit_state(m) != "open"]
+        if available:
+            return available
+        # Every circuit is open: try the one that has been resting longest,
+        # unless a probe is already finding out whether it recovered
+        resting = [m for m in self.models if not self._health[m].probing]
+        if not resting:
+            return []
+        return [min(resting, key=lambda m: self._health[m].opened_at or 0.0)]
+
+    def hedge_delay(self, model: str) -> float:
+        latencies = list(self._health[model].latencies)
+        if len(latencies) < self.min_samples:
+            return self.default_hedge_delay
+        return percentile(latencies, 95)
+
+    def record_success(self, model: str, latency: float) -> None:
+        health = self._health[model]
+        health.latencies.append(latency)
+        health.outcomes.append(True)
+        health.consecutive_failures = 0
+        if health.opened_at is not None:
+            logger.info("[ROUTER] Circuit closed for %s", model)
+        health.opened_at = None
+
+    def record_failure(self, model: str) -> None:
+        health = self._health[model]
+        health.outcomes.append(False)
+        health.consecutive_failures += 1
+        # Any failure of a circuit that is not closed (a probe) re-opens it
+        if health.opened_at is not None or health.consecutive_failures >= self.failure_threshold:
+            health.opened_at = time.monotonic()
+            logger.warning("[ROUTER] Circuit opened for %s", model)
+
+    async def _timed(self, model: str, call: Callable[[str], Awaitable[T]]) -> T:
+        start = time.perf_counter()
+        try:
+            result = await call(model)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.record_failure(model)
+            raise
+        else:
+            self.record_success(model, time.perf_counter() - start)
+        finally:
+            self._health[model].probing = False
+        return result
+
+    async def run(self, call: Callable[[str], Awaitable[T]]) -> T:
+        """Call models with hedging until one succeeds.
+
+        Args:
+            call: Coroutine function taking a model name.
+
+        Returns:
+            The first successful result.
+
+        Raises:
+            CircuitOpenError: If every circuit is open with a probe in flight.
+            Exception: The last model error if every model failed.
+        """
+        queue = self.candidates()
+        pending: dict[asyncio.Task[T], str] = {}
+        last_error: BaseException | None = None
+
+        def launch() -> str | None:
+            while queue:
+                model = queue.pop(0)
+                health = self._health[model]
+                if health.probing:
+                    # Another caller started the probe since candidates()
+                    continue
+                if health.opened_at is not None:
+                    health.probing = True
+                pending[asyncio.create_task(self._timed(model, call))] = model
+                return model
+            return None
+
+        current = launch()
+        if current is None:
+            raise CircuitOpenError("Every model circuit is open")
+        try:
+            while pending:
+                timeout = self.hedge_delay(current) if queue else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    logger.info("[ROUTER] %s slower than %.2fs, hedging", current, timeout)
+                    current = launch() or current
+                    continue
+                for task in done:
+                    model = pending.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        logger.info("[ROUTER] Success with %s", model)
+                        return task.result()
+                    logger.warning("[ROUTER] Model %s failed: %s", model, str(error)[:200])
+                    last_error = error
+                if queue and not pending:
+                    current = launch() or current
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if last_error is None:
+            raise CircuitOpenError("Every model circuit is open")
+        raise last_error
+
+    def stats(self) -> dict[str, dict[str, float | int | str]]:
+        """Return rolling p50/p95 latency, error rate and circuit state per model."""
+        result: dict[str, dict[str, float | int | str]] = {}
+        for model, health in self._health.items():
+            latencies = list(health.latencies)
+            result[model] = {
+                "requests": len(health.outcomes),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else 0.0,
+                "p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else 0.0,
+                "error_rate": round(health.error_rate(), 3),
+                "circuit": self.circuit_state(model),
+            }
+        return result
+
+    def reset(self) -> None:
+        """Forget all latency and error history. Used for testing."""
+        self._health = {model: ModelHealth() for model in self.models}
@@ -27,18 +27,36 @@ class SearchResponse(BaseModel):
     products: list[Product]
     total: int
     query: str
+    degraded: bool = False
+
+
+class SubsystemStatus(BaseModel):
+    database: str  # "ok", "starting" or "error"
+    embeddings: str  # index state, see core.embeddings.index_state()
+    token_pool: str  # "ok", "empty" or "stopped"
+    llm_circuits: dict[str, str] = {}  # model -> closed / half_open / open
 
 
 class HealthCheckResponse(BaseModel):
-    status: str
+    status: str  # "ok" or "degraded"
     products_count: int
     uptime_seconds: float
+    catalog_version: int = 0
+    subsystems: SubsystemStatus | None = None
+
+
+class ReadinessResponse(BaseModel):
+    status: str  # "ready" or "starting"
+    database: bool
+    embeddings: str  # index state, see core.embeddings.index_state()
 
 
 class TranscribeResponse(BaseModel):
     text: str
     success: bool
     error: str | None = None
+    duration_seconds: float | None = None
+    trimmed_duration_seconds: float | None = None
 
 
 class WebSocketTokenResponse(BaseModel):
@@ -55,3 +73,12 @@ class VoiceSearchExtraction(BaseModel):
     min_rating: float | None = None
     sort: str | None = None  # "price_asc", "price_desc", "rating"
     category: str | None = None
+
+
+class VoiceSearchResponse(BaseModel):
+    extraction: VoiceSearchExtraction
+    products: list[Product]
+    total: int
+    embedding_reused: bool = False
+    degraded: bool = False
+    timings: dict[str, float] = {}  # stage -> milliseconds
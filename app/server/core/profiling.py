@@ -0,0 +1,298 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Where profiles are written; only the newest PROFILE_MAX_ARTIFACTS are kept
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "/tmp/voxstore-profiles")
+PROFILE_MAX_ARTIFACTS = int(os.environ.get("PROFILE_MAX_ARTIFACTS", "20"))
+PROFILE_INTERVAL_SECONDS = float(os.environ.get("PROFILE_INTERVAL_SECONDS", "0.001"))
+MAX_WINDOW_SECONDS = 60.0
+# Signed profile headers are refused if they expire further out than this
+MAX_SIGNATURE_TTL_SECONDS = 3600
+
+PROFILE_HEADER = b"x-profile-signature"
+PROFILE_ID_HEADER = "X-Profile-Id"
+FORMATS = {"speedscope": "speedscope.json", "collapsed": "collapsed.txt"}
+_ARTIFACT_ID = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+
+# (function, file, first line)
+Frame = tuple[str, str, int]
+
+_active = threading.Lock()
+_stats: Counter[str] = Counter()
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+
+class StackSampler:
+    """Sample every thread's Python stack at a fixed interval.
+
+    Runs in its own thread, so it sees the event loop thread while a
+    handler blocks it as well as asyncio.to_thread workers. Samples are
+    aggregated per thread and stack.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_SECONDS) -> None:
+        self.interval = interval
+        self.counts: Counter[tuple[str, tuple[Frame, ...]]] = Counter()
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._start = 0.0
+
+    def start(self) -> None:
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.duration = time.perf_counter() - self._start
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack: list[Frame] = []
+                current = frame
+                while current is not None:
+                    code = current.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    current = current.f_back
+                stack.reverse()
+                self.counts[(names.get(thread_id, str(thread_id)), tuple(stack))] += 1
+
+
+def to_collapsed(counts: Counter[tuple[str, tuple[Frame, ...]]]) -> str:
+    """Render samples as collapsed stacks (one `thread;frame;frame count` per line)."""
+    lines = []
+    for (thread, stack), count in counts.most_common():
+        frames = ";".join(f"{name} ({os.path.basename(path)}:{line})" for name, path, line in stack)
+        lines.append(f"{thread};{frames} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(
+    counts: Counter[tuple[str, tuple[Frame, ...]]], interval: float, name: str
+) -> dict:
+    """Render samples as a speedscope file with one sampled profile per thread."""
+    frames: list[dict] = []
+    index: dict[Frame, int] = {}
+    profiles: dict[str, dict] = {}
+    for (thread, stack), count in counts.items():
+        profile = profiles.setdefault(
+            thread,
+            {
+                "type": "sampled",
+                "name": thread,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": 0.0,
+                "samples": [],
+                "weights": [],
+            },
+        )
+        sample = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+            sample.append(index[frame])
+        profile["samples"].append(sample)
+        profile["weights"].append(count * interval)
+        profile["endValue"] += count * interval
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "voxstore",
+        "shared": {"frames": frames},
+        "profiles": list(profiles.values()),
+    }
+
+
+def _prune() -> None:
+    ids: dict[str, float] = {}
+    for filename in os.listdir(PROFILE_DIR):
+        artifact_id = filename.split(".", 1)[0]
+        if _ARTIFACT_ID.match(artifact_id):
+            mtime = os.path.getmtime(os.path.join(PROFILE_DIR, filename))
+            ids[artifact_id] = max(ids.get(artifact_id, 0.0), mtime)
+    for artifact_id in sorted(ids, key=ids.__getitem__)[:-PROFILE_MAX_ARTIFACTS]:
+        for suffix in FORMATS.values():
+            try:
+                os.unlink(os.path.join(PROFILE_DIR, f"{artifact_id}.{suffix}"))
+            except FileNotFoundError:
+                pass
+
+
+def write_artifact(sampler: StackSampler, name: str) -> str:
+    """Write a finished sampler's profile in every format and return its id."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    artifact_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{secrets.token_hex(4)}"
+    speedscope = to_speedscope(sampler.counts, sampler.interval, name)
+    with open(artifact_path(artifact_id, "speedscope"), "w") as f:
+        json.dump(speedscope, f)
+    with open(artifact_path(artifact_id, "collapsed"), "w") as f:
+        f.write(to_collapsed(sampler.counts))
+    _prune()
+    _stats["profiles"] += 1
+    logger.info(
+        "[PROFILE] Wrote %s (%s, %.2fs, %d samples)",
+        artifact_id,
+        name,
+        sampler.duration,
+        sampler.counts.total(),
+    )
+    return artifact_id
+
+
+def artifact_path(artifact_id: str, fmt: str = "speedscope") -> str:
+    """Return the path of a profile artifact.
+
+    Raises:
+        ValueError: If the id or format is not one this module produces.
+    """
+    if not _ARTIFACT_ID.match(artifact_id) or fmt not in FORMATS:
+        raise ValueError("Unknown profile artifact")
+    return os.path.join(PROFILE_DIR, f"{artifact_id}.{FORMATS[fmt]}")
+
+
+def _acquire() -> None:
+    if not _active.acquire(blocking=False):
+        _stats["busy"] += 1
+        raise ProfilerBusy("A profile is already running")
+
+
+async def profile_window(seconds: float) -> str:
+    """Sample the whole process for `seconds` and return the artifact id.
+
+    Raises:
+        ProfilerBusy: If another profile is running.
+    """
+    _acquire()
+    try:
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            await asyncio.sleep(min(seconds, MAX_WINDOW_SECONDS))
+        finally:
+            await asyncio.to_thread(sampler.stop)
+        return await asyncio.to_thread(write_artifact, sampler, f"window {seconds:g}s")
+    finally:
+        _active.release()
+
+
+def sign_profile_request(secret: str, path: str, expires: int) -> str:
+    """Return an X-Profile-Signature header value for `path`, valid until `expires`."""
+    digest = hmac.new(secret.encode(), f"{expires}:{path}".encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{digest}"
+
+
+def verify_signature(secret: str, path: str, value: str, now: float | None = None) -> bool:
+    """Check a signed profile header against the request path and its expiry."""
+    expires_text, _, digest = value.partition(".")
+    if not expires_text.isdigit():
+        return False
+    expires = int(expires_text)
+    now = time.time() if now is None else now
+    if not now <= expires <= now + MAX_SIGNATURE_TTL_SECONDS:
+        return False
+    expected = sign_profile_request(secret, path, expires)
+    return hmac.compare_digest(expected, value)
+
+
+class ProfilingMiddleware:
+    """Profile single requests that carry a valid X-Profile-Signature header.
+
+    The signature is an HMAC of the path and an expiry, so a header copied
+    from one request cannot profile others. The profile covers the
+    request until its response starts; the artifact id is returned in
+    X-Profile-Id. Requests without the header only pay for a header scan,
+    and nothing at all when no secret is configured.
+
+    Other requests running at the same time appear in the profile too.
+    """
+
+    def __init__(self, app: ASGIApp, secret: str = "") -> None:
+        self.app = app
+        self.secret = secret
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.secret or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        value = next((v for k, v in scope["headers"] if k == PROFILE_HEADER), None)
+        if value is None:
+            await self.app(scope, receive, send)
+            return
+        if not verify_signature(self.secret, scope["path"], value.decode("latin-1")):
+            _stats["bad_signature"] += 1
+            logger.warning("[PROFILE] Ignoring invalid signature for %s", scope["path"])
+            await self.app(scope, receive, send)
+            return
+        try:
+            _acquire()
+        except ProfilerBusy:
+            logger.warning("[PROFILE] Busy, not profiling %s", scope["path"])
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler()
+        stopped = False
+
+        async def finish() -> str:
+            nonlocal stopped
+            stopped = True
+            await asyncio.to_thread(sampler.stop)
+            name = f"{scope['method']} {scope['path']}"
+            return await asyncio.to_thread(write_artifact, sampler, name)
+
+        async def send_with_profile(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                artifact_id = await finish()
+                MutableHeaders(scope=message).append(PROFILE_ID_HEADER, artifact_id)
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if not stopped:
+                sampler.stop()
+            _active.release()
+
+
+def profiling_stats() -> dict[str, int]:
+    """Return counts of written profiles, busy rejections and bad signatures."""
+    return {
+        "profiles": _stats["profiles"],
+        "busy": _stats["busy"],
+        "bad_signature": _stats["bad_signature"],
+    }
+
+
+def reset_stats() -> None:
+    """Reset profiling counters. Used for testing."""
+    _stats.clear()
@@ -0,0 +1,193 @@
+import asyncio
+import base64
+import json
+import logging
+import os
+from collections import Counter
+
+import numpy as np
+from starlette.websockets import WebSocket, WebSocketState
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import WebSocketException
+
+from .transcribe import TranscriptionError, acquire_websocket_token
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+UPSTREAM_OPEN_TIMEOUT = 5.0
+
+# Energy-based end-of-utterance detection on Int16 PCM
+VAD_THRESHOLD = float(os.environ.get("RELAY_VAD_THRESHOLD", "500"))
+VAD_SILENCE_MS = float(os.environ.get("RELAY_VAD_SILENCE_MS", "800"))
+VAD_MIN_SPEECH_MS = 200.0
+
+_stats: Counter[str] = Counter()
+
+
+class SilenceDetector:
+    """Detect the end of an utterance in a stream of 16 kHz Int16 PCM.
+
+    A frame counts as speech when its RMS energy reaches `threshold`.
+    `feed()` returns True once at least `min_speech_ms` of speech has been
+    followed by `silence_ms` of silence. Shorter noises are forgotten.
+    """
+
+    def __init__(
+        self,
+        threshold: float = VAD_THRESHOLD,
+        silence_ms: float = VAD_SILENCE_MS,
+        min_speech_ms: float = VAD_MIN_SPEECH_MS,
+    ) -> None:
+        self.threshold = threshold
+        self.silence_ms = silence_ms
+        self.min_speech_ms = min_speech_ms
+        self.reset()
+
+    def reset(self) -> None:
+        self._speech_ms = 0.0
+        self._silence_ms = 0.0
+
+    def feed(self, pcm: bytes) -> bool:
+        samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+        if samples.size == 0:
+            return False
+        duration_ms = samples.size * 1000 / SAMPLE_RATE
+        rms = float(np.sqrt(np.mean(samples.astype(np.float32) ** 2)))
+        if rms >= self.threshold:
+            self._speech_ms += duration_ms
+            self._silence_ms = 0.0
+            return False
+
+        self._silence_ms += duration_ms
+        if self._silence_ms < self.silence_ms:
+            return False
+        utterance = self._speech_ms >= self.min_speech_ms
+        self.reset()
+        return utterance
+
+
+def _audio_chunk(pcm: bytes, commit: bool) -> str:
+    return json.dumps(
+        {
+            "message_type": "input_audio_chunk",
+            "audio_base_64": base64.b64encode(pcm).decode(),
+            "commit": commit,
+            "sample_rate": SAMPLE_RATE,
+        }
+    )
+
+
+def _is_commit(text: str | None) -> bool:
+    try:
+        message = json.loads(text or "")
+    except ValueError:
+        return False
+    return isinstance(message, dict) and message.get("message_type") == "commit"
+
+
+async def _client_to_upstream(client: WebSocket, upstream: ClientConnection) -> None:
+    detector = SilenceDetector()
+    while True:
+        message = await client.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        pcm = message.get("bytes")
+        if pcm is not None:
+            commit = detector.feed(pcm)
+            _stats["frames"] += 1
+            _stats["audio_bytes"] += len(pcm)
+            if commit:
+                _stats["auto_commits"] += 1
+                logger.info("[RELAY] Silence detected, committing utterance")
+            await upstream.send(_audio_chunk(pcm, commit))
+        elif _is_commit(message.get("text")):
+            detector.reset()
+            _stats["manual_commits"] += 1
+            await upstream.send(_audio_chunk(b"", True))
+
+
+async def _upstream_to_client(upstream: ClientConnection, client: WebSocket) -> None:
+    async for message in upstream:
+        if isinstance(message, str):
+            await client.send_text(message)
+
+
+async def _shutdown(tasks: list[asyncio.Task[None]], upstream: ClientConnection) -> None:
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await upstream.close()
+
+
+async def _close(client: WebSocket, code: int) -> None:
+    if (
+        client.application_state == WebSocketState.CONNECTED
+        and client.client_state == WebSocketState.CONNECTED
+    ):
+        await client.close(code=code)
+
+
+async def relay_transcription(client: WebSocket) -> None:
+    """Relay one realtime transcription session between a client and ElevenLabs.
+
+    The client sends raw 16 kHz Int16 PCM as binary frames, and
+    `{"message_type": "commit"}` as text to force a commit. Audio is
+    forwarded over a single upstream connection, with a commit added
+    whenever the silence detector sees the end of an utterance. Upstream
+    messages are passed back to the client unchanged.
+
+    Args:
+        client: An accepted WebSocket connection.
+    """
+    try:
+        token = await acquire_websocket_token()
+        upstream = await connect(
+            token["ws_url"], compression=None, open_timeout=UPSTREAM_OPEN_TIMEOUT
+        )
+    except (TranscriptionError, OSError, TimeoutError, WebSocketException) as e:
+        _stats["upstream_errors"] += 1
+        logger.warning("[RELAY] Upstream unavailable: %s", e)
+        await client.send_json({"message_type": "error", "error": str(e)})
+        await _close(client, 1011)
+        return
+
+    _stats["sessions"] += 1
+    _stats["active"] += 1
+    tasks = [
+        asyncio.create_task(_client_to_upstream(client, upstream)),
+        asyncio.create_task(_upstream_to_client(upstream, client)),
+    ]
+    code = 1000
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None:
+                _stats["upstream_errors"] += 1
+                code = 1011
+                logger.warning("[RELAY] Session ended with error: %s", error)
+    finally:
+        _stats["active"] -= 1
+        for task in tasks:
+            task.cancel()
+        # Shielded so the upstream session still closes cleanly when this
+        # handler is itself being cancelled
+        await asyncio.shield(_shutdown(tasks, upstream))
+    await _close(client, code)
+
+
+def relay_stats() -> dict[str, int]:
+    """Return session, audio and commit counters for the relay."""
+    return {
+        "sessions": _stats["sessions"],
+        "active": _stats["active"],
+        "frames": _stats["frames"],
+        "audio_bytes": _stats["audio_bytes"],
+        "auto_commits": _stats["auto_commits"],
+        "manual_commits": _stats["manual_commits"],
+        "upstream_errors": _stats["upstream_errors"],
+    }
+
+
+def reset_stats() -> None:
+    """Reset relay counters. Used for testing."""
+    _stats.clear()
@@ -1,30 +1,55 @@
 import logging
+import threading
+
+import numpy as np
 
 from .db import get_connection
 from .embeddings import is_available, semantic_search
+from .metrics import DB_QUERY_LATENCY
+from .text import normalize_query
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
+SORT_CLAUSES = {
+    "price_asc": "price ASC",
+    "price_desc": "price DESC",
+    "rating": "rating DESC",
+}
+
+
+def search_products(
+    query: str,
+    cancelled: threading.Event | None = None,
+    query_vec: np.ndarray | None = None,
+) -> list[dict]:
+    """Search products using semantic vector search.
 
-def search_products(query: str) -> list[dict]:
-    """Search products using semantic vector search."""
+    If `cancelled` is set while the query is being embedded, the SQL
+    hydration step is skipped and no results are returned. Pass
+    `query_vec` to skip embedding the query.
+    """
     if not is_available():
         logger.warning("[SEARCH] Embeddings not available, returning empty results")
         return []
 
-    matches = semantic_search(query)
-    if not matches:
+    if query_vec is None:
+        matches = semantic_search(query)
+    else:
+        matches = semantic_search(query, query_vec=query_vec)
+    if not matches or (cancelled is not None and cancelled.is_set()):
         return []
 
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        ids = [product_id for product_id, _ in matches]
-        placeholders = ",".join("?" * len(ids))
-        cursor.execute(f"SELECT * FROM products WHERE id IN ({placeholders})", ids)
-        rows = cursor.fetchall()
-    finally:
-        conn.close()
+    with span("hydrate"), DB_QUERY_LATENCY.labels("hydrate").time():
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            ids = [product_id for product_id, _ in matches]
+            placeholders = ",".join("?" * len(ids))
+            cursor.execute(f"SELECT * FROM products WHERE id IN ({placeholders})", ids)
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
 
     # Build a map for ordering by score
     row_map = {row["id"]: dict(row) for row in rows}
@@ -32,7 +57,98 @@ def search_products(query: str) -> list[dict]:
 
     # Log top result for search quality monitoring
     if results:
+        scores = dict(matches)
         top = results[0]
-        logger.info("[SEARCH] query=%r top=%s score=%.3f", query, top["name"], top["score"])
+        logger.info("[SEARCH] query=%r top=%s score=%.3f", query, top["name"], scores[top["id"]])
+
+    return results
+
+
+def lexical_search(query: str, max_results: int = 10) -> list[dict]:
+    """Keyword search over product names, categories and descriptions.
+
+    A cheap fallback for when semantic search is unavailable or shed
+    under load. Products are ranked by how many query words they
+    contain, with name matches counting double.
+    """
+    words = [w for w in normalize_query(query).split() if len(w) > 1]
+    if not words:
+        return []
+
+    clauses = " OR ".join(["name LIKE ? OR category LIKE ? OR description LIKE ?"] * len(words))
+    params = [f"%{w}%" for w in words for _ in range(3)]
+    with DB_QUERY_LATENCY.labels("lexical").time():
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT * FROM products WHERE {clauses}", params)
+            rows = [dict(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    def score(product: dict) -> int:
+        name = product["name"].lower()
+        other = f"{product['category']} {product['description']}".lower()
+        return sum(2 * (w in name) + (w in other) for w in words)
+
+    rows.sort(key=lambda p: (-score(p), p["id"]))
+    return rows[:max_results]
+
+
+def query_products(
+    category: str | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    sort: str | None = None,
+    min_rating: float | None = None,
+) -> list[dict]:
+    """List catalog products matching the given filters."""
+    query = "SELECT * FROM products WHERE 1=1"
+    params: list = []
+
+    if category:
+        query += " AND category = ?"
+        params.append(category)
+    if min_price is not None:
+        query += " AND price >= ?"
+        params.append(min_price)
+    if max_price is not None:
+        query += " AND price <= ?"
+        params.append(max_price)
+    if min_rating is not None:
+        query += " AND rating >= ?"
+        params.append(min_rating)
+
+    query += f" ORDER BY {SORT_CLAUSES.get(sort or '', 'id ASC')}"
+
+    with DB_QUERY_LATENCY.labels("list").time():
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+    return [dict(row) for row in rows]
+
 
+def apply_filters(
+    products: list[dict],
+    category: str | None = None,
+    min_rating: float | None = None,
+    sort: str | None = None,
+) -> list[dict]:
+    """Filter and sort search results in memory, keeping score order by default."""
+    results = [
+        p
+        for p in products
+        if (not category or p["category"] == category)
+        and (min_rating is None or p["rating"] >= min_rating)
+    ]
+    if sort == "price_asc":
+        results.sort(key=lambda p: p["price"])
+    elif sort == "price_desc":
+        results.sort(key=lambda p: p["price"], reverse=True)
+    elif sort == "rating":
+        results.sort(key=lambda p: p["rating"], reverse=True)
     return results
@@ -0,0 +1,148 @@
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import sentry_sdk
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .tracing import current_timings
+
+logger = logging.getLogger(__name__)
+
+# Head sampling rates: the default for API routes, and a lower one for
+# high-volume catalog reads
+DEFAULT_RATE = float(os.environ.get("SENTRY_TRACES_SAMPLE_RATE", "0.2"))
+CATALOG_RATE = float(os.environ.get("SENTRY_TRACES_CATALOG_RATE", "0.01"))
+# Requests slower than this are traced even if head sampling skipped them
+SLOW_REQUEST_MS = float(os.environ.get("SENTRY_TRACES_SLOW_MS", "1000"))
+
+# Probes and ops endpoints; never traced
+DROPPED_PATHS = frozenset({"/api/health", "/api/ready", "/api/stats", "/metrics"})
+CATALOG_PREFIXES = ("/api/products", "/api/categories")
+
+_stats: Counter[str] = Counter()
+
+
+def route_rate(path: str) -> float:
+    """Return the head sampling rate for a request path."""
+    if path in DROPPED_PATHS or not path.startswith("/api/"):
+        # Health checks, metrics and static files
+        return 0.0
+    if path.startswith(CATALOG_PREFIXES):
+        return CATALOG_RATE
+    return DEFAULT_RATE
+
+
+def traces_sampler(sampling_context: dict[str, Any]) -> float:
+    """Sentry `traces_sampler`: pick a sample rate per route.
+
+    Dropped routes stay dropped even inside a sampled distributed trace;
+    otherwise an upstream sampling decision is honoured.
+    """
+    path = (sampling_context.get("asgi_scope") or {}).get("path", "")
+    rate = route_rate(path)
+    if rate == 0.0:
+        _stats["dropped"] += 1
+        return 0.0
+    parent_sampled = sampling_context.get("parent_sampled")
+    if parent_sampled is not None:
+        return float(parent_sampled)
+    _stats["catalog" if rate == CATALOG_RATE else "default"] += 1
+    return rate
+
+
+def _send_tail_transaction(
+    scope: Scope, status: int, reason: str, wall_start: float, perf_start: float, elapsed: float
+) -> None:
+    """Report a request head sampling skipped, rebuilt from its recorded stages."""
+    started_at = datetime.fromtimestamp(wall_start, timezone.utc)
+    transaction = sentry_sdk.start_transaction(
+        name=getattr(scope.get("route"), "path", scope["path"]),
+        op="http.server",
+        source="route",
+        sampled=True,
+        start_timestamp=started_at,
+    )
+    transaction.set_tag("sampling", f"tail_{reason}")
+    transaction.set_http_status(status)
+    for stage, description, stage_start, duration_ms in current_timings():
+        offset = started_at + timedelta(seconds=stage_start - perf_start)
+        child = transaction.start_child(
+            op=f"voxstore.{stage}", name=description or stage, start_timestamp=offset
+        )
+        child.finish(end_timestamp=offset + timedelta(milliseconds=duration_ms))
+    transaction.finish(end_timestamp=started_at + timedelta(seconds=elapsed))
+
+
+class TailSamplingMiddleware:
+    """Upgrade unsampled requests that turn out slow or failed to full traces.
+
+    Head sampling decides before the request runs. This records the
+    outcome and, for requests over `slow_ms` or ending in a 5xx or an
+    exception, sends a transaction built from the request's tracing
+    spans. Must sit inside ServerTimingMiddleware to see those spans.
+    """
+
+    def __init__(self, app: ASGIApp, slow_ms: float = SLOW_REQUEST_MS) -> None:
+        self.app = app
+        self.slow_ms = slow_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or route_rate(scope["path"]) == 0.0
+            or not sentry_sdk.get_client().is_active()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        wall_start = time.time()
+        perf_start = time.perf_counter()
+        status = 500
+        failed = False
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - perf_start
+            if failed or status >= 500:
+                reason = "error"
+            elif elapsed * 1000 >= self.slow_ms:
+                reason = "slow"
+            else:
+                reason = None
+            head = sentry_sdk.get_current_scope().transaction
+            if reason is not None and (head is None or not head.sampled):
+                _stats[f"tail_{reason}"] += 1
+                try:
+                    _send_tail_transaction(scope, status, reason, wall_start, perf_start, elapsed)
+                except Exception as e:
+                    logger.warning("[SENTRY] Tail sampling failed: %s", e)
+
+
+def sampling_stats() -> dict[str, int]:
+    """Return head sampling decisions by class and tail upgrades by reason."""
+    return {
+        "dropped": _stats["dropped"],
+        "catalog": _stats["catalog"],
+        "default": _stats["default"],
+        "tail_slow": _stats["tail_slow"],
+        "tail_error": _stats["tail_error"],
+    }
+
+
+def reset_stats() -> None:
+    """Reset sampling counters. Used for testing."""
+    _stats.clear()
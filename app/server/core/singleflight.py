@@ -0,0 +1,64 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call(Generic[T]):
+    task: asyncio.Future[T]
+    waiters: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """Coalesce concurrent calls with the same key into a single execution.
+
+    Callers that arrive while a call for their key is in flight await the
+    same result instead of starting their own. The shared call is only
+    cancelled once every caller waiting on it has been cancelled.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, _Call[T]] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key: Hashable, call: _Call[T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": self.in_flight(),
+        }
+
+    def reset_stats(self) -> None:
+        self.executions = 0
+        self.coalesced = 0
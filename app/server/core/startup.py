@@ -0,0 +1,122 @@
+import importlib
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Imported in a background thread once the app is up, rather than on the
+# import path of server.py. litellm alone takes seconds.
+WARMUP_MODULES = ("litellm", "instructor", "openai")
+WARMUP_ENABLED = os.environ.get("IMPORT_WARMUP_ENABLED", "true").lower() != "false"
+
+_SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# stage -> milliseconds, in the order they ran
+_stages: dict[str, float] = {}
+_imports: dict[str, float] = {}
+# The warmup runs in its own thread, which can outlive the lifespan that
+# started it; the future tells whether it is still running
+_warmup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warmup")
+_warmup: Future[None] | None = None
+_warmup_done = False
+# Held while importing a WARMUP_MODULES package, by the warmup and by code
+# that imports one on first use, so two threads never import litellm at once
+import_lock = threading.Lock()
+
+
+@dataclass
+class ImportTime:
+    """One line of `python -X importtime` output, in microseconds."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a startup stage for the startup report."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stages[name] = (time.perf_counter() - start) * 1000
+        logger.info("[STARTUP] %s took %.0f ms", name, _stages[name])
+
+
+def _warm(tasks: tuple[Callable[[], object], ...]) -> None:
+    global _warmup_done
+    for module in WARMUP_MODULES:
+        start = time.perf_counter()
+        try:
+            with import_lock:
+                importlib.import_module(module)
+        except ImportError as e:
+            logger.warning("[STARTUP] Warmup import of %s failed: %s", module, e)
+            continue
+        _imports[module] = (time.perf_counter() - start) * 1000
+    logger.info("[STARTUP] Warmed up %s in %.0f ms", ", ".join(_imports), sum(_imports.values()))
+    for task in tasks:
+        try:
+            with stage(f"warm_{task.__name__}"):
+                task()
+        except Exception as e:
+            logger.warning("[STARTUP] Warmup %s failed: %s", task.__name__, e)
+    _warmup_done = True
+
+
+def start_warmup(*tasks: Callable[[], object]) -> None:
+    """Import heavy dependencies, then run `tasks`, in a worker thread.
+
+    Startup is not delayed. Code that needs a dependency first imports it
+    itself (from a worker thread too, holding `import_lock`); it then only
+    waits for whatever part of the import is left. Each worker process runs
+    its own warmup. It is not cancelled when the app shuts down, and a new
+    one is not started while the last is still running.
+    """
+    global _warmup
+    if WARMUP_ENABLED and (_warmup is None or _warmup.done()):
+        _warmup = _warmup_executor.submit(_warm, tasks)
+
+
+def startup_stats() -> dict[str, object]:
+    """Return init stage timings and background import timings in milliseconds."""
+    return {
+        "stages_ms": {name: round(ms, 1) for name, ms in _stages.items()},
+        "warmup_imports_ms": {name: round(ms, 1) for name, ms in _imports.items()},
+        "warmup_done": _warmup_done,
+    }
+
+
+def parse_importtime(output: str) -> list[ImportTime]:
+    """Parse the stderr of `python -X importtime`, skipping other lines."""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        # One leading space, then two per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append(ImportTime(name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def measure_imports(module: str = "server") -> list[ImportTime]:
+    """Import `module` in a fresh interpreter and return its import times."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_SERVER_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
@@ -0,0 +1,6 @@
+import re
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s-]", " ", text.lower()).split())
@@ -0,0 +1,137 @@
+import os
+import time
+from contextvars import ContextVar
+from types import TracebackType
+from typing import Any
+
+import sentry_sdk
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Off by default: the header names internal stages and upstream models
+SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "false").lower() == "true"
+
+# (name, description, perf_counter() at start, duration_ms)
+Timing = tuple[str, str | None, float, float]
+
+# Stage timings of the current request. The list is shared with tasks and
+# asyncio.to_thread workers spawned by the request, since they copy the
+# context rather than the list.
+_timings: ContextVar[list[Timing] | None] = ContextVar("server_timings", default=None)
+
+
+class _NullSpan:
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(
+        self,
+        name: str,
+        description: str | None,
+        timings: list[Timing] | None,
+        sentry: bool,
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.timings = timings
+        self.sentry_span: Any = (
+            sentry_sdk.start_span(op=f"voxstore.{name}", name=description or name)
+            if sentry
+            else None
+        )
+        self.start = 0.0
+
+    def __enter__(self) -> "_Span":
+        if self.sentry_span is not None:
+            self.sentry_span.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        if self.timings is not None:
+            self.timings.append((self.name, self.description, self.start, elapsed_ms))
+        if self.sentry_span is not None:
+            self.sentry_span.__exit__(exc_type, exc, tb)
+
+
+def span(name: str, description: str | None = None) -> _Span | _NullSpan:
+    """Time a stage of the current request.
+
+    The duration is reported in the response's Server-Timing header and,
+    when Sentry is running, recorded as a child span of the transaction.
+    Outside a request with tracing enabled this is a shared no-op.
+
+    Args:
+        name: Short metric name (a token: letters, digits, '_' or '-').
+        description: Optional detail such as the model name.
+    """
+    timings = _timings.get()
+    sentry = sentry_sdk.get_client().is_active()
+    if timings is None and not sentry:
+        return _NULL_SPAN
+    return _Span(name, description, timings, sentry)
+
+
+def current_timings() -> list[Timing]:
+    """Return the stages recorded so far for the current request."""
+    return list(_timings.get() or ())
+
+
+def format_server_timing(timings: list[Timing]) -> str:
+    """Render timings as a Server-Timing header value."""
+    entries = []
+    for name, description, _, duration_ms in timings:
+        entry = name
+        if description:
+            entry += f';desc="{description}"'
+        entries.append(f"{entry};dur={duration_ms:.1f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """Collect spans for each HTTP request and emit a Server-Timing header.
+
+    Stages finished before the response starts are reported, followed by
+    a `total` entry for the time spent in the app. With the header
+    disabled, stages are still collected while Sentry is running, since
+    tail-sampled transactions are rebuilt from them.
+    """
+
+    def __init__(self, app: ASGIApp, enabled: bool = SERVER_TIMING_ENABLED) -> None:
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not (self.enabled or sentry_sdk.get_client().is_active()):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings: list[Timing] = []
+        token = _timings.set(timings)
+
+        async def send_with_timing(message: Message) -> None:
+            if self.enabled and message["type"] == "http.response.start":
+                total = ("total", None, start, (time.perf_counter() - start) * 1000)
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", format_server_timing([*timings, total]))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
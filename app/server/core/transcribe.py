@@ -1,36 +1,187 @@
+import asyncio
+import hashlib
 import logging
 import os
+import time
+from collections import Counter, deque
+from typing import Any
 
 import httpx
 
+from . import deadline, transcription_cache
+from .deadline import DeadlineExceeded
+from .memory import track
+from .metrics import track_upstream
+from .model_router import percentile
+from .singleflight import SingleFlight
+from .tracing import span
+
 logger = logging.getLogger(__name__)
 
 ELEVENLABS_STT_URL = "https://api.elevenlabs.io/v1/speech-to-text"
 ELEVENLABS_TOKEN_URL = "https://api.elevenlabs.io/v1/single-use-token/realtime_scribe"
 ELEVENLABS_WS_BASE = "wss://api.elevenlabs.io/v1/speech-to-text/realtime"
+STT_MODEL_ID = "scribe_v2"
+
+STT_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+TOKEN_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+
+# Shared keep-alive client for api.elevenlabs.io, opened in the app lifespan
+_http_client: httpx.AsyncClient | None = None
+_http_client_loop: asyncio.AbstractEventLoop | None = None
+_connection_stats: Counter[str] = Counter()
+# Identical uploads in flight at the same time share one STT call
+_inflight: SingleFlight[str] = SingleFlight()
+
+TOKEN_POOL_SIZE = int(os.environ.get("ELEVENLABS_TOKEN_POOL_SIZE", "2"))
+# Single-use tokens are valid for 15 minutes; retire pooled ones well before that
+TOKEN_MAX_AGE_SECONDS = float(os.environ.get("ELEVENLABS_TOKEN_MAX_AGE_SECONDS", "600"))
+TOKEN_REFILL_RETRY_SECONDS = 5.0
 
 
 class TranscriptionError(Exception):
     """Raised when transcription fails."""
 
 
-async def transcribe_audio(audio_data: bytes, content_type: str) -> str:
+class _ConnectionTracer:
+    """httpcore trace hook that times TCP/TLS handshakes for one request."""
+
+    def __init__(self) -> None:
+        self._connect_started: float | None = None
+
+    async def __call__(self, event: str, info: dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.started":
+            self._connect_started = time.perf_counter()
+        elif event in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            if event == "connection.connect_tcp.complete":
+                _connection_stats["connections_opened"] += 1
+            if self._connect_started is not None:
+                elapsed_us = (time.perf_counter() - self._connect_started) * 1_000_000
+                _connection_stats["handshake_us"] += round(elapsed_us)
+                self._connect_started = time.perf_counter()
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it for the running event loop if needed.
+
+    Raises:
+        RuntimeError: If an open client belongs to another event loop; its
+            pooled connections can only be closed there, by close_http_client().
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is not None and not _http_client.is_closed:
+        if _http_client_loop is not loop:
+            raise RuntimeError("Shared ElevenLabs client is open on another event loop")
+        return _http_client
+    _http_client = httpx.AsyncClient(http2=True, limits=POOL_LIMITS, timeout=TOKEN_TIMEOUT)
+    _http_client_loop = loop
+    return _http_client
+
+
+async def _post(url: str, operation: str, timeout: httpx.Timeout, **kwargs: Any) -> httpx.Response:
+    # httpx timeouts are per phase; the request deadline bounds the whole call
+    budget = deadline.check("elevenlabs")
+    _connection_stats["requests"] += 1
+    with track_upstream("elevenlabs", operation):
+        return await asyncio.wait_for(
+            _get_http_client().post(
+                url, timeout=timeout, extensions={"trace": _ConnectionTracer()}, **kwargs
+            ),
+            budget,
+        )
+
+
+async def start_http_client() -> None:
+    """Open the shared ElevenLabs client. Called from the app lifespan."""
+    _get_http_client()
+
+
+async def close_http_client() -> None:
+    """Close the shared ElevenLabs client. Called on app shutdown."""
+    global _http_client, _http_client_loop
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _http_client_loop = None
+
+
+def connection_stats() -> dict[str, float | int]:
+    """Return request, connection and handshake counters for the shared client.
+
+    `handshake_ms_saved` estimates the handshake time avoided by reusing
+    pooled connections, from the average cost of the handshakes we did pay.
+    """
+    requests = _connection_stats["requests"]
+    opened = _connection_stats["connections_opened"]
+    handshake_ms = _connection_stats["handshake_us"] / 1000
+    reused = max(requests - opened, 0)
+    return {
+        "requests": requests,
+        "connections_opened": opened,
+        "connections_reused": reused,
+        "handshake_ms": round(handshake_ms, 2),
+        "handshake_ms_saved": round(reused * handshake_ms / opened, 2) if opened else 0.0,
+    }
+
+
+def reset_connection_stats() -> None:
+    """Reset connection counters. Used for testing."""
+    _connection_stats.clear()
+
+
+def transcript_key(digest: str, content_type: str) -> str:
+    """Return the result-cache key for audio with SHA-256 `digest`."""
+    return transcription_cache.cache_key(digest, content_type, STT_MODEL_ID)
+
+
+async def cached_transcript(key: str) -> str | None:
+    """Return a cached transcript, without calling ElevenLabs."""
+    cached = await transcription_cache.get(key)
+    if cached is not None:
+        logger.info("[TRANSCRIBE] Cache hit for %s", key[-12:])
+    return cached
+
+
+async def transcribe_audio(audio_data: bytes, content_type: str, key: str | None = None) -> str:
     """Transcribe audio using ElevenLabs Scribe v2.
 
+    Results are cached by the hash of the audio bytes, content type and
+    model, and concurrent uploads of the same audio share one API call.
+
     Args:
         audio_data: Raw audio bytes.
         content_type: MIME type (e.g. 'audio/webm').
+        key: Cache key to store the result under instead, for callers that
+            already looked up the original upload with `cached_transcript`.
 
     Returns:
         Transcribed text.
 
     Raises:
         TranscriptionError: If transcription fails for any reason.
+        DeadlineExceeded: If the request deadline passed before the call.
     """
     api_key = os.environ.get("ELEVENLABS_API_KEY")
     if not api_key:
         raise TranscriptionError("ELEVENLABS_API_KEY not configured")
 
+    if key is None:
+        key = transcript_key(hashlib.sha256(audio_data).hexdigest(), content_type)
+        cached = await cached_transcript(key)
+        if cached is not None:
+            return cached
+
+    async def transcribe_and_store() -> str:
+        text = await _transcribe_uncached(audio_data, content_type, api_key)
+        await transcription_cache.put(key, text)
+        return text
+
+    return await _inflight.do(key, transcribe_and_store)
+
+
+async def _transcribe_uncached(audio_data: bytes, content_type: str, api_key: str) -> str:
     ext_map = {
         "audio/webm": "webm",
         "audio/wav": "wav",
@@ -41,12 +192,14 @@ async def transcribe_audio(audio_data: bytes, content_type: str) -> str:
     ext = ext_map.get(content_type, "webm")
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
+        with span("stt"):
+            response = await _post(
                 ELEVENLABS_STT_URL,
+                "stt",
+                STT_TIMEOUT,
                 headers={"xi-api-key": api_key},
                 files={"file": (f"audio.{ext}", audio_data, content_type)},
-                data={"model_id": "scribe_v2"},
+                data={"model_id": STT_MODEL_ID},
             )
 
         if response.status_code == 401:
@@ -69,11 +222,11 @@ async def transcribe_audio(audio_data: bytes, content_type: str) -> str:
             raise TranscriptionError("No speech detected")
         return text
 
-    except httpx.TimeoutException as e:
+    except (httpx.TimeoutException, asyncio.TimeoutError) as e:
         raise TranscriptionError("Transcription request timed out") from e
     except httpx.RequestError as e:
         raise TranscriptionError(f"Network error: {e}") from e
-    except TranscriptionError:
+    except (TranscriptionError, DeadlineExceeded):
         raise
     except Exception as e:
         raise TranscriptionError(f"Unexpected error: {e}") from e
@@ -87,15 +240,18 @@ async def get_websocket_token() -> dict[str, str]:
 
     Raises:
         TranscriptionError: If token generation fails.
+        DeadlineExceeded: If the request deadline passed before the call.
     """
     api_key = os.environ.get("ELEVENLABS_API_KEY")
     if not api_key:
         raise TranscriptionError("ELEVENLABS_API_KEY not configured")
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
+        with span("token_mint"):
+            response = await _post(
                 ELEVENLABS_TOKEN_URL,
+                "token",
+                TOKEN_TIMEOUT,
                 headers={"xi-api-key": api_key},
             )
 
@@ -123,11 +279,166 @@ async def get_websocket_token() -> dict[str, str]:
         )
         return {"token": token, "ws_url": ws_url}
 
-    except httpx.TimeoutException as e:
+    except (httpx.TimeoutException, asyncio.TimeoutError) as e:
         raise TranscriptionError("Token request timed out") from e
     except httpx.RequestError as e:
         raise TranscriptionError(f"Network error: {e}") from e
-    except TranscriptionError:
+    except (TranscriptionError, DeadlineExceeded):
         raise
     except Exception as e:
         raise TranscriptionError(f"Unexpected error: {e}") from e
+
+
+class TokenPool:
+    """Keep a few realtime tokens minted ahead of demand.
+
+    A background task tops the pool up to `size` tokens and replaces
+    tokens before they are `max_age` seconds old. `acquire()` hands out
+    a pooled token when one is available and mints one inline otherwise.
+    """
+
+    def __init__(self, size: int, max_age: float) -> None:
+        self.size = size
+        self.max_age = max_age
+        # (expires_at, token) in mint order, so the oldest is on the left
+        self._tokens: deque[tuple[float, dict[str, str]]] = deque()
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._refill_ms: deque[float] = deque(maxlen=100)
+        self._stats: Counter[str] = Counter()
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        while self._tokens and self._tokens[0][0] <= now:
+            self._tokens.popleft()
+            self._stats["expired"] += 1
+
+    async def _refill_loop(self) -> None:
+        assert self._wake is not None
+        while True:
+            self._prune()
+            timeout: float | None
+            try:
+                while len(self._tokens) < self.size:
+                    start = time.perf_counter()
+                    token = await get_websocket_token()
+                    self._refill_ms.append((time.perf_counter() - start) * 1000)
+                    self._tokens.append((time.monotonic() + self.max_age, token))
+                    self._stats["refills"] += 1
+            except TranscriptionError as e:
+                self._stats["refill_errors"] += 1
+                logger.warning("[TOKEN_POOL] Refill failed: %s", e)
+                timeout = TOKEN_REFILL_RETRY_SECONDS
+            else:
+                timeout = self._tokens[0][0] - time.monotonic() if self._tokens else None
+            # Sleep until a token is taken or the oldest one expires
+            self._wake.clear()
+            # asyncio.wait rather than wait_for, which can swallow a stop()
+            # cancellation that lands just as the event is set
+            woken = asyncio.ensure_future(self._wake.wait())
+            try:
+                await asyncio.wait([woken], timeout=timeout)
+            finally:
+                woken.cancel()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._refill_loop())
+            logger.info("[TOKEN_POOL] Prefetching %d realtime tokens", self.size)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._wake = None
+        self._tokens.clear()
+
+    def state(self) -> str:
+        """Return "stopped", "empty" (no usable token pooled) or "ok"."""
+        if self._task is None or self._task.done():
+            return "stopped"
+        self._prune()
+        return "ok" if self._tokens else "empty"
+
+    async def acquire(self) -> dict[str, str]:
+        """Return a fresh single-use token, from the pool when possible.
+
+        Raises:
+            TranscriptionError: If the pool is empty and minting fails.
+        """
+        self._prune()
+        token = self._tokens.popleft()[1] if self._tokens else None
+        self._stats["hits" if token is not None else "misses"] += 1
+        if self._wake is not None:
+            self._wake.set()
+        if token is None:
+            token = await get_websocket_token()
+        return token
+
+    def stats(self) -> dict[str, float | int]:
+        self._prune()
+        hits = self._stats["hits"]
+        served = hits + self._stats["misses"]
+        refill_ms = list(self._refill_ms)
+        return {
+            "size": self.size,
+            "available": len(self._tokens),
+            "hits": hits,
+            "misses": self._stats["misses"],
+            "hit_rate": round(hits / served, 3) if served else 0.0,
+            "expired": self._stats["expired"],
+            "refills": self._stats["refills"],
+            "refill_errors": self._stats["refill_errors"],
+            "refill_p50_ms": round(percentile(refill_ms, 50), 1) if refill_ms else 0.0,
+            "refill_p95_ms": round(percentile(refill_ms, 95), 1) if refill_ms else 0.0,
+        }
+
+
+_token_pool = TokenPool(TOKEN_POOL_SIZE, TOKEN_MAX_AGE_SECONDS)
+track("realtime_tokens", lambda: _token_pool._tokens)
+
+
+def start_token_pool() -> None:
+    """Start prefetching realtime tokens. Called from the app lifespan."""
+    _token_pool.start()
+
+
+async def stop_token_pool() -> None:
+    """Stop prefetching and drop pooled tokens. Called on app shutdown."""
+    await _token_pool.stop()
+
+
+async def acquire_websocket_token() -> dict[str, str]:
+    """Get a realtime WebSocket token, served from the prefetched pool if possible.
+
+    Returns:
+        Dict with 'token' and 'ws_url' keys.
+
+    Raises:
+        TranscriptionError: If no pooled token is available and minting fails.
+    """
+    return await _token_pool.acquire()
+
+
+def token_pool_stats() -> dict[str, float | int]:
+    """Return pool hit rate, expiry and refill latency counters."""
+    return _token_pool.stats()
+
+
+def token_pool_state() -> str:
+    """Return whether the token pool is running and holds a usable token."""
+    return _token_pool.state()
+
+
+def transcription_stats() -> dict[str, int]:
+    """Return result-cache and request-coalescing counters for transcription."""
+    return {
+        **transcription_cache.cache_stats(),
+        "stt_calls": _inflight.executions,
+        "coalesced": _inflight.coalesced,
+    }
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from .memory import track_file
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "db", "transcription_cache.db"
+)
+MAX_ENTRIES = int(os.environ.get("TRANSCRIPTION_CACHE_MAX_ENTRIES", "5000"))
+
+_stats: Counter[str] = Counter()
+# One connection for the process, set by init_cache(), and the row count it
+# last saw; other workers share the file, so this is only for cache_stats()
+_conn: sqlite3.Connection | None = None
+_entries = 0
+_lock = threading.Lock()
+track_file("transcription_cache_db", lambda: CACHE_DB_PATH)
+
+
+def cache_key(digest: str, content_type: str, model_id: str) -> str:
+    """Build a content-addressed key from the audio's SHA-256, format and model."""
+    return f"{model_id}:{content_type}:{digest}"
+
+
+def init_cache() -> None:
+    """Open the cache database, create its table and count its entries once."""
+    global _conn, _entries
+    with _lock:
+        if _conn is not None:
+            return
+        os.makedirs(os.path.dirname(CACHE_DB_PATH), exist_ok=True)
+        # Shared by the worker threads that run lookups; _lock serializes them
+        conn = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS transcription_cache (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_transcription_last_used "
+            "ON transcription_cache (last_used)"
+        )
+        _entries = conn.execute("SELECT COUNT(*) FROM transcription_cache").fetchone()[0]
+        _conn = conn
+
+
+def _connection() -> sqlite3.Connection:
+    if _conn is None:
+        init_cache()
+    assert _conn is not None
+    return _conn
+
+
+def _read(key: str) -> str | None:
+    try:
+        conn = _connection()
+        with _lock:
+            row = conn.execute(
+                "SELECT text FROM transcription_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE transcription_cache SET last_used = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+                conn.commit()
+    except sqlite3.Error as e:
+        logger.warning("[TRANSCRIBE_CACHE] Read failed: %s", e)
+        return None
+    return row[0] if row is not None else None
+
+
+def _write(key: str, text: str) -> None:
+    global _entries
+    try:
+        conn = _connection()
+        with _lock:
+            now = time.time()
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO transcription_cache (key, text, last_used) VALUES (?, ?, ?)",
+                (key, text, now),
+            ).rowcount
+            if not inserted:
+                conn.execute(
+                    "UPDATE transcription_cache SET text = ?, last_used = ? WHERE key = ?",
+                    (text, now, key),
+                )
+            # Counted inside the write transaction, so rows added by other
+            # workers are included and none can slip in before the eviction
+            count = conn.execute("SELECT COUNT(*) FROM transcription_cache").fetchone()[0]
+            evicted = 0
+            if count > MAX_ENTRIES:
+                evicted = conn.execute(
+                    """
+                    DELETE FROM transcription_cache WHERE key IN (
+                        SELECT key FROM transcription_cache ORDER BY last_used LIMIT ?
+                    )
+                    """,
+                    (count - MAX_ENTRIES,),
+                ).rowcount
+            conn.commit()
+            _entries = count - evicted
+    except sqlite3.Error as e:
+        logger.warning("[TRANSCRIBE_CACHE] Write failed: %s", e)
+        return
+    _stats["evictions"] += evicted
+
+
+async def get(key: str) -> str | None:
+    """Look up a transcript in a worker thread, marking it as recently used."""
+    text = await asyncio.to_thread(_read, key)
+    _stats["hits" if text is not None else "misses"] += 1
+    return text
+
+
+async def put(key: str, text: str) -> None:
+    """Store a transcript in a worker thread.
+
+    The least recently used entries are evicted once the file holds more
+    than MAX_ENTRIES rows, counting those written by other workers.
+    """
+    await asyncio.to_thread(_write, key, text)
+
+
+def cache_stats() -> dict[str, int]:
+    """Return hit/miss/eviction counters and the entry count seen at the last write."""
+    return {
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+        "evictions": _stats["evictions"],
+        "entries": _entries,
+    }
+
+
+def clear_cache() -> None:
+    """Delete the cache and reset counters. Used for testing."""
+    global _conn, _entries
+    _stats.clear()
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+        _entries = 0
+    if os.path.exists(CACHE_DB_PATH):
+        os.unlink(CACHE_DB_PATH)
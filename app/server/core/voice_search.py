@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import threading
+import time
+
+import numpy as np
+
+from .embeddings import embed_query, index_state, is_available
+from .llm_extraction import LLMExtractionError, extract_voice_search
+from .models import Product, VoiceSearchExtraction, VoiceSearchResponse
+from .search import apply_filters, lexical_search, query_products, search_products
+from .text import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def _speculative_embed(transcript: str, timings: dict[str, float]) -> np.ndarray | None:
+    start = time.perf_counter()
+    try:
+        return embed_query(transcript)
+    except Exception as e:
+        logger.warning("[VOICE_SEARCH] Speculative embedding failed: %s", e)
+        return None
+    finally:
+        timings["speculative_embed"] = _elapsed_ms(start)
+
+
+async def voice_search(
+    transcript: str, cancelled: threading.Event | None = None
+) -> VoiceSearchResponse:
+    """Extract search intent from a transcript and run the filtered search.
+
+    The raw transcript is embedded while the LLM extraction runs. When the
+    extracted query matches the transcript, that vector is reused instead
+    of embedding the query a second time.
+
+    Args:
+        transcript: The raw voice transcript text.
+        cancelled: Optional event that skips remaining work once set.
+
+    Returns:
+        VoiceSearchResponse with the extraction, filtered products and
+        per-stage timings in milliseconds.
+    """
+    start = time.perf_counter()
+    timings: dict[str, float] = {}
+    degraded = False
+
+    embed_task: asyncio.Future[np.ndarray | None] | None = None
+    if is_available():
+        embed_task = asyncio.ensure_future(
+            asyncio.to_thread(_speculative_embed, transcript, timings)
+        )
+
+    try:
+        stage = time.perf_counter()
+        try:
+            extraction = await extract_voice_search(transcript)
+        except LLMExtractionError as e:
+            logger.warning("[VOICE_SEARCH] %s", e)
+            extraction = VoiceSearchExtraction(query=transcript)
+        timings["extract"] = _elapsed_ms(stage)
+
+        query_vec: np.ndarray | None = None
+        same_query = normalize_query(extraction.query) == normalize_query(transcript)
+        if embed_task is not None and extraction.query and same_query:
+            query_vec = await embed_task
+
+        stage = time.perf_counter()
+        if extraction.query:
+            if index_state() != "ready":
+                # Keyword matches unless the embedding index is live
+                results = await asyncio.to_thread(lexical_search, extraction.query)
+                degraded = True
+            else:
+                results = await asyncio.to_thread(
+                    search_products, extraction.query, cancelled, query_vec
+                )
+            results = apply_filters(
+                results,
+                category=extraction.category,
+                min_rating=extraction.min_rating,
+                sort=extraction.sort,
+            )
+        else:
+            results = await asyncio.to_thread(
+                query_products,
+                category=extraction.category,
+                sort=extraction.sort,
+                min_rating=extraction.min_rating,
+            )
+        timings["search"] = _elapsed_ms(stage)
+    finally:
+        if embed_task is not None and not embed_task.done():
+            embed_task.cancel()
+
+    timings["total"] = _elapsed_ms(start)
+    return VoiceSearchResponse(
+        extraction=extraction,
+        products=[Product(**r) for r in results],
+        total=len(results),
+        embedding_reused=query_vec is not None,
+        degraded=degraded,
+        timings=dict(timings),
+    )
+
+
+async def degraded_voice_search(transcript: str) -> VoiceSearchResponse:
+    """Search the raw transcript by keyword, without any LLM or embedding call.
+
+    Used when voice search is shed under load.
+    """
+    start = time.perf_counter()
+    results = await asyncio.to_thread(lexical_search, transcript)
+    return VoiceSearchResponse(
+        extraction=VoiceSearchExtraction(query=transcript),
+        products=[Product(**r) for r in results],
+        total=len(results),
+        degraded=True,
+        timings={"search": _elapsed_ms(start), "total": _elapsed_ms(start)},
+    )
@@ -0,0 +1,90 @@
+"""Benchmark Sentry tracing overhead: sample everything vs traces_sampler.
+
+Replays a probe-heavy request mix against the app in-process with Sentry
+pointed at a transport that only counts envelopes, and reports the mean
+latency per request and the number of transactions shipped. Each setting
+is run several times and the fastest run is reported.
+
+Usage (from app/server):
+    uv run python scripts/bench_sentry_sampling.py [requests] [repeats]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["SENTRY_DSN"] = ""
+os.environ["OPENROUTER_API_KEY"] = ""
+# Keep the lifespan's background litellm import out of the timed loop
+os.environ["IMPORT_WARMUP_ENABLED"] = "false"
+os.environ.pop("ELEVENLABS_API_KEY", None)
+
+import sentry_sdk  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sentry_sdk.envelope import Envelope  # noqa: E402
+from sentry_sdk.transport import Transport  # noqa: E402
+
+import core.db as db_module  # noqa: E402
+
+db_module.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from core.sentry_sampling import traces_sampler  # noqa: E402
+from server import app  # noqa: E402
+
+# Roughly what production sees: uptime probes dominate, then catalog reads
+REQUEST_MIX = [
+    "/api/health",
+    "/api/health",
+    "/api/health",
+    "/api/health",
+    "/api/products",
+    "/api/products?category=Electronics",
+    "/api/products/1",
+    "/api/categories",
+    "/api/cart",
+    "/",
+]
+
+
+class _CountingTransport(Transport):
+    def __init__(self) -> None:
+        super().__init__()
+        self.transactions = 0
+
+    def capture_envelope(self, envelope: Envelope) -> None:
+        self.transactions += sum(item.type == "transaction" for item in envelope.items)
+
+
+def _run_once(requests: int, **options: Any) -> tuple[float, int]:
+    transport = _CountingTransport()
+    sentry_sdk.init(dsn="https://public@sentry.invalid/1", transport=transport, **options)
+    with TestClient(app) as client:
+        for path in REQUEST_MIX:
+            client.get(path)
+        start = time.perf_counter()
+        for i in range(requests):
+            client.get(REQUEST_MIX[i % len(REQUEST_MIX)])
+        elapsed = time.perf_counter() - start
+    sentry_sdk.flush()
+    return elapsed, transport.transactions
+
+
+def run(label: str, requests: int, repeats: int, **options: Any) -> None:
+    elapsed, transactions = min(_run_once(requests, **options) for _ in range(repeats))
+    print(f"{label:<22} {elapsed / requests * 1e6:8.0f} µs/request  {transactions:6d} transactions")
+
+
+def main() -> None:
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{requests} requests, {len(REQUEST_MIX)}-path mix, best of {repeats}\n")
+    run("no tracing", requests, repeats)
+    run("traces_sample_rate=1.0", requests, repeats, traces_sample_rate=1.0)
+    run("traces_sampler", requests, repeats, traces_sampler=traces_sampler)
+
+
+if __name__ == "__main__":
+    main()
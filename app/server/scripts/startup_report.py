@@ -0,0 +1,79 @@
+"""Report where cold-start time goes: imports, then lifespan init stages.
+
+Imports `server` in a fresh interpreter under `python -X importtime` and
+lists the slowest top-level imports and the modules with the most self
+time. With --init it then runs the app's lifespan in-process (against a
+throwaway database) and prints each init stage.
+
+Usage (from app/server):
+    uv run python scripts/startup_report.py [--top N] [--budget-ms MS] [--init]
+
+Exits 1 when importing server takes longer than --budget-ms.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.startup import measure_imports  # noqa: E402
+
+
+def _print_table(title: str, rows: list[tuple[str, float]]) -> None:
+    print(f"\n{title}")
+    for name, ms in rows:
+        print(f"  {ms:9.1f} ms  {name}")
+
+
+async def _run_lifespan() -> None:
+    os.environ["OPENROUTER_API_KEY"] = ""
+    os.environ.pop("ELEVENLABS_API_KEY", None)
+    import core.db as db_module
+
+    db_module.DB_PATH = os.path.join(tempfile.mkdtemp(), "startup.db")
+
+    from core.startup import startup_stats
+    from server import app, lifespan
+
+    async with lifespan(app):
+        pass
+    stages = startup_stats()["stages_ms"]
+    assert isinstance(stages, dict)
+    _print_table("Init stages", list(stages.items()))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument("--init", action="store_true", help="also time lifespan init stages")
+    args = parser.parse_args()
+
+    entries = measure_imports("server")
+    total_ms = next(e.cumulative_us for e in reversed(entries) if e.module == "server") / 1000
+    top_level = sorted((e for e in entries if e.depth == 1), key=lambda e: -e.cumulative_us)
+    by_self = sorted(entries, key=lambda e: -e.self_us)
+
+    print(f"import server: {total_ms:.1f} ms")
+    _print_table(
+        "Slowest imports from server.py (cumulative)",
+        [(e.module, e.cumulative_us / 1000) for e in top_level[: args.top]],
+    )
+    _print_table("Most self time", [(e.module, e.self_us / 1000) for e in by_self[: args.top]])
+
+    if args.init:
+        asyncio.run(_run_lifespan())
+
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"\nOver budget: {total_ms:.1f} ms > {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Production entry point: serve the API from several uvicorn worker processes.
+
+Usage (from app/server):
+    uv run python serve.py
+
+Settings come from the environment (see .env.sample). There is no
+auto-reload here; `python server.py` is the development server.
+"""
+
+import importlib.util
+import logging
+import os
+import sys
+import tempfile
+from typing import Any
+
+import uvicorn
+from dotenv import load_dotenv
+
+logger = logging.getLogger("serve")
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def uvicorn_options() -> dict[str, Any]:
+    """Build uvicorn settings from the environment."""
+    return {
+        "host": os.environ.get("HOST", "0.0.0.0"),
+        # PORT is set by Render; BACKEND_PORT is the local default
+        "port": int(os.environ.get("PORT") or os.environ.get("BACKEND_PORT", "8000")),
+        "workers": int(os.environ.get("WEB_CONCURRENCY", "2")),
+        # uvloop and httptools are faster; fall back when not installed
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "backlog": int(os.environ.get("BACKLOG", "2048")),
+        # Longer than the load balancer's idle timeout, so the proxy closes
+        # idle connections first and never reuses one we just closed
+        "timeout_keep_alive": int(os.environ.get("KEEPALIVE_SECONDS", "75")),
+        # On SIGTERM, stop accepting and let in-flight requests finish;
+        # Render sends SIGKILL 30 s after SIGTERM
+        "timeout_graceful_shutdown": int(os.environ.get("GRACEFUL_SHUTDOWN_SECONDS", "25")),
+        "reload": False,
+    }
+
+
+def prepare_metrics_dir(workers: int) -> None:
+    """Give multiple workers a shared, empty METRICS_DIR for /metrics."""
+    if workers <= 1:
+        return
+    path = os.environ.get("METRICS_DIR") or tempfile.mkdtemp(prefix="voxstore-metrics-")
+    os.makedirs(path, exist_ok=True)
+    # Snapshots from a previous run would be summed into this one's counters
+    for filename in os.listdir(path):
+        if filename.startswith("worker-"):
+            os.unlink(os.path.join(path, filename))
+    os.environ["METRICS_DIR"] = path
+
+
+def main() -> None:
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+    logging.basicConfig(
+        level=logging.INFO, format="%(message)s", handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    options = uvicorn_options()
+    prepare_metrics_dir(options["workers"])
+
+    # Create and seed the database once before the workers start. The
+    # catalog is not embedded here, which would hold up binding the port on
+    # a cold deploy: each worker builds its index in the background, and the
+    # lock next to the embeddings cache lets only the first call the API.
+    from core.db import init_db
+
+    init_db()
+
+    logger.info(
+        "[SERVE] %d workers on %s:%d (loop=%s, http=%s, backlog=%d, keep-alive=%ds)",
+        options["workers"],
+        options["host"],
+        options["port"],
+        options["loop"],
+        options["http"],
+        options["backlog"],
+        options["timeout_keep_alive"],
+    )
+    uvicorn.run("server:app", **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,114 @@
+import asyncio
+import hmac
 import logging
 import os
 import sys
+import threading
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 from datetime import datetime
 
 import sentry_sdk
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import (
+    Depends,
+    FastAPI,
+    File,
+    Header,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+    WebSocket,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-
-from core.db import get_connection, init_db
-from core.embeddings import init_embeddings
-from core.llm_extraction import LLMExtractionError, extract_voice_search
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from core.admission import AdmissionController, AdmissionRejected
+from core.audio import AudioError, prepare_audio, preprocessing_stats, read_upload
+from core.cancellation import (
+    CLIENT_CLOSED_REQUEST,
+    ClientDisconnected,
+    cancellation_stats,
+    run_unless_disconnected,
+)
+from core.coalescing import coalesced_response, coalescing_stats
+from core.db import (
+    catalog_stats,
+    get_connection,
+    init_db,
+    load_catalog,
+    start_catalog_refresher,
+    stop_catalog_refresher,
+)
+from core.deadline import DeadlineExceeded, DeadlineMiddleware, deadline_stats, get_deadline
+from core.embeddings import index_state, is_building, start_index_build, stop_index_build
+from core.intent_parser import parser_stats, warm_vocabulary
+from core.llm_extraction import (
+    LLMExtractionError,
+    circuit_states,
+    extract_voice_search,
+    extraction_stats,
+    model_stats,
+)
+from core.loop_monitor import loop_lag_stats, start_loop_monitor, stop_loop_monitor
+from core.memory import (
+    SnapshotNotFound,
+    diff_snapshots,
+    memory_report,
+    stop_tracing,
+    take_snapshot,
+    tracemalloc_status,
+)
+from core.metrics import CallbackMetric, MetricsMiddleware, start_flusher, stop_flusher
+from core.metrics import collect as collect_metrics
 from core.models import (
     AddToCartRequest,
     CartItem,
     HealthCheckResponse,
     Product,
+    ReadinessResponse,
     SearchResponse,
+    SubsystemStatus,
     TranscribeResponse,
     VoiceExtractRequest,
     VoiceSearchExtraction,
+    VoiceSearchResponse,
     WebSocketTokenResponse,
 )
-from core.search import search_products
-from core.transcribe import TranscriptionError, get_websocket_token, transcribe_audio
+from core.profiling import (
+    FORMATS,
+    ProfilerBusy,
+    ProfilingMiddleware,
+    artifact_path,
+    profile_window,
+    profiling_stats,
+)
+from core.realtime_relay import relay_stats, relay_transcription
+from core.search import lexical_search, query_products, search_products
+from core.sentry_sampling import TailSamplingMiddleware, sampling_stats, traces_sampler
+from core.startup import stage, start_warmup, startup_stats
+from core.text import normalize_query
+from core.tracing import ServerTimingMiddleware, span
+from core.transcribe import (
+    TranscriptionError,
+    acquire_websocket_token,
+    cached_transcript,
+    close_http_client,
+    connection_stats,
+    start_http_client,
+    start_token_pool,
+    stop_token_pool,
+    token_pool_state,
+    token_pool_stats,
+    transcribe_audio,
+    transcript_key,
+    transcription_stats,
+)
+from core.voice_search import degraded_voice_search, voice_search
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
 
@@ -44,7 +125,7 @@ sentry_dsn = os.environ.get("SENTRY_DSN")
 if sentry_dsn and os.environ.get("RENDER"):
     sentry_sdk.init(
         dsn=sentry_dsn,
-        traces_sample_rate=1.0,
+        traces_sampler=traces_sampler,
         send_default_pii=True,
     )
     logger.info("[SENTRY] Initialized with DSN")
@@ -55,30 +136,72 @@ else:
 
 app_start_time = datetime.now()
 
+# Bearer token for /api/admin endpoints, also the key for signed profiling
+# headers. Admin endpoints are hidden (404) when unset.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+# Bearer token for /metrics and /api/stats, kept apart from ADMIN_TOKEN so
+# a scraper cannot reach the admin endpoints. Both are hidden when unset.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Set once init_db() has run; part of readiness
+_db_ready = False
+
+_product_list = TypeAdapter(list[Product])
+
+# Per-route bounds on the endpoints that call paid external APIs. When a
+# route is saturated it degrades (lexical search, transcript-as-query) or
+# sheds with a 503 rather than queueing without limit.
+_admission = {
+    "search": AdmissionController.from_env("search", 16, 32, 0.5),
+    "voice_extract": AdmissionController.from_env("voice_extract", 8, 16, 0.5),
+    "voice_search": AdmissionController.from_env("voice_search", 8, 16, 0.5),
+    "transcribe": AdmissionController.from_env("transcribe", 4, 8, 2.0),
+}
+
+# Time budget per route in seconds. Clients can shorten it with an
+# X-Request-Timeout header; outbound calls only get what is left.
+_route_deadlines = {
+    "/api/search": 5.0,
+    "/api/transcribe": 20.0,
+    "/api/transcribe/token": 5.0,
+    "/api/voice/extract": 8.0,
+    "/api/voice/search": 10.0,
+}
+
 
 @asynccontextmanager
 async def lifespan(application: FastAPI) -> AsyncGenerator[None]:
-    """Initialize database and embeddings before accepting requests."""
-    global app_start_time
+    """Initialize the database, then build embeddings while serving requests."""
+    global app_start_time, _db_ready
     app_start_time = datetime.now()
 
     # Initialize database on startup
-    init_db()
+    with stage("init_db"):
+        init_db()
+    _db_ready = True
     logger.info("[STARTUP] Database initialized with seed data")
 
-    # Initialize semantic search embeddings
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM products")
-        all_products = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        init_embeddings(all_products)
-    except Exception as e:
-        logger.warning("[STARTUP] Failed to initialize embeddings: %s", e)
+    # Semantic search comes up in the background; until then search falls
+    # back to keyword matching and /api/ready reports not ready
+    start_index_build(load_catalog)
+
+    start_catalog_refresher()
+    start_flusher()
+    start_loop_monitor()
+    start_warmup(warm_vocabulary)
+    await start_http_client()
+    if os.environ.get("ELEVENLABS_API_KEY"):
+        start_token_pool()
 
     yield
 
+    await stop_token_pool()
+    await close_http_client()
+    await stop_index_build()
+    await stop_loop_monitor()
+    await stop_flusher()
+    await stop_catalog_refresher()
+
 
 app = FastAPI(
     title="VoxStore API",
@@ -104,6 +227,22 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(DeadlineMiddleware, defaults=_route_deadlines)
+app.add_middleware(TailSamplingMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware, secret=ADMIN_TOKEN)
+
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected) -> Response:
+    # Nobody is listening; skip serializing a body
+    return Response(status_code=CLIENT_CLOSED_REQUEST)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded) -> Response:
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
 
 
 # --- Product endpoints ---
@@ -117,38 +256,19 @@ async def list_products(
     sort: str | None = None,
     min_rating: float | None = None,
 ):
-    conn = get_connection()
-    cursor = conn.cursor()
+    filters = {
+        "category": category,
+        "min_price": min_price,
+        "max_price": max_price,
+        "sort": sort,
+        "min_rating": min_rating,
+    }
 
-    query = "SELECT * FROM products WHERE 1=1"
-    params: list = []
-
-    if category:
-        query += " AND category = ?"
-        params.append(category)
-    if min_price is not None:
-        query += " AND price >= ?"
-        params.append(min_price)
-    if max_price is not None:
-        query += " AND price <= ?"
-        params.append(max_price)
-    if min_rating is not None:
-        query += " AND rating >= ?"
-        params.append(min_rating)
-
-    if sort == "price_asc":
-        query += " ORDER BY price ASC"
-    elif sort == "price_desc":
-        query += " ORDER BY price DESC"
-    elif sort == "rating":
-        query += " ORDER BY rating DESC"
-    else:
-        query += " ORDER BY id ASC"
+    async def render() -> bytes:
+        rows = await asyncio.to_thread(query_products, **filters)
+        return _product_list.dump_json(_product_list.validate_python(rows))
 
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    return await coalesced_response("products", tuple(filters.items()), render)
 
 
 @app.get("/api/products/{product_id}", response_model=Product)
@@ -164,11 +284,47 @@ async def get_product(product_id: int):
 
 
 @app.get("/api/search", response_model=SearchResponse)
-async def search(q: str = ""):
-    if not q.strip():
+async def search(request: Request, q: str = ""):
+    # "Yoga mat" and "yoga mat " are the same search
+    normalized = normalize_query(q)
+    if not normalized:
         return SearchResponse(products=[], total=0, query=q)
-    results = search_products(q)
-    return SearchResponse(products=[Product(**r) for r in results], total=len(results), query=q)
+
+    async def render() -> bytes:
+        # Shared by every coalesced request, so it only stops early once
+        # all of them have disconnected
+        cancelled = threading.Event()
+        results: list[dict] | None = None
+        if index_state() == "ready":
+            try:
+                async with _admission["search"].slot(get_deadline()):
+                    results = await asyncio.to_thread(search_products, normalized, cancelled)
+            except AdmissionRejected:
+                pass
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        degraded = results is None
+        if results is None:
+            # Embedding index not ready (building, disabled or failed), or
+            # semantic search shed under load
+            with span("lexical"):
+                results = await asyncio.to_thread(lexical_search, normalized)
+        response = SearchResponse(
+            products=[Product(**r) for r in results],
+            total=len(results),
+            query=normalized,
+            degraded=degraded,
+        )
+        return response.model_dump_json(exclude={"query"}).encode()
+
+    def echo_query(body: bytes) -> bytes:
+        # Each caller gets back the query it sent, spliced into the shared body
+        return body[:-1] + b',"query":' + to_json(q) + b"}"
+
+    return await run_unless_disconnected(
+        request, "search", coalesced_response("search", normalized, render, echo_query)
+    )
 
 
 @app.get("/api/categories")
@@ -185,19 +341,38 @@ async def list_categories():
 
 
 @app.post("/api/transcribe", response_model=TranscribeResponse)
-async def transcribe_endpoint(file: UploadFile = File(...)):
+async def transcribe_endpoint(request: Request, file: UploadFile = File(...)):
     """Transcribe audio using ElevenLabs Scribe v2."""
     if not file.content_type or not file.content_type.startswith("audio/"):
         return TranscribeResponse(text="", success=False, error="Invalid file type. Must be audio.")
 
     try:
-        audio_data = await file.read()
-        if len(audio_data) == 0:
+        upload = await read_upload(file)
+        if upload.size == 0:
             return TranscribeResponse(text="", success=False, error="Empty audio file")
 
-        text = await transcribe_audio(audio_data, file.content_type)
-        return TranscribeResponse(text=text, success=True)
-    except TranscriptionError as e:
+        # Keyed by the upload as received, so a repeat skips the admission
+        # queue and preprocessing as well as the STT call
+        key = transcript_key(upload.sha256, file.content_type)
+        cached = await cached_transcript(key)
+        if cached is not None:
+            return TranscribeResponse(text=cached, success=True)
+
+        async with _admission["transcribe"].slot(get_deadline()):
+            with span("preprocess"):
+                audio = await asyncio.to_thread(prepare_audio, upload.file, file.content_type)
+            text = await run_unless_disconnected(
+                request, "transcribe", transcribe_audio(audio.data, audio.content_type, key)
+            )
+        return TranscribeResponse(
+            text=text,
+            success=True,
+            duration_seconds=audio.duration_seconds,
+            trimmed_duration_seconds=audio.trimmed_duration_seconds,
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(503, str(e), headers={"Retry-After": "1"}) from e
+    except (AudioError, TranscriptionError) as e:
         logger.warning("[TRANSCRIBE] %s", e)
         return TranscribeResponse(text="", success=False, error=str(e))
 
@@ -206,27 +381,74 @@ async def transcribe_endpoint(file: UploadFile = File(...)):
 async def transcribe_token_endpoint():
     """Get a single-use WebSocket token for realtime transcription."""
     try:
-        result = await get_websocket_token()
+        result = await acquire_websocket_token()
         return result
     except TranscriptionError as e:
         logger.warning("[TRANSCRIBE TOKEN] %s", e)
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+def _websocket_origin_allowed(websocket: WebSocket) -> bool:
+    """Apply the CORS allow-list to a WebSocket handshake, which CORS does not cover.
+
+    Same-origin pages (the bundled frontend) and clients that send no
+    Origin (not a browser) are allowed.
+    """
+    origin = websocket.headers.get("origin")
+    if origin is None or origin in allowed_origins:
+        return True
+    host = websocket.headers.get("host", "")
+    return origin.split("://", 1)[-1] == host
+
+
+@app.websocket("/api/transcribe/stream")
+async def transcribe_stream_endpoint(websocket: WebSocket):
+    """Relay binary PCM frames to ElevenLabs realtime transcription."""
+    if not _websocket_origin_allowed(websocket):
+        logger.warning("[RELAY] Rejected origin %s", websocket.headers.get("origin"))
+        # Closing before accept() answers the handshake with 403
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    await relay_transcription(websocket)
+
+
 # --- Voice extraction endpoint ---
 
 
 @app.post("/api/voice/extract", response_model=VoiceSearchExtraction)
-async def extract_voice_endpoint(request: VoiceExtractRequest):
+async def extract_voice_endpoint(request: Request, response: Response, body: VoiceExtractRequest):
     """Extract structured search parameters from a voice transcript using LLM."""
-    if not request.transcript.strip():
+    if not body.transcript.strip():
         raise HTTPException(400, "Transcript is required")
     try:
-        result = await extract_voice_search(request.transcript)
+        async with _admission["voice_extract"].slot(get_deadline()):
+            result = await run_unless_disconnected(
+                request, "voice_extract", extract_voice_search(body.transcript)
+            )
         return result
+    except AdmissionRejected:
+        response.headers["X-Degraded"] = "1"
+        return VoiceSearchExtraction(query=body.transcript)
     except LLMExtractionError as e:
         logger.warning("[VOICE_EXTRACT] %s", e)
-        return VoiceSearchExtraction(query=request.transcript)
+        return VoiceSearchExtraction(query=body.transcript)
+
+
+@app.post("/api/voice/search", response_model=VoiceSearchResponse)
+async def voice_search_endpoint(request: Request, body: VoiceExtractRequest):
+    """Extract search intent from a transcript and return the filtered results."""
+    if not body.transcript.strip():
+        raise HTTPException(400, "Transcript is required")
+    cancelled = threading.Event()
+    try:
+        async with _admission["voice_search"].slot(get_deadline()):
+            return await run_unless_disconnected(
+                request, "voice_search", voice_search(body.transcript, cancelled), cancelled
+            )
+    except AdmissionRejected:
+        # No LLM or embedding calls: keyword matches on the raw transcript
+        return await degraded_voice_search(body.transcript)
 
 
 # --- Cart endpoints ---
@@ -299,18 +521,217 @@ async def get_config():
     return {"sentry_dsn": dsn}
 
 
+# --- Stats ---
+
+
+def require_metrics_token(authorization: str | None = Header(None)) -> None:
+    """Allow the request only with `Authorization: Bearer <METRICS_TOKEN>`."""
+    if not METRICS_TOKEN:
+        raise HTTPException(404, "Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token, METRICS_TOKEN):
+        raise HTTPException(401, "Invalid metrics token")
+
+
+@app.get("/api/stats", dependencies=[Depends(require_metrics_token)])
+async def get_stats():
+    """Return in-process runtime counters."""
+    return {
+        "admission": {route: controller.stats() for route, controller in _admission.items()},
+        "cancellations": cancellation_stats(),
+        "coalescing": coalescing_stats(),
+        "deadline_skips": deadline_stats(),
+        "event_loop": loop_lag_stats(),
+        "extraction": extraction_stats(),
+        "intent_parser": parser_stats(),
+        "extraction_models": model_stats(),
+        "profiling": profiling_stats(),
+        "elevenlabs_connections": connection_stats(),
+        "realtime_tokens": token_pool_stats(),
+        "realtime_relay": relay_stats(),
+        "sentry_sampling": sampling_stats(),
+        "startup": startup_stats(),
+        "audio_preprocessing": preprocessing_stats(),
+        "transcription": transcription_stats(),
+    }
+
+
+# --- Metrics ---
+
+
+def _cache_requests() -> dict[tuple[str, ...], float]:
+    extraction = extraction_stats()
+    transcription = transcription_stats()
+    tokens = token_pool_stats()
+    parser = parser_stats()
+    return {
+        ("extraction", "memory_hit"): extraction["memory_hits"],
+        ("extraction", "disk_hit"): extraction["disk_hits"],
+        ("extraction", "miss"): extraction["misses"],
+        ("intent_fast_path", "hit"): float(parser["fast_path_hits"]),
+        ("intent_fast_path", "miss"): float(parser["deferrals"]),
+        ("realtime_token", "hit"): tokens["hits"],
+        ("realtime_token", "miss"): tokens["misses"],
+        ("transcription", "hit"): transcription["hits"],
+        ("transcription", "miss"): transcription["misses"],
+    }
+
+
+def _admission_values(key: str) -> dict[tuple[str, ...], float]:
+    return {(route,): c.stats()[key] for route, c in _admission.items()}
+
+
+CallbackMetric(
+    "voxstore_cache_requests_total",
+    "Cache lookups by cache and result.",
+    "counter",
+    ("cache", "result"),
+    _cache_requests,
+)
+CallbackMetric(
+    "voxstore_admission_in_flight",
+    "Requests holding an admission slot.",
+    "gauge",
+    ("route",),
+    lambda: _admission_values("in_flight"),
+)
+CallbackMetric(
+    "voxstore_admission_queue_depth",
+    "Requests waiting for an admission slot.",
+    "gauge",
+    ("route",),
+    lambda: _admission_values("queue_depth"),
+)
+CallbackMetric(
+    "voxstore_admission_rejected_total",
+    "Requests shed or degraded by admission control.",
+    "counter",
+    ("route",),
+    lambda: _admission_values("rejected"),
+)
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+async def metrics():
+    """Export metrics in the Prometheus text format."""
+    body = await asyncio.to_thread(collect_metrics)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+# --- Admin ---
+
+
+def require_admin(authorization: str | None = Header(None)) -> None:
+    """Allow the request only with `Authorization: Bearer <ADMIN_TOKEN>`."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(404, "Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(401, "Invalid admin token")
+
+
+@app.post("/api/admin/profile", dependencies=[Depends(require_admin)])
+async def start_profile(seconds: float = 10.0):
+    """Sample the process for a time window and return the profile's artifact id."""
+    if seconds <= 0:
+        raise HTTPException(422, "seconds must be positive")
+    try:
+        artifact_id = await profile_window(seconds)
+    except ProfilerBusy as e:
+        raise HTTPException(409, str(e)) from e
+    return {"artifact_id": artifact_id, "formats": list(FORMATS)}
+
+
+@app.get("/api/admin/profile/{artifact_id}", dependencies=[Depends(require_admin)])
+async def get_profile(artifact_id: str, format: str = "speedscope"):
+    """Download a profile as speedscope JSON or collapsed stacks."""
+    try:
+        path = artifact_path(artifact_id, format)
+    except ValueError as e:
+        raise HTTPException(404, str(e)) from e
+    if not os.path.exists(path):
+        raise HTTPException(404, "Profile not found")
+    media_type = "application/json" if format == "speedscope" else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+
+@app.get("/api/admin/memory", dependencies=[Depends(require_admin)])
+async def get_memory():
+    """Report RSS and the estimated footprint of embeddings, caches and catalog files."""
+    return memory_report()
+
+
+@app.post("/api/admin/memory/snapshots", dependencies=[Depends(require_admin)])
+async def create_memory_snapshot():
+    """Take a tracemalloc snapshot, starting tracing on the first call."""
+    snapshot_id = await asyncio.to_thread(take_snapshot)
+    return {"snapshot_id": snapshot_id, **tracemalloc_status()}
+
+
+@app.get("/api/admin/memory/diff", dependencies=[Depends(require_admin)])
+async def get_memory_diff(start: str, end: str | None = None, limit: int = 20):
+    """Show allocation growth between two snapshots, or from `start` to now."""
+    try:
+        return await asyncio.to_thread(diff_snapshots, start, end, limit)
+    except SnapshotNotFound as e:
+        raise HTTPException(404, str(e)) from e
+
+
+@app.delete("/api/admin/memory/snapshots", dependencies=[Depends(require_admin)])
+async def delete_memory_snapshots():
+    """Stop tracemalloc, which slows allocations while on, and drop snapshots."""
+    stop_tracing()
+    return tracemalloc_status()
+
+
 # --- Health ---
 
 
 @app.get("/api/health", response_model=HealthCheckResponse)
 async def health_check():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) as count FROM products")
-    count = cursor.fetchone()["count"]
-    conn.close()
+    """Liveness probe with subsystem status, answered from memory without any I/O.
+
+    The product count and catalog version are the cached catalog counters,
+    at most CATALOG_REFRESH_SECONDS old.
+    """
+    catalog = catalog_stats()
+    circuits = circuit_states()
+    if not _db_ready:
+        database = "starting"
+    else:
+        database = "ok" if catalog["error"] is None else "error"
+    subsystems = SubsystemStatus(
+        database=database,
+        embeddings=index_state(),
+        token_pool=token_pool_state(),
+        llm_circuits=circuits,
+    )
+    degraded = (
+        database == "error"
+        or subsystems.embeddings == "failed"
+        or all(state == "open" for state in circuits.values())
+    )
     uptime = (datetime.now() - app_start_time).total_seconds()
-    return HealthCheckResponse(status="ok", products_count=count, uptime_seconds=uptime)
+    return HealthCheckResponse(
+        status="degraded" if degraded else "ok",
+        products_count=catalog["products"],
+        uptime_seconds=uptime,
+        catalog_version=catalog["version"],
+        subsystems=subsystems,
+    )
+
+
+@app.get("/api/ready", response_model=ReadinessResponse, responses={503: {}})
+async def readiness_check():
+    """Readiness probe: 503 until the database and embedding index are up.
+
+    A disabled or failed index build still counts as done.
+    """
+    ready = _db_ready and not is_building()
+    body = ReadinessResponse(
+        status="ready" if ready else "starting", database=_db_ready, embeddings=index_state()
+    )
+    return JSONResponse(status_code=200 if ready else 503, content=body.model_dump())
 
 
 @app.get("/sentry-debug")
@@ -333,6 +754,7 @@ if os.path.isdir(CLIENT_DIR):
 
 
 if __name__ == "__main__":
+    # Development server with auto-reload; production uses serve.py
     import uvicorn
 
     uvicorn.run(
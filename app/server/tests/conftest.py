@@ -7,13 +7,21 @@ _tmpdir = tempfile.mkdtemp()
 _tmp_db = os.path.join(_tmpdir, "test.db")
 os.environ["SENTRY_DSN"] = ""  # Disable Sentry in tests
 os.environ["OPENROUTER_API_KEY"] = ""  # Disable embeddings in tests
+os.environ["IMPORT_WARMUP_ENABLED"] = "false"  # No background litellm import per client
+os.environ["SERVER_TIMING_ENABLED"] = "true"  # Off by default; the tracing tests read it
+os.environ["METRICS_TOKEN"] = "test-metrics"  # /metrics and /api/stats are hidden without it
 
 # We need to set this before core.db is imported
 # But core.db reads DB_PATH at module level, so we patch after import
 import core.db as db_module  # noqa: E402
 import core.embeddings as embeddings_module  # noqa: E402
+import core.extraction_cache as extraction_cache_module  # noqa: E402
+import core.intent_parser as intent_parser_module  # noqa: E402
+import core.transcription_cache as transcription_cache_module  # noqa: E402
 
 db_module.DB_PATH = _tmp_db
+extraction_cache_module.CACHE_DB_PATH = os.path.join(_tmpdir, "extraction_cache.db")
+transcription_cache_module.CACHE_DB_PATH = os.path.join(_tmpdir, "transcription_cache.db")
 
 # Prevent embeddings from loading during test imports and lifespan
 _embeddings_patch = patch.object(embeddings_module, "init_embeddings", return_value=None)
@@ -22,8 +30,13 @@ _embeddings_patch.start()
 import pytest  # noqa: E402
 from fastapi.testclient import TestClient  # noqa: E402
 
+import server as server_module  # noqa: E402
 from server import app  # noqa: E402
 
+# Build no embedding index in the lifespan; tests patch is_available instead
+_index_patch = patch.object(server_module, "start_index_build")
+_index_patch.start()
+
 
 @pytest.fixture(autouse=True)
 def reset_db():
@@ -33,9 +46,18 @@ def reset_db():
     if os.path.exists(_tmp_db):
         os.unlink(_tmp_db)
     db_module.init_db()
+    extraction_cache_module.clear_cache()
+    intent_parser_module.clear_cache()
+    transcription_cache_module.clear_cache()
     yield
 
 
+@pytest.fixture
+def metrics_auth():
+    """Headers for /metrics and /api/stats."""
+    return {"Authorization": "Bearer test-metrics"}
+
+
 @pytest.fixture
 def client():
     with TestClient(app) as c:
@@ -0,0 +1,167 @@
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import server
+from core import llm_extraction
+from core.admission import AdmissionController, AdmissionRejected
+
+
+@pytest.mark.asyncio
+async def test_admits_up_to_max_in_flight():
+    controller = AdmissionController("test", max_in_flight=2, max_queue=0, queue_timeout=1)
+    await controller.acquire()
+    await controller.acquire()
+    with pytest.raises(AdmissionRejected, match="queue full"):
+        await controller.acquire()
+    assert controller.stats()["in_flight"] == 2
+    assert controller.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_queued_request_gets_released_slot():
+    controller = AdmissionController("test", max_in_flight=1, max_queue=1, queue_timeout=1)
+    await controller.acquire()
+
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    assert controller.stats()["queue_depth"] == 1
+
+    controller.release()
+    await asyncio.wait_for(waiter, timeout=1)
+    assert controller.stats() == {
+        "in_flight": 1,
+        "queue_depth": 0,
+        "max_in_flight": 1,
+        "max_queue": 1,
+        "admitted": 2,
+        "rejected": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_rejects():
+    controller = AdmissionController("test", max_in_flight=1, max_queue=1, queue_timeout=0.01)
+    async with controller.slot():
+        with pytest.raises(AdmissionRejected, match="queue timeout"):
+            await controller.acquire()
+    assert controller.stats()["in_flight"] == 0
+    assert controller.stats()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_deadline_caps_queue_wait():
+    controller = AdmissionController("test", max_in_flight=1, max_queue=1, queue_timeout=5)
+    async with controller.slot():
+        start = time.monotonic()
+        with pytest.raises(AdmissionRejected, match="queue timeout"):
+            await controller.acquire(deadline=start + 0.02)
+        assert time.monotonic() - start < 1
+        with pytest.raises(AdmissionRejected, match="deadline exceeded"):
+            await controller.acquire(deadline=time.monotonic() - 1)
+    assert controller.stats()["rejected"] == 2
+
+
+def test_from_env_reads_overrides(monkeypatch):
+    monkeypatch.setenv("ADMISSION_VOICE_EXTRACT_MAX_IN_FLIGHT", "3")
+    monkeypatch.setenv("ADMISSION_VOICE_EXTRACT_QUEUE_TIMEOUT_SECONDS", "0.25")
+    controller = AdmissionController.from_env("voice_extract", 8, 16, 0.5)
+    assert (controller.max_in_flight, controller.max_queue, controller.queue_timeout) == (
+        3,
+        16,
+        0.25,
+    )
+
+
+@pytest.mark.asyncio
+async def test_llm_overflow_fails_fast():
+    slots = AdmissionController("llm_extraction", max_in_flight=1, max_queue=0, queue_timeout=1)
+    client = MagicMock()
+    with (
+        patch.object(llm_extraction, "_llm_slots", slots),
+        patch.object(llm_extraction, "_get_client", return_value=client),
+    ):
+        await slots.acquire()
+        with pytest.raises(llm_extraction.LLMExtractionError, match="overloaded"):
+            await asyncio.wait_for(llm_extraction._extract_uncached("headphones"), timeout=1)
+    client.completions.create.assert_not_called()
+
+
+def test_voice_extract_degrades_to_transcript_when_overloaded(client):
+    slots = AdmissionController("llm_extraction", max_in_flight=0, max_queue=0, queue_timeout=1)
+    with (
+        patch.object(llm_extraction, "_llm_slots", slots),
+        patch.object(llm_extraction, "_get_client", return_value=MagicMock()),
+    ):
+        res = client.post("/api/voice/extract", json={"transcript": "flux capacitor"})
+
+    assert res.status_code == 200
+    assert res.json()["query"] == "flux capacitor"
+
+
+def _saturated(route: str) -> AdmissionController:
+    return AdmissionController(route, max_in_flight=0, max_queue=0, queue_timeout=1)
+
+
+def test_saturated_search_falls_back_to_lexical(client):
+    with (
+        patch.dict(server._admission, {"search": _saturated("search")}),
+        patch("server.search_products") as mock_search,
+    ):
+        res = client.get("/api/search?q=wireless headphones")
+
+    mock_search.assert_not_called()
+    data = res.json()
+    assert data["degraded"] is True
+    assert data["total"] > 0
+    assert "Headphones" in data["products"][0]["name"]
+
+
+def test_saturated_voice_extract_marks_degraded(client):
+    with (
+        patch.dict(server._admission, {"voice_extract": _saturated("voice_extract")}),
+        patch("server.extract_voice_search") as mock_extract,
+    ):
+        res = client.post("/api/voice/extract", json={"transcript": "red shoes under 50"})
+
+    mock_extract.assert_not_called()
+    assert res.status_code == 200
+    assert res.headers["X-Degraded"] == "1"
+    assert res.json()["query"] == "red shoes under 50"
+
+
+def test_saturated_voice_search_falls_back_to_keywords(client):
+    with (
+        patch.dict(server._admission, {"voice_search": _saturated("voice_search")}),
+        patch("core.voice_search.extract_voice_search") as mock_extract,
+        patch("core.voice_search.search_products") as mock_search,
+    ):
+        res = client.post("/api/voice/search", json={"transcript": "wireless headphones"})
+
+    mock_extract.assert_not_called()
+    mock_search.assert_not_called()
+    data = res.json()
+    assert data["degraded"] is True
+    assert data["extraction"]["query"] == "wireless headphones"
+    assert "Headphones" in data["products"][0]["name"]
+
+
+def test_saturated_transcribe_sheds_with_503(client):
+    with (
+        patch.dict(server._admission, {"transcribe": _saturated("transcribe")}),
+        patch("server.transcribe_audio") as mock_transcribe,
+    ):
+        res = client.post("/api/transcribe", files={"file": ("a.webm", b"audio", "audio/webm")})
+
+    mock_transcribe.assert_not_called()
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+
+
+def test_admission_stats_exposed(client, metrics_auth):
+    stats = client.get("/api/stats", headers=metrics_auth).json()["admission"]
+    assert set(stats) == {"search", "voice_extract", "voice_search", "transcribe"}
+    assert stats["search"]["queue_depth"] == 0
+    assert "rejected" in stats["transcribe"]
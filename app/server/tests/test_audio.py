@@ -0,0 +1,139 @@
+import io
+import wave
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from core import audio
+from core.audio import AudioError, prepare_audio, trim_silence
+
+
+def _wav_bytes(samples: np.ndarray, rate: int) -> bytes:
+    """Encode Int16 samples of shape (frames, channels) as WAV."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(samples.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def _padded_tone(rate: int, channels: int = 1, silence: float = 1.0, tone: float = 0.5):
+    """`silence` seconds of silence on each side of a 440 Hz tone."""
+    t = np.arange(int(tone * rate)) / rate
+    wave_ = (8000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    quiet = np.zeros(int(silence * rate), dtype=np.int16)
+    mono = np.concatenate([quiet, wave_, quiet])
+    return np.repeat(mono[:, None], channels, axis=1)
+
+
+@pytest.fixture(autouse=True)
+def reset_audio_stats():
+    audio.reset_stats()
+    yield
+
+
+def test_prepare_audio_downmixes_resamples_and_trims():
+    data = _wav_bytes(_padded_tone(44100, channels=2), 44100)
+
+    prepared = prepare_audio(io.BytesIO(data), "audio/wav")
+
+    assert prepared.content_type == "audio/wav"
+    assert prepared.duration_seconds == pytest.approx(2.5, abs=0.01)
+    # The tone plus 200 ms of padding on each side
+    assert prepared.trimmed_duration_seconds == pytest.approx(0.9, abs=0.03)
+    with wave.open(io.BytesIO(prepared.data)) as wav:
+        assert wav.getnchannels() == 1
+        assert wav.getframerate() == 16000
+        assert wav.getsampwidth() == 2
+    assert len(prepared.data) < len(data) / 5
+
+
+def test_prepare_audio_integer_ratio_resample():
+    prepared = prepare_audio(io.BytesIO(_wav_bytes(_padded_tone(48000), 48000)), "audio/x-wav")
+    assert prepared.trimmed_duration_seconds == pytest.approx(0.9, abs=0.03)
+
+
+def test_prepare_audio_matches_base_content_type():
+    data = _wav_bytes(_padded_tone(16000), 16000)
+    prepared = prepare_audio(io.BytesIO(data), "Audio/WAV; codecs=1")
+    assert prepared.trimmed_duration_seconds == pytest.approx(0.9, abs=0.03)
+    assert audio.preprocessing_stats()["decoded"] == 1
+
+
+def test_block_resampling_matches_whole_signal():
+    rate = 44100
+    t = np.arange(int(2.5 * rate)) / rate
+    signal = (8000 * np.sin(2 * np.pi * 300 * t)).astype(np.float32)
+    resampler = audio._Resampler(rate)
+    blocks = [resampler.feed(signal[i : i + rate]) for i in range(0, len(signal), rate)]
+    streamed = np.concatenate(blocks)
+
+    target = np.arange(len(streamed)) / audio.TARGET_SAMPLE_RATE
+    whole = np.interp(target, np.arange(len(signal)) / rate, signal)
+    assert len(streamed) == pytest.approx(2.5 * audio.TARGET_SAMPLE_RATE, abs=1)
+    assert np.allclose(streamed, whole, atol=1e-2)
+
+
+def test_prepare_audio_passes_compressed_formats_through():
+    prepared = prepare_audio(io.BytesIO(b"fake-webm"), "audio/webm")
+    assert prepared.data == b"fake-webm"
+    assert prepared.content_type == "audio/webm"
+    assert prepared.duration_seconds is None
+    assert audio.preprocessing_stats()["passthrough"] == 1
+
+
+def test_prepare_audio_rejects_silence():
+    silent = np.zeros((16000, 1), dtype=np.int16)
+    with pytest.raises(AudioError, match="No speech"):
+        prepare_audio(io.BytesIO(_wav_bytes(silent, 16000)), "audio/wav")
+
+
+def test_trim_silence_keeps_all_speech():
+    loud = np.full(16000, 2000.0, dtype=np.float32)
+    assert len(trim_silence(loud)) == 16000
+
+
+def test_endpoint_sends_trimmed_wav(client, metrics_auth):
+    data = _wav_bytes(_padded_tone(48000, channels=2), 48000)
+    with patch("server.transcribe_audio", new_callable=AsyncMock) as mock:
+        mock.return_value = "beep"
+        res = client.post("/api/transcribe", files={"file": ("rec.wav", data, "audio/wav")})
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["success"] is True
+    assert body["duration_seconds"] == pytest.approx(2.5, abs=0.01)
+    assert body["trimmed_duration_seconds"] < 1.0
+    sent, content_type, _ = mock.call_args.args
+    assert content_type == "audio/wav"
+    assert len(sent) < len(data) / 10
+
+    stats = client.get("/api/stats", headers=metrics_auth).json()["audio_preprocessing"]
+    assert stats["decoded"] == 1
+    assert stats["bytes_out"] == len(sent)
+
+
+def test_endpoint_skips_stt_for_silent_wav(client):
+    silent = _wav_bytes(np.zeros((16000, 1), dtype=np.int16), 16000)
+    with patch("server.transcribe_audio", new_callable=AsyncMock) as mock:
+        res = client.post("/api/transcribe", files={"file": ("rec.wav", silent, "audio/wav")})
+
+    assert res.json()["success"] is False
+    assert res.json()["error"] == "No speech detected"
+    mock.assert_not_called()
+
+
+def test_endpoint_rejects_large_upload(client):
+    with (
+        patch.object(audio, "MAX_UPLOAD_BYTES", 1024),
+        patch("server.transcribe_audio", new_callable=AsyncMock) as mock,
+    ):
+        files = {"file": ("rec.webm", b"x" * 2048, "audio/webm")}
+        res = client.post("/api/transcribe", files=files)
+
+    assert res.json()["success"] is False
+    assert "too large" in res.json()["error"]
+    mock.assert_not_called()
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+import pytest
+
+from core import cancellation
+from core.cancellation import ClientDisconnected, run_unless_disconnected
+
+
+class _FakeRequest:
+    """Minimal stand-in for a Starlette request."""
+
+    def __init__(self, disconnect_after: float | None = None):
+        self._loop_time = asyncio.get_running_loop().time
+        self._start = self._loop_time()
+        self._disconnect_after = disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        if self._disconnect_after is None:
+            return False
+        return self._loop_time() - self._start >= self._disconnect_after
+
+
+@pytest.fixture(autouse=True)
+def reset_cancellation_stats():
+    cancellation.reset_stats()
+    yield
+    cancellation.reset_stats()
+
+
+@pytest.mark.asyncio
+async def test_returns_result_when_client_stays():
+    async def work():
+        return 42
+
+    result = await run_unless_disconnected(_FakeRequest(), "search", work())  # type: ignore[arg-type]
+    assert result == 42
+    assert cancellation.cancellation_stats() == {}
+
+
+@pytest.mark.asyncio
+async def test_cancels_work_when_client_disconnects():
+    started = asyncio.Event()
+    was_cancelled = False
+
+    async def slow_work():
+        nonlocal was_cancelled
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            was_cancelled = True
+            raise
+
+    event = threading.Event()
+    request = _FakeRequest(disconnect_after=0.01)
+    with pytest.raises(ClientDisconnected):
+        await run_unless_disconnected(request, "search", slow_work(), event)  # type: ignore[arg-type]
+
+    await asyncio.sleep(0)
+    assert started.is_set()
+    assert was_cancelled
+    assert event.is_set()
+    assert cancellation.cancellation_stats() == {"search": 1}
+
+
+@pytest.mark.asyncio
+async def test_propagates_work_errors():
+    async def failing_work():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        await run_unless_disconnected(_FakeRequest(), "search", failing_work())  # type: ignore[arg-type]
+    assert cancellation.cancellation_stats() == {}
+
+
+def test_stats_endpoint(client, metrics_auth):
+    res = client.get("/api/stats", headers=metrics_auth)
+    assert res.status_code == 200
+    assert res.json()["cancellations"] == {}
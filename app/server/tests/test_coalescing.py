@@ -0,0 +1,98 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from core import coalescing
+from core.search import query_products
+from server import app
+
+
+def _slow(fn, delay: float = 0.1):
+    calls: list[tuple] = []
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        time.sleep(delay)
+        return fn(*args, **kwargs)
+
+    return wrapper, calls
+
+
+def _mock_semantic_search(query, threshold=0.6, max_results=10, query_vec=None):
+    return [(1, 0.9), (3, 0.7)]
+
+
+@pytest.fixture(autouse=True)
+def reset_coalescing_stats():
+    coalescing.reset_stats()
+    yield
+
+
+async def _get_all(urls: list[str]) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(client.get(url) for url in urls))
+
+
+@pytest.mark.asyncio
+async def test_identical_searches_share_one_computation():
+    slow_search, calls = _slow(_mock_semantic_search)
+    with (
+        patch("core.embeddings._index_state", "ready"),
+        patch("core.search.is_available", return_value=True),
+        patch("core.search.semantic_search", side_effect=slow_search),
+    ):
+        responses = await _get_all(["/api/search?q=headphones"] * 5 + ["/api/search?q=speaker"])
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.content for r in responses[:5]}) == 1
+    assert responses[0].json()["total"] == 2
+    assert responses[5].json()["query"] == "speaker"
+    assert sorted(c[0] for c in calls) == ["headphones", "speaker"]
+
+    stats = coalescing.coalescing_stats()["search"]
+    assert stats["requests"] == 6
+    assert stats["executions"] == 2
+    assert stats["coalesced"] == 4
+    assert stats["coalesced_ratio"] == pytest.approx(4 / 6, abs=0.001)
+
+
+@pytest.mark.asyncio
+async def test_searches_are_coalesced_on_the_normalized_query():
+    slow_search, calls = _slow(_mock_semantic_search)
+    queries = ["Yoga mat", "yoga mat ", "YOGA  mat!"]
+    with (
+        patch("core.embeddings._index_state", "ready"),
+        patch("core.search.is_available", return_value=True),
+        patch("core.search.semantic_search", side_effect=slow_search),
+    ):
+        responses = await _get_all([f"/api/search?q={q}" for q in queries])
+
+    bodies = [r.json() for r in responses]
+    # One computation, but every caller sees the query it sent
+    assert [b["query"] for b in bodies] == queries
+    assert all(b["products"] == bodies[0]["products"] for b in bodies)
+    assert [c[0] for c in calls] == ["yoga mat"]
+    assert coalescing.coalescing_stats()["search"]["coalesced"] == 2
+
+
+@pytest.mark.asyncio
+async def test_identical_product_listings_share_one_query():
+    slow_query, calls = _slow(query_products)
+    with patch("server.query_products", side_effect=slow_query):
+        responses = await _get_all(
+            ["/api/products?category=Books&sort=price_asc"] * 3
+            + ["/api/products?sort=price_asc&category=Books"]
+            + ["/api/products?category=Home"]
+        )
+
+    books = responses[0].json()
+    assert len(books) > 0
+    assert all(p["category"] == "Books" for p in books)
+    # Parameter order does not matter; a different category is computed separately
+    assert all(r.json() == books for r in responses[1:4])
+    assert len(calls) == 2
+    assert coalescing.coalescing_stats()["products"]["coalesced"] == 3
@@ -0,0 +1,76 @@
+from unittest.mock import patch
+
+import pytest
+
+from core import db
+
+
+@pytest.fixture
+def tracing():
+    db.reset_tracing()
+    db.enable_tracing()
+    yield
+    db.enable_tracing(False)
+    db.reset_tracing()
+
+
+def test_normalize_statement_groups_equivalent_sql():
+    assert (
+        db.normalize_statement("SELECT *  FROM products\n WHERE id IN (3, 4, 5) AND name = 'it''s'")
+        == "SELECT * FROM products WHERE id IN (...) AND name = ?"
+    )
+    assert db.normalize_statement(
+        "SELECT * FROM products WHERE id IN (?,?)"
+    ) == db.normalize_statement("SELECT * FROM products WHERE id IN (7, 8)")
+
+
+def test_untraced_connection_by_default():
+    conn = db.get_connection()
+    try:
+        assert not isinstance(conn, db.TracedConnection)
+    finally:
+        conn.close()
+
+
+def test_records_duration_and_rows_per_statement(tracing, client):
+    res = client.get("/api/products?category=Electronics")
+    electronics = len(res.json())
+
+    stats = db.statement_stats()
+    key = "SELECT * FROM products WHERE ?=? AND category = ? ORDER BY id ASC"
+    assert stats[key]["calls"] == 1
+    assert stats[key]["timed"] == 1
+    assert stats[key]["rows"] == electronics > 0
+    assert stats[key]["total_ms"] > 0
+
+
+def test_writes_count_changed_rows(tracing):
+    conn = db.get_connection()
+    try:
+        conn.execute("UPDATE products SET rating = rating WHERE category = ?", ("Books",))
+        conn.commit()
+    finally:
+        conn.close()
+
+    stats = db.statement_stats()
+    assert stats["UPDATE products SET rating = rating WHERE category = ?"]["rows"] > 0
+    # Implicit transaction statements come from the trace callback
+    assert stats["COMMIT"]["calls"] == 1
+
+
+def test_slow_statements_are_logged_with_plan(tracing, client):
+    with patch.object(db, "SLOW_QUERY_MS", 0):
+        client.get("/api/products/1")
+
+    (entry,) = [e for e in db.slow_queries() if e["statement"].startswith("SELECT * FROM")]
+    assert entry["statement"] == "SELECT * FROM products WHERE id = ?"
+    assert entry["rows"] == 1
+    assert any("products" in step for step in entry["plan"])
+
+
+def test_statement_stats_exported_on_metrics(tracing, client, metrics_auth):
+    client.get("/api/products/1")
+    text = client.get("/metrics", headers=metrics_auth).text
+    label = 'statement="SELECT * FROM products WHERE id = ?"'
+    assert f"voxstore_sql_statement_calls_total{{{label}}} 1" in text
+    assert f"voxstore_sql_statement_duration_seconds_count{{{label}}} 1" in text
@@ -0,0 +1,111 @@
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core import deadline, embeddings, llm_extraction
+from core.deadline import DeadlineExceeded, deadline_scope, parse_timeout
+from core.transcribe import transcribe_audio
+
+
+@pytest.fixture(autouse=True)
+def reset_deadline_stats():
+    deadline.reset_stats()
+    yield
+
+
+def test_parse_timeout_only_shortens_default():
+    assert parse_timeout(None, 5.0) == 5.0
+    assert parse_timeout("1.5", 5.0) == 1.5
+    assert parse_timeout("60", 5.0) == 5.0
+    assert parse_timeout("soon", 5.0) == 5.0
+    assert parse_timeout("-1", 5.0) == 5.0
+
+
+def test_nested_scope_never_extends_outer_deadline():
+    assert deadline.remaining() is None
+    with deadline_scope(1.0) as outer:
+        with deadline_scope(30.0) as inner:
+            assert inner == outer
+        left = deadline.remaining()
+        assert left is not None and 0 < left <= 1.0
+    assert deadline.get_deadline() is None
+
+
+def test_spent_budget_skips_stage():
+    with deadline_scope(0), pytest.raises(DeadlineExceeded, match="elevenlabs"):
+        deadline.check("elevenlabs")
+    assert deadline.deadline_stats() == {"elevenlabs": 1}
+
+
+def test_cap_shortens_timeout_to_remaining_budget():
+    assert deadline.cap(10.0, "llm") == 10.0
+    with deadline_scope(2.0):
+        assert deadline.cap(10.0, "llm") <= 2.0
+        assert deadline.cap(0.5, "llm") == 0.5
+
+
+@pytest.mark.asyncio
+async def test_transcribe_skips_call_when_budget_spent():
+    client = AsyncMock()
+    with (
+        patch("core.transcribe._get_http_client", return_value=client),
+        patch.dict("os.environ", {"ELEVENLABS_API_KEY": "test-key"}),
+        deadline_scope(0),
+        pytest.raises(DeadlineExceeded),
+    ):
+        await transcribe_audio(b"fake-audio", "audio/webm")
+    client.post.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_llm_extraction_skipped_when_budget_spent():
+    client = MagicMock()
+    with (
+        patch.object(llm_extraction, "_get_client", return_value=client),
+        deadline_scope(0),
+        pytest.raises(DeadlineExceeded),
+    ):
+        await llm_extraction._extract_uncached("something vague")
+    client.completions.create.assert_not_called()
+
+
+def test_embed_query_gets_remaining_budget():
+    client = MagicMock()
+    client.embeddings.create.return_value.data = [MagicMock(embedding=[1.0, 0.0])]
+    with patch.object(embeddings, "_get_client", return_value=client), deadline_scope(2.0):
+        embeddings.embed_query("headphones")
+    assert client.embeddings.create.call_args.kwargs["timeout"] <= 2.0
+
+
+def test_request_header_shortens_route_deadline(client):
+    budgets: list[float | None] = []
+
+    async def fake_extract(transcript: str):
+        budgets.append(deadline.remaining())
+        return llm_extraction.VoiceSearchExtraction(query=transcript)
+
+    with patch("server.extract_voice_search", side_effect=fake_extract):
+        client.post("/api/voice/extract", json={"transcript": "lamp"})
+        client.post(
+            "/api/voice/extract",
+            json={"transcript": "lamp"},
+            headers={"X-Request-Timeout": "0.5"},
+        )
+
+    default, shortened = budgets
+    assert default is not None and 0.5 < default <= 8.0
+    assert shortened is not None and shortened <= 0.5
+
+
+def test_spent_deadline_returns_504(client):
+    with patch(
+        "server.extract_voice_search",
+        AsyncMock(side_effect=DeadlineExceeded("Deadline exceeded before llm")),
+    ):
+        start = time.monotonic()
+        res = client.post("/api/voice/extract", json={"transcript": "lamp"})
+
+    assert time.monotonic() - start < 1
+    assert res.status_code == 504
+    assert res.json()["detail"] == "Deadline exceeded before llm"
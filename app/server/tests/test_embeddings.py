@@ -0,0 +1,118 @@
+import asyncio
+import os
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from core import embeddings
+
+
+@pytest.fixture(autouse=True)
+def clean_index():
+    embeddings.clear_cache()
+    yield
+    embeddings.clear_cache()
+
+
+async def _wait_for_build() -> None:
+    task = embeddings._build_task
+    assert task is not None
+    await task
+
+
+@pytest.mark.asyncio
+async def test_index_builds_in_background():
+    release = threading.Event()
+
+    def slow_init(products: list[dict]) -> None:
+        release.wait(5)
+        embeddings._product_embeddings.update({p["id"]: np.ones(4) for p in products})
+
+    with patch.object(embeddings, "init_embeddings", side_effect=slow_init):
+        embeddings.start_index_build(lambda: [{"id": 1}, {"id": 2}])
+        await asyncio.sleep(0.05)
+        assert embeddings.is_building()
+        assert not embeddings.is_available()
+
+        release.set()
+        await _wait_for_build()
+
+    assert embeddings.index_state() == "ready"
+    assert embeddings.is_available()
+
+
+@pytest.mark.asyncio
+async def test_index_without_vectors_is_disabled():
+    with patch.object(embeddings, "init_embeddings", return_value=None):
+        embeddings.start_index_build(list)
+        await _wait_for_build()
+
+    assert embeddings.index_state() == "disabled"
+    assert not embeddings.is_building()
+
+
+@pytest.mark.asyncio
+async def test_failed_build_stops_building():
+    def broken_catalog() -> list[dict]:
+        raise RuntimeError("db locked")
+
+    embeddings.start_index_build(broken_catalog)
+    await _wait_for_build()
+
+    assert embeddings.index_state() == "failed"
+    assert not embeddings.is_building()
+
+
+def test_cache_is_memory_mapped(tmp_path):
+    vectors = {i: np.full(8, i, dtype=np.float32) for i in range(1, 4)}
+    texts = ["a", "b", "c"]
+    with patch.object(embeddings, "_CACHE_DIR", str(tmp_path)):
+        embeddings._product_embeddings.update(vectors)
+        embeddings._save_cache(texts)
+        embeddings._product_embeddings.clear()
+
+        assert embeddings._load_cache([], texts)
+
+    loaded = embeddings._product_embeddings
+    assert sorted(loaded) == [1, 2, 3]
+    assert isinstance(loaded[2].base, np.memmap)
+    assert np.array_equal(loaded[3], vectors[3])
+    assert [p.name for p in tmp_path.iterdir()] == [
+        os.path.basename(embeddings._cache_path(embeddings._cache_key(texts)))
+    ]
+
+
+def test_concurrent_builds_call_the_api_once(tmp_path):
+    products = [{"id": i, "name": f"p{i}", "description": "", "category": "c"} for i in (1, 2)]
+    texts = [f"{p['name']} {p['description']} {p['category']}" for p in products]
+    calls = 0
+
+    class FakeEmbeddings:
+        def create(self, model, input):
+            nonlocal calls
+            calls += 1
+            time.sleep(0.1)
+            data = [SimpleNamespace(embedding=[1.0, float(i)]) for i in range(len(input))]
+            return SimpleNamespace(data=data)
+
+    client = SimpleNamespace(embeddings=FakeEmbeddings())
+    with (
+        patch.object(embeddings, "_CACHE_DIR", str(tmp_path)),
+        patch.object(embeddings, "_get_client", return_value=client),
+    ):
+        # Two workers starting together without a cache file
+        workers = [
+            threading.Thread(target=embeddings._build_once, args=(products, texts))
+            for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    assert calls == 1
+    assert sorted(embeddings._product_embeddings) == [1, 2]
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from core import extraction_cache, intent_parser, llm_extraction
+from core.llm_extraction import PROMPT_VERSION, extract_voice_search
+from core.models import VoiceSearchExtraction
+
+
+@pytest.fixture(autouse=True)
+def disable_fast_path():
+    """Send every transcript through the cached LLM path."""
+    with patch.object(intent_parser, "INTENT_PARSER_MODE", "off"):
+        yield
+
+
+def test_cache_key_normalizes_transcript():
+    key = extraction_cache.cache_key("Cheap yoga mat", PROMPT_VERSION)
+    assert key == extraction_cache.cache_key("  cheap YOGA mat! ", PROMPT_VERSION)
+    assert key != extraction_cache.cache_key("cheap yoga mat", "other-version")
+    assert extraction_cache.cache_key(" ?! ", PROMPT_VERSION) is None
+
+
+@pytest.mark.asyncio
+async def test_memory_and_disk_tiers():
+    key = extraction_cache.cache_key("best headphones", PROMPT_VERSION)
+    assert key is not None
+    assert await extraction_cache.get(key) is None
+
+    value = VoiceSearchExtraction(query="headphones", min_rating=4.5)
+    await extraction_cache.put(key, value)
+    assert await extraction_cache.get(key) == value
+
+    # Drop the memory tier to force a read from SQLite
+    extraction_cache._memory.clear()
+    assert await extraction_cache.get(key) == value
+
+    stats = extraction_cache.cache_stats()
+    assert stats["memory_hits"] == 1
+    assert stats["disk_hits"] == 1
+    assert stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_runs_off_the_event_loop_on_one_connection():
+    key = extraction_cache.cache_key("usb hub", PROMPT_VERSION)
+    assert key is not None
+    loop_thread = threading.get_ident()
+    threads = []
+    read = extraction_cache._read
+
+    def recording_read(*args):
+        threads.append(threading.get_ident())
+        return read(*args)
+
+    with patch.object(extraction_cache, "_read", side_effect=recording_read):
+        await extraction_cache.put(key, VoiceSearchExtraction(query="usb hub"))
+        conn = extraction_cache._conn
+        extraction_cache._memory.clear()
+        assert await extraction_cache.get(key) == VoiceSearchExtraction(query="usb hub")
+
+    assert threads and loop_thread not in threads
+    assert conn is not None and extraction_cache._conn is conn
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_ignored():
+    key = extraction_cache.cache_key("desk lamp", PROMPT_VERSION)
+    assert key is not None
+    with patch.object(extraction_cache, "CACHE_TTL_SECONDS", -1):
+        await extraction_cache.put(key, VoiceSearchExtraction(query="desk lamp"))
+    assert await extraction_cache.get(key) is None
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_prunes_expired_rows_and_caps_size():
+    keys = [f"{PROMPT_VERSION}:item-{i}" for i in range(4)]
+    with patch.object(extraction_cache, "CACHE_TTL_SECONDS", -1):
+        await extraction_cache.put(keys[0], VoiceSearchExtraction(query="stale"))
+    with patch.object(extraction_cache, "MAX_DISK_ENTRIES", 2):
+        for key in keys[1:]:
+            await extraction_cache.put(key, VoiceSearchExtraction(query=key))
+
+    conn = extraction_cache._connection()
+    stored = {row[0] for row in conn.execute("SELECT key FROM extraction_cache")}
+    # The stale row went without ever being read; the oldest live one to the cap
+    assert stored == {keys[2], keys[3]}
+    stats = extraction_cache.cache_stats()
+    assert stats["disk_expired"] == 1
+    assert stats["disk_evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_returned_values_are_copies():
+    key = extraction_cache.cache_key("keyboard", PROMPT_VERSION)
+    assert key is not None
+    await extraction_cache.put(key, VoiceSearchExtraction(query="keyboard"))
+    first = await extraction_cache.get(key)
+    assert first is not None
+    first.query = "mutated"
+    assert await extraction_cache.get(key) == VoiceSearchExtraction(query="keyboard")
+
+
+@pytest.mark.asyncio
+async def test_repeated_transcripts_skip_the_llm():
+    result = VoiceSearchExtraction(query="yoga mat", sort="price_asc")
+    with patch.object(llm_extraction, "_extract_uncached", new_callable=AsyncMock) as mock:
+        mock.return_value = result
+        first = await extract_voice_search("Cheap yoga mat")
+        second = await extract_voice_search("cheap yoga mat.")
+
+    assert first == second == result
+    mock.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_transcripts_are_coalesced():
+    calls = 0
+
+    async def slow_extract(transcript: str) -> VoiceSearchExtraction:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return VoiceSearchExtraction(query="headphones", min_rating=4.5)
+
+    before = llm_extraction.extraction_stats()["coalesced"]
+    with patch.object(llm_extraction, "_extract_uncached", side_effect=slow_extract):
+        results = await asyncio.gather(*[extract_voice_search("best headphones") for _ in range(5)])
+
+    assert calls == 1
+    assert all(r.query == "headphones" for r in results)
+    assert llm_extraction.extraction_stats()["coalesced"] - before == 4
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached():
+    with patch.object(llm_extraction, "_extract_uncached", new_callable=AsyncMock) as mock:
+        mock.side_effect = llm_extraction.LLMExtractionError("down")
+        with pytest.raises(llm_extraction.LLMExtractionError):
+            await extract_voice_search("speaker")
+        mock.side_effect = None
+        mock.return_value = VoiceSearchExtraction(query="speaker")
+        assert (await extract_voice_search("speaker")).query == "speaker"
+
+    assert mock.await_count == 2
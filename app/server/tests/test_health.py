@@ -1,4 +1,7 @@
-from core.db import SEED_PRODUCTS
+from unittest.mock import patch
+
+from core.db import SEED_PRODUCTS, catalog_stats, get_connection, refresh_catalog_stats
+from core.llm_extraction import EXTRACTION_MODELS
 
 
 def test_health_check(client):
@@ -21,3 +24,70 @@ def test_categories(client):
     assert "Books" in categories
     assert "Sports" in categories
     assert len(categories) == 5
+
+
+def test_ready_once_index_is_done(client):
+    res = client.get("/api/ready")
+    assert res.status_code == 200
+    assert res.json()["status"] == "ready"
+    assert res.json()["database"] is True
+
+
+def test_not_ready_while_index_builds(client):
+    with (
+        patch("server.is_building", return_value=True),
+        patch("server.index_state", return_value="building"),
+    ):
+        res = client.get("/api/ready")
+        # Liveness is unaffected
+        assert client.get("/api/health").status_code == 200
+
+    assert res.status_code == 503
+    assert res.json() == {"status": "starting", "database": True, "embeddings": "building"}
+
+
+def test_health_does_no_io(client):
+    with patch("core.db.get_connection", side_effect=AssertionError("health hit the database")):
+        res = client.get("/api/health")
+
+    assert res.status_code == 200
+    data = res.json()
+    assert data["products_count"] == len(SEED_PRODUCTS)
+    assert data["subsystems"] == {
+        "database": "ok",
+        "embeddings": "idle",
+        "token_pool": "stopped",
+        "llm_circuits": dict.fromkeys(EXTRACTION_MODELS, "closed"),
+    }
+
+
+def test_health_reports_degraded_when_all_circuits_open(client):
+    with patch("server.circuit_states", return_value={"model-a": "open", "model-b": "open"}):
+        data = client.get("/api/health").json()
+    assert data["status"] == "degraded"
+
+
+def test_catalog_counters_follow_writes():
+    before = catalog_stats()
+    conn = get_connection()
+    conn.execute(
+        "INSERT INTO products (name, description, price, category, image_url)"
+        " VALUES ('Test Lamp', 'A lamp', 10.0, 'Home', '')"
+    )
+    conn.execute("UPDATE products SET price = 9.0 WHERE name = 'Test Lamp'")
+    conn.commit()
+    conn.close()
+
+    # Cached until the next refresh
+    assert catalog_stats()["products"] == before["products"]
+    refresh_catalog_stats()
+    after = catalog_stats()
+    assert after["products"] == before["products"] + 1
+    assert after["version"] == before["version"] + 2
+
+    conn = get_connection()
+    conn.execute("DELETE FROM products WHERE name = 'Test Lamp'")
+    conn.commit()
+    conn.close()
+    refresh_catalog_stats()
+    assert catalog_stats()["products"] == before["products"]
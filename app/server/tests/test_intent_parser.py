@@ -0,0 +1,99 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from core import intent_parser, llm_extraction
+from core.intent_parser import parse_intent
+from core.models import VoiceSearchExtraction
+
+
+@pytest.mark.parametrize(
+    ("transcript", "expected"),
+    [
+        ("headphones", VoiceSearchExtraction(query="headphones")),
+        (
+            "Cheap yoga mat.",
+            VoiceSearchExtraction(query="yoga mat", sort="price_asc", category="Sports"),
+        ),
+        ("best headphones", VoiceSearchExtraction(query="headphones", min_rating=4.5)),
+        (
+            "show me a good coffee maker",
+            VoiceSearchExtraction(query="coffee maker", min_rating=4.0),
+        ),
+        ("keyboards with 4 stars", VoiceSearchExtraction(query="keyboards", min_rating=4.0)),
+        ("keyboards 4 stars and up", VoiceSearchExtraction(query="keyboards", min_rating=4.0)),
+        ("great speakers three stars", VoiceSearchExtraction(query="speakers", min_rating=3.0)),
+        ("top rated speakers", VoiceSearchExtraction(query="speakers", sort="rating")),
+        (
+            "expensive electronics headphones",
+            VoiceSearchExtraction(query="headphones", sort="price_desc", category="Electronics"),
+        ),
+    ],
+)
+def test_confident_transcripts(transcript, expected):
+    assert parse_intent(transcript) == expected
+
+
+@pytest.mark.parametrize(
+    "transcript",
+    [
+        "",
+        "headphones under 50 dollars",
+        "not a keyboard",
+        "premium yoga mat",
+        "outdoor jacket",
+        "cheap expensive lamp",
+        "something for my kitchen",
+        "flux capacitor",
+    ],
+)
+def test_ambiguous_transcripts_defer(transcript):
+    assert parse_intent(transcript) is None
+
+
+@pytest.mark.asyncio
+async def test_fast_path_skips_llm():
+    with patch.object(llm_extraction, "_extract_uncached", new_callable=AsyncMock) as mock:
+        result = await llm_extraction.extract_voice_search("cheap yoga mat")
+
+    mock.assert_not_awaited()
+    assert result == VoiceSearchExtraction(query="yoga mat", sort="price_asc", category="Sports")
+    assert intent_parser.parser_stats()["fast_path_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ambiguous_transcripts_use_llm():
+    with patch.object(llm_extraction, "_extract_uncached", new_callable=AsyncMock) as mock:
+        mock.return_value = VoiceSearchExtraction(query="headphones")
+        await llm_extraction.extract_voice_search("headphones under 50 dollars")
+
+    mock.assert_awaited_once()
+    assert intent_parser.parser_stats()["deferrals"] == 1
+
+
+@pytest.mark.asyncio
+async def test_shadow_mode_reports_agreement():
+    llm_results = {
+        "best headphones": VoiceSearchExtraction(query="Headphones", min_rating=4.5),
+        "cheap yoga mat": VoiceSearchExtraction(query="yoga mat", sort="price_asc"),
+    }
+
+    async def fake_llm(transcript: str) -> VoiceSearchExtraction:
+        return llm_results[transcript]
+
+    with (
+        patch.object(intent_parser, "INTENT_PARSER_MODE", "shadow"),
+        patch.object(llm_extraction, "_extract_uncached", side_effect=fake_llm) as mock,
+    ):
+        first = await llm_extraction.extract_voice_search("best headphones")
+        second = await llm_extraction.extract_voice_search("cheap yoga mat")
+        stats = intent_parser.parser_stats()
+
+    # Shadow mode always serves the LLM's answer
+    assert mock.await_count == 2
+    assert first == llm_results["best headphones"]
+    assert second == llm_results["cheap yoga mat"]
+    assert stats["shadow_comparisons"] == 2
+    assert stats["shadow_agreements"] == 1
+    assert stats["shadow_agreement_rate"] == 0.5
+    assert stats["fast_path_hits"] == 0
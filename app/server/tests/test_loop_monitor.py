@@ -0,0 +1,54 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from core.loop_monitor import LoopMonitor
+
+
+def _blocking_handler() -> None:
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_samples_lag_without_reporting_when_idle():
+    monitor = LoopMonitor(interval=0.02, threshold_ms=200)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.15)
+    finally:
+        await monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["samples"] >= 3
+    assert stats["blocked"] == 0
+    assert monitor.last_stack is None
+
+
+@pytest.mark.asyncio
+async def test_captures_stack_of_blocking_call(caplog):
+    monitor = LoopMonitor(interval=0.02, threshold_ms=100)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        with caplog.at_level(logging.WARNING, logger="core.loop_monitor"):
+            _blocking_handler()
+            await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    assert monitor.stats()["blocked"] == 1
+    assert monitor.stats()["max_lag_ms"] >= 100
+    assert monitor.last_stack is not None
+    assert "_blocking_handler" in monitor.last_stack
+    assert any("test_captures_stack_of_blocking_call" in r.getMessage() for r in caplog.records)
+
+
+def test_loop_stats_exposed(client, metrics_auth):
+    stats = client.get("/api/stats", headers=metrics_auth).json()["event_loop"]
+    assert stats["threshold_ms"] > 0
+    assert (
+        "voxstore_event_loop_lag_seconds_bucket"
+        in client.get("/metrics", headers=metrics_auth).text
+    )
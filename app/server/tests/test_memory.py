@@ -0,0 +1,85 @@
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from core import embeddings, memory
+from core.memory import SnapshotNotFound, deep_sizeof, diff_snapshots, take_snapshot
+
+ADMIN = {"Authorization": "Bearer test-admin"}
+
+
+@pytest.fixture(autouse=True)
+def stop_tracemalloc():
+    yield
+    memory.stop_tracing()
+
+
+def test_deep_sizeof_counts_shared_numpy_base_once():
+    matrix = np.zeros((100, 256), dtype=np.float32)
+    rows = {i: matrix[i] for i in range(100)}
+
+    size = deep_sizeof(rows)
+    assert matrix.nbytes <= size < 2 * matrix.nbytes
+
+
+def test_deep_sizeof_follows_containers_and_attributes():
+    payload = "x" * 10_000
+
+    class Holder:
+        def __init__(self) -> None:
+            self.items = [payload, payload]
+
+    assert deep_sizeof(Holder()) >= len(payload)
+    assert deep_sizeof([payload, payload]) < 2 * len(payload)
+
+
+def test_report_includes_embeddings():
+    vecs = {i: np.ones(1024, dtype=np.float32) for i in range(10)}
+    with patch.dict(embeddings._product_embeddings, vecs):
+        report = memory.memory_report()
+
+    assert report["objects"]["embeddings"]["entries"] == 10
+    assert report["objects"]["embeddings"]["bytes"] >= 10 * 1024 * 4
+    assert "extraction_cache" in report["objects"]
+    assert "catalog_db" in report["files"]
+
+
+def _grow(retained: list[bytes]) -> None:
+    for _ in range(100):
+        retained.append(bytes(10_000))
+
+
+def test_snapshot_diff_finds_growth():
+    retained: list[bytes] = []
+    start = take_snapshot()
+    _grow(retained)
+
+    diff = diff_snapshots(start, limit=5)
+    assert diff["size_diff_bytes"] >= 1_000_000
+    top = diff["top"][0]
+    assert top["size_diff_bytes"] >= 1_000_000
+    assert any("retained.append" in line for line in top["traceback"])
+
+    with pytest.raises(SnapshotNotFound):
+        diff_snapshots("missing")
+
+
+def test_admin_memory_endpoints(client):
+    assert client.get("/api/admin/memory").status_code == 404
+
+    with patch("server.ADMIN_TOKEN", "test-admin"):
+        report = client.get("/api/admin/memory", headers=ADMIN).json()
+        assert "embeddings" in report["objects"]
+        assert report["tracemalloc"]["tracing"] is False
+
+        start = client.post("/api/admin/memory/snapshots", headers=ADMIN).json()
+        assert start["tracing"] is True
+        diff = client.get(
+            f"/api/admin/memory/diff?start={start['snapshot_id']}", headers=ADMIN
+        ).json()
+        assert diff["start"] == start["snapshot_id"]
+        assert client.get("/api/admin/memory/diff?start=nope", headers=ADMIN).status_code == 404
+
+        stopped = client.delete("/api/admin/memory/snapshots", headers=ADMIN).json()
+        assert stopped == {"tracing": False, "traced_bytes": 0, "peak_bytes": 0, "snapshots": []}
@@ -0,0 +1,136 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from core import metrics
+from core.metrics import Counter, Histogram, merge_snapshots, render
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+
+
+def _unregister(name: str) -> None:
+    metrics._registry.pop(name, None)
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("test_latency_seconds", "Test latency.", ("op",))
+    child = hist.labels("read")
+    child.observe(0.0004)
+    child.observe(0.0004)
+    child.observe(2.5)
+    child.observe(500)
+    try:
+        text = render(merge_snapshots([metrics.snapshot()]))
+    finally:
+        _unregister("test_latency_seconds")
+
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{op="read",le="0.0003"} 0' in text
+    assert 'test_latency_seconds_bucket{op="read",le="0.0005"} 2' in text
+    assert 'test_latency_seconds_bucket{op="read",le="3.0"} 3' in text
+    assert 'test_latency_seconds_bucket{op="read",le="+Inf"} 4' in text
+    assert 'test_latency_seconds_count{op="read"} 4' in text
+
+
+def test_timer_counts_errors():
+    with pytest.raises(RuntimeError), metrics.track_upstream("test", "op"):
+        raise RuntimeError("boom")
+    assert metrics.UPSTREAM_ERRORS.labels("test", "op").value == 1
+    assert sum(metrics.UPSTREAM_LATENCY.labels("test", "op").counts) == 1
+
+
+def test_merge_sums_counters_and_skips_dead_gauges():
+    def snap(requests: float, in_flight: float, entries: float):
+        return {
+            "requests_total": {
+                "type": "counter",
+                "help": "",
+                "labelnames": ["route"],
+                "merge": "sum",
+                "samples": [[["/a"], requests]],
+            },
+            "in_flight": {
+                "type": "gauge",
+                "help": "",
+                "labelnames": [],
+                "merge": "sum",
+                "samples": [[[], in_flight]],
+            },
+            "entries": {
+                "type": "gauge",
+                "help": "",
+                "labelnames": [],
+                "merge": "max",
+                "samples": [[[], entries]],
+            },
+        }
+
+    merged = merge_snapshots(
+        [snap(3, 1, 10), snap(4, 2, 12), snap(5, 7, 99)], live=[True, True, False]
+    )
+    assert merged["requests_total"]["samples"] == [[["/a"], 12]]
+    assert merged["in_flight"]["samples"] == [[[], 3]]
+    assert merged["entries"]["samples"] == [[[], 12]]
+
+
+def test_collect_merges_worker_snapshots(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    counter = Counter("test_events_total", "Test events.")
+    counter.labels().inc(2)
+    other = {
+        "test_events_total": {
+            "type": "counter",
+            "help": "Test events.",
+            "labelnames": [],
+            "merge": "sum",
+            "samples": [[[], 5]],
+        }
+    }
+    (tmp_path / "worker-999999999.json").write_text(json.dumps(other))
+    try:
+        text = metrics.collect()
+    finally:
+        _unregister("test_events_total")
+
+    assert "test_events_total 7" in text.splitlines()
+
+
+def test_metrics_endpoint_reports_routes_and_caches(client, metrics_auth):
+    client.get("/api/products/1")
+    client.get("/api/products/2")
+    client.get("/api/products/999")
+
+    res = client.get("/metrics", headers=metrics_auth)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    text = res.text
+    route = 'method="GET",route="/api/products/{product_id}"'
+    assert f'voxstore_http_requests_total{{{route},status="200"}} 2' in text
+    assert f'voxstore_http_requests_total{{{route},status="404"}} 1' in text
+    assert "voxstore_http_request_duration_seconds_bucket{" in text
+    assert 'voxstore_cache_requests_total{cache="transcription",result="hit"}' in text
+    assert 'voxstore_admission_queue_depth{route="search"} 0' in text
+
+
+def test_metrics_and_stats_require_the_metrics_token(client, metrics_auth):
+    for path in ("/metrics", "/api/stats"):
+        assert client.get(path).status_code == 401
+        assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 401
+        assert client.get(path, headers=metrics_auth).status_code == 200
+        with patch("server.METRICS_TOKEN", ""):
+            assert client.get(path, headers=metrics_auth).status_code == 404
+
+
+def test_metric_without_samples_fails_at_definition():
+    class Incomplete(metrics._LabeledMetric[int]):
+        def _new_child(self) -> int:
+            return 0
+
+    with pytest.raises(TypeError, match="samples"):
+        Incomplete("voxstore_incomplete_total", "Never registered")  # type: ignore[abstract]
+    assert "voxstore_incomplete_total" not in metrics._registry
@@ -0,0 +1,178 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core import llm_extraction
+from core.model_router import CircuitOpenError, ModelRouter, percentile
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile([3.0], 95) == 3.0
+
+
+@pytest.mark.asyncio
+async def test_primary_answers_without_hedging():
+    router: ModelRouter[str] = ModelRouter(["primary", "fallback"], default_hedge_delay=1.0)
+    calls: list[str] = []
+
+    async def call(model: str) -> str:
+        calls.append(model)
+        return model
+
+    assert await router.run(call) == "primary"
+    assert calls == ["primary"]
+    assert router.stats()["primary"]["requests"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged():
+    router: ModelRouter[str] = ModelRouter(["primary", "fallback"], default_hedge_delay=0.01)
+    primary_cancelled = asyncio.Event()
+
+    async def call(model: str) -> str:
+        if model == "primary":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                primary_cancelled.set()
+                raise
+        return model
+
+    assert await asyncio.wait_for(router.run(call), timeout=1) == "fallback"
+    await asyncio.sleep(0)
+    assert primary_cancelled.is_set()
+    # A cancelled hedge loser is neither a failure nor a latency sample
+    assert router.stats()["primary"]["requests"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failure_falls_through_immediately():
+    router: ModelRouter[str] = ModelRouter(["primary", "fallback"], default_hedge_delay=10.0)
+
+    async def call(model: str) -> str:
+        if model == "primary":
+            raise RuntimeError("bad gateway")
+        return model
+
+    assert await asyncio.wait_for(router.run(call), timeout=1) == "fallback"
+    assert router.stats()["primary"]["error_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_all_models_failing_raises_last_error():
+    router: ModelRouter[str] = ModelRouter(["a", "b"])
+
+    async def call(model: str) -> str:
+        raise RuntimeError(f"{model} down")
+
+    with pytest.raises(RuntimeError, match="b down"):
+        await router.run(call)
+
+
+@pytest.mark.asyncio
+async def test_hedge_delay_tracks_p95():
+    router: ModelRouter[str] = ModelRouter(["a"], default_hedge_delay=5.0, min_samples=10)
+    assert router.hedge_delay("a") == 5.0
+    for latency in range(1, 21):
+        router.record_success("a", latency / 10)
+    assert router.hedge_delay("a") == 1.9
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_skips_failing_model():
+    router: ModelRouter[str] = ModelRouter(
+        ["primary", "fallback"], failure_threshold=2, cooldown=30
+    )
+    calls: list[str] = []
+
+    async def call(model: str) -> str:
+        calls.append(model)
+        if model == "primary":
+            raise RuntimeError("down")
+        return model
+
+    await router.run(call)
+    await router.run(call)
+    assert router.circuit_state("primary") == "open"
+
+    calls.clear()
+    assert await router.run(call) == "fallback"
+    assert calls == ["fallback"]
+
+    # After the cooldown the primary is tried again and closes on success
+    with patch("core.model_router.time.monotonic", return_value=10**9):
+        assert router.circuit_state("primary") == "half_open"
+        assert router.candidates() == ["primary", "fallback"]
+    router.record_success("primary", 0.1)
+    assert router.circuit_state("primary") == "closed"
+
+
+@pytest.mark.asyncio
+async def test_half_open_circuit_admits_a_single_probe():
+    router: ModelRouter[str] = ModelRouter(
+        ["primary", "fallback"], failure_threshold=1, cooldown=30, default_hedge_delay=10
+    )
+    router.record_failure("primary")
+    release = asyncio.Event()
+    calls: list[str] = []
+
+    async def call(model: str) -> str:
+        calls.append(model)
+        if model == "primary":
+            await release.wait()
+        return model
+
+    with patch("core.model_router.time.monotonic", return_value=10**9):
+        probe = asyncio.create_task(router.run(call))
+        await asyncio.sleep(0)
+        # While the probe is out, everyone else keeps skipping the primary
+        assert router.circuit_state("primary") == "open"
+        others = await asyncio.gather(*[router.run(call) for _ in range(5)])
+        release.set()
+        assert await probe == "primary"
+
+    assert others == ["fallback"] * 5
+    assert calls.count("primary") == 1
+    assert router.circuit_state("primary") == "closed"
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_circuit():
+    router: ModelRouter[str] = ModelRouter(["only"], failure_threshold=1, cooldown=30)
+    router.record_failure("only")
+
+    async def call(model: str) -> str:
+        raise RuntimeError("still down")
+
+    with patch("core.model_router.time.monotonic", return_value=10**9):
+        with pytest.raises(RuntimeError):
+            await router.run(call)
+        assert router.circuit_state("only") == "open"
+
+
+@pytest.mark.asyncio
+async def test_no_call_while_the_only_circuit_is_probing():
+    router: ModelRouter[str] = ModelRouter(["only"], failure_threshold=1, cooldown=30)
+    router.record_failure("only")
+    router._health["only"].probing = True
+
+    with pytest.raises(CircuitOpenError):
+        await router.run(AsyncMock())
+
+
+@pytest.mark.asyncio
+async def test_extraction_errors_when_every_model_fails():
+    client = MagicMock()
+    client.completions.create = AsyncMock()
+    client.completions.create.side_effect = RuntimeError("upstream 502")
+    with patch.object(llm_extraction, "_get_client", return_value=client):
+        with pytest.raises(llm_extraction.LLMExtractionError, match="upstream 502"):
+            await llm_extraction._extract_uncached("headphones")
+    llm_extraction._router.reset()
+
+    tried = [c.kwargs["model"] for c in client.completions.create.call_args_list]
+    assert tried == llm_extraction.EXTRACTION_MODELS
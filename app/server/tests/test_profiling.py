@@ -0,0 +1,132 @@
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from core import profiling
+from core.profiling import (
+    PROFILE_ID_HEADER,
+    ProfilingMiddleware,
+    StackSampler,
+    sign_profile_request,
+    verify_signature,
+)
+
+SECRET = "test-secret"
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path):
+    profiling.reset_stats()
+    with patch.object(profiling, "PROFILE_DIR", str(tmp_path)):
+        yield tmp_path
+
+
+def _busy_handler_work() -> None:
+    time.sleep(0.05)
+
+
+def _profiled_app() -> TestClient:
+    async def slow(request):
+        _busy_handler_work()
+        return PlainTextResponse("ok")
+
+    inner = Starlette(routes=[Route("/api/slow", slow)])
+    return TestClient(ProfilingMiddleware(inner, secret=SECRET))
+
+
+def test_signature_is_bound_to_path_and_expiry():
+    now = 1_700_000_000
+    value = sign_profile_request(SECRET, "/api/search", now + 60)
+    assert verify_signature(SECRET, "/api/search", value, now=now)
+    assert not verify_signature(SECRET, "/api/products", value, now=now)
+    assert not verify_signature("other", "/api/search", value, now=now)
+    assert not verify_signature(SECRET, "/api/search", value, now=now + 61)
+    far = sign_profile_request(SECRET, "/api/search", now + 86400)
+    assert not verify_signature(SECRET, "/api/search", far, now=now)
+    assert not verify_signature(SECRET, "/api/search", "garbage", now=now)
+
+
+def test_sampler_sees_blocking_frames():
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    _busy_handler_work()
+    sampler.stop()
+
+    collapsed = profiling.to_collapsed(sampler.counts)
+    assert "_busy_handler_work" in collapsed
+    assert sampler.duration >= 0.05
+
+
+def test_signed_request_writes_profile(profile_dir):
+    signature = sign_profile_request(SECRET, "/api/slow", int(time.time()) + 60)
+    with _profiled_app() as client:
+        response = client.get("/api/slow", headers={"X-Profile-Signature": signature})
+
+    artifact_id = response.headers[PROFILE_ID_HEADER]
+    with open(profiling.artifact_path(artifact_id, "speedscope")) as f:
+        speedscope = json.load(f)
+    assert speedscope["name"] == "GET /api/slow"
+    names = {frame["name"] for frame in speedscope["shared"]["frames"]}
+    assert "_busy_handler_work" in names
+    assert (profile_dir / f"{artifact_id}.collapsed.txt").exists()
+    assert profiling.profiling_stats()["profiles"] == 1
+
+
+def test_unsigned_and_forged_requests_are_not_profiled(profile_dir):
+    with _profiled_app() as client:
+        plain = client.get("/api/slow")
+        forged = client.get(
+            "/api/slow",
+            headers={"X-Profile-Signature": sign_profile_request("wrong", "/api/slow", 2**40)},
+        )
+
+    assert plain.status_code == forged.status_code == 200
+    assert PROFILE_ID_HEADER not in plain.headers
+    assert PROFILE_ID_HEADER not in forged.headers
+    assert list(profile_dir.iterdir()) == []
+    assert profiling.profiling_stats()["bad_signature"] == 1
+
+
+def test_old_artifacts_are_pruned(profile_dir):
+    with patch.object(profiling, "PROFILE_MAX_ARTIFACTS", 2):
+        ids = []
+        for _ in range(3):
+            sampler = StackSampler()
+            sampler.start()
+            sampler.stop()
+            ids.append(profiling.write_artifact(sampler, "test"))
+            time.sleep(0.01)
+
+    remaining = {p.name.split(".")[0] for p in profile_dir.iterdir()}
+    assert remaining == set(ids[1:])
+
+
+def test_artifact_ids_are_validated():
+    with pytest.raises(ValueError):
+        profiling.artifact_path("../../etc/passwd")
+    with pytest.raises(ValueError):
+        profiling.artifact_path("20240101T000000-deadbeef", "pprof")
+
+
+def test_admin_profile_endpoints(client):
+    with patch("server.ADMIN_TOKEN", ""):
+        assert client.post("/api/admin/profile").status_code == 404
+
+    with patch("server.ADMIN_TOKEN", SECRET):
+        assert client.post("/api/admin/profile").status_code == 401
+        headers = {"Authorization": f"Bearer {SECRET}"}
+        started = client.post("/api/admin/profile?seconds=0.05", headers=headers)
+        assert started.status_code == 200
+        artifact_id = started.json()["artifact_id"]
+
+        collapsed = client.get(
+            f"/api/admin/profile/{artifact_id}?format=collapsed", headers=headers
+        )
+        assert collapsed.status_code == 200
+        assert client.get("/api/admin/profile/nope", headers=headers).status_code == 404
@@ -0,0 +1,137 @@
+import base64
+import json
+import threading
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+from starlette.websockets import WebSocketDisconnect
+from websockets.sync.server import ServerConnection, serve
+
+from core import realtime_relay
+from core.realtime_relay import SilenceDetector
+from core.transcribe import TranscriptionError
+
+# 100 ms frames of 16 kHz Int16 PCM
+LOUD_FRAME = (np.full(1600, 3000, dtype="<i2")).tobytes()
+SILENT_FRAME = np.zeros(1600, dtype="<i2").tobytes()
+
+
+@contextmanager
+def _stub_elevenlabs():
+    """Local stand-in for the ElevenLabs realtime WebSocket.
+
+    Records every message and answers each commit with a transcript.
+    """
+    received: list[dict] = []
+
+    def handler(ws: ServerConnection):
+        ws.send(json.dumps({"message_type": "session_started"}))
+        for raw in ws:
+            message = json.loads(raw)
+            received.append(message)
+            if message["commit"]:
+                ws.send(json.dumps({"message_type": "committed_transcript", "text": "headphones"}))
+
+    server = serve(handler, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port = server.socket.getsockname()[1]
+    token = {"token": "stub", "ws_url": f"ws://127.0.0.1:{port}"}
+    try:
+        with patch(
+            "core.realtime_relay.acquire_websocket_token", new_callable=AsyncMock
+        ) as mock_acquire:
+            mock_acquire.return_value = token
+            yield received
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+@pytest.fixture(autouse=True)
+def reset_relay_stats():
+    realtime_relay.reset_stats()
+    yield
+
+
+def test_relay_forwards_binary_frames_and_commits(client, metrics_auth):
+    with _stub_elevenlabs() as received:
+        with client.websocket_connect("/api/transcribe/stream") as ws:
+            assert ws.receive_json()["message_type"] == "session_started"
+            ws.send_bytes(LOUD_FRAME)
+            ws.send_text(json.dumps({"message_type": "commit"}))
+            message = ws.receive_json()
+
+    assert message == {"message_type": "committed_transcript", "text": "headphones"}
+    assert len(received) == 2
+    assert base64.b64decode(received[0]["audio_base_64"]) == LOUD_FRAME
+    assert received[0]["commit"] is False
+    assert received[0]["sample_rate"] == 16000
+    assert received[1]["audio_base_64"] == ""
+    assert received[1]["commit"] is True
+
+    stats = client.get("/api/stats", headers=metrics_auth).json()["realtime_relay"]
+    assert stats["sessions"] == 1
+    assert stats["frames"] == 1
+    assert stats["audio_bytes"] == len(LOUD_FRAME)
+    assert stats["manual_commits"] == 1
+
+
+def test_relay_auto_commits_on_silence(client):
+    with _stub_elevenlabs() as received:
+        with client.websocket_connect("/api/transcribe/stream") as ws:
+            assert ws.receive_json()["message_type"] == "session_started"
+            for _ in range(3):
+                ws.send_bytes(LOUD_FRAME)
+            for _ in range(8):
+                ws.send_bytes(SILENT_FRAME)
+            message = ws.receive_json()
+
+    assert message["message_type"] == "committed_transcript"
+    commits = [i for i, m in enumerate(received) if m["commit"]]
+    # 3 speech frames, then the 8th silent frame reaches 800 ms of silence
+    assert commits == [10]
+    assert realtime_relay.relay_stats()["auto_commits"] == 1
+
+
+def test_relay_reports_unavailable_upstream(client):
+    with patch(
+        "core.realtime_relay.acquire_websocket_token", new_callable=AsyncMock
+    ) as mock_acquire:
+        mock_acquire.side_effect = TranscriptionError("ELEVENLABS_API_KEY not configured")
+        with client.websocket_connect("/api/transcribe/stream") as ws:
+            message = ws.receive_json()
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                ws.receive_json()
+
+    assert message["message_type"] == "error"
+    assert "not configured" in message["error"]
+    assert exc_info.value.code == 1011
+
+
+def test_relay_rejects_cross_origin_pages(client):
+    with patch("core.realtime_relay.acquire_websocket_token", new_callable=AsyncMock) as mock:
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect(
+                "/api/transcribe/stream", headers={"origin": "https://evil.example"}
+            ):
+                pass
+    assert exc_info.value.code == 1008
+    mock.assert_not_awaited()
+
+
+@pytest.mark.parametrize("origin", ["http://testserver", "http://localhost:8000"])
+def test_relay_accepts_same_origin_and_allowed_origins(client, origin):
+    with _stub_elevenlabs():
+        with client.websocket_connect("/api/transcribe/stream", headers={"origin": origin}) as ws:
+            assert ws.receive_json()["message_type"] == "session_started"
+
+
+def test_silence_detector_ignores_short_noises():
+    detector = SilenceDetector(threshold=500, silence_ms=300, min_speech_ms=200)
+    # A single 100 ms click followed by silence is not an utterance
+    assert not any(detector.feed(f) for f in [LOUD_FRAME] + [SILENT_FRAME] * 5)
+    results = [detector.feed(f) for f in [LOUD_FRAME] * 2 + [SILENT_FRAME] * 3]
+    assert results == [False, False, False, False, True]
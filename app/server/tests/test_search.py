@@ -19,6 +19,7 @@ def _mock_semantic_search(query, threshold=0.6, max_results=10):
     return []
 
 
+@patch("core.embeddings._index_state", "ready")
 @patch("core.search.is_available", return_value=True)
 @patch("core.search.semantic_search", side_effect=_mock_semantic_search)
 def test_search_by_name(mock_search, mock_avail, client):
@@ -30,6 +31,7 @@ def test_search_by_name(mock_search, mock_avail, client):
     assert any("Headphones" in p["name"] for p in data["products"])
 
 
+@patch("core.embeddings._index_state", "ready")
 @patch("core.search.is_available", return_value=True)
 @patch("core.search.semantic_search", side_effect=_mock_semantic_search)
 def test_search_by_category(mock_search, mock_avail, client):
@@ -39,6 +41,7 @@ def test_search_by_category(mock_search, mock_avail, client):
     assert data["total"] > 0
 
 
+@patch("core.embeddings._index_state", "ready")
 @patch("core.search.is_available", return_value=True)
 @patch("core.search.semantic_search", side_effect=_mock_semantic_search)
 def test_search_by_description(mock_search, mock_avail, client):
@@ -56,6 +59,7 @@ def test_search_empty_query(client):
     assert data["products"] == []
 
 
+@patch("core.embeddings._index_state", "ready")
 @patch("core.search.is_available", return_value=True)
 @patch("core.search.semantic_search", return_value=[])
 def test_search_no_results(mock_search, mock_avail, client):
@@ -65,6 +69,7 @@ def test_search_no_results(mock_search, mock_avail, client):
     assert data["total"] == 0
 
 
+@patch("core.embeddings._index_state", "ready")
 @patch("core.search.is_available", return_value=True)
 @patch("core.search.semantic_search", side_effect=_mock_semantic_search)
 def test_search_case_insensitive(mock_search, mock_avail, client):
@@ -74,10 +79,24 @@ def test_search_case_insensitive(mock_search, mock_avail, client):
     assert data["total"] > 0
 
 
-@patch("core.search.is_available", return_value=False)
-def test_search_without_embeddings(mock_avail, client):
-    """When embeddings are not available, search returns empty results."""
+@patch("core.embeddings._index_state", "disabled")
+@patch("core.search.semantic_search")
+def test_search_without_embeddings(mock_search, client):
+    """When embeddings are disabled, search falls back to keyword matches."""
     res = client.get("/api/search?q=headphones")
     assert res.status_code == 200
     data = res.json()
-    assert data["total"] == 0
+    assert data["degraded"] is True
+    assert any("Headphones" in p["name"] for p in data["products"])
+    mock_search.assert_not_called()
+
+
+@patch("core.embeddings._index_state", "building")
+@patch("core.search.semantic_search")
+def test_search_uses_keywords_while_index_builds(mock_search, client):
+    res = client.get("/api/search?q=headphones")
+    assert res.status_code == 200
+    data = res.json()
+    assert data["degraded"] is True
+    assert data["total"] > 0
+    mock_search.assert_not_called()
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+import sentry_sdk
+from sentry_sdk.envelope import Envelope
+from sentry_sdk.transport import Transport
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from core import sentry_sampling
+from core.sentry_sampling import TailSamplingMiddleware, route_rate, traces_sampler
+from core.tracing import ServerTimingMiddleware, span
+
+
+class _CaptureTransport(Transport):
+    def __init__(self) -> None:
+        super().__init__()
+        self.transactions: list[dict] = []
+
+    def capture_envelope(self, envelope: Envelope) -> None:
+        for item in envelope.items:
+            if item.type == "transaction" and item.payload.json is not None:
+                self.transactions.append(item.payload.json)
+
+
+@pytest.fixture
+def sentry_transport():
+    sentry_sampling.reset_stats()
+    transport = _CaptureTransport()
+    sentry_sdk.init(
+        dsn="https://public@sentry.invalid/1",
+        transport=transport,
+        traces_sample_rate=0.0,
+        default_integrations=False,
+        auto_enabling_integrations=False,
+    )
+    yield transport
+    sentry_sdk.get_global_scope().set_client(None)
+
+
+def _traced_app(server_timing: bool = True) -> TestClient:
+    async def fast(request):
+        return PlainTextResponse("ok")
+
+    async def slow(request):
+        with span("llm_call", "test-model"):
+            await asyncio.sleep(0.06)
+        return PlainTextResponse("ok")
+
+    async def broken(request):
+        return PlainTextResponse("upstream down", status_code=502)
+
+    inner = Starlette(
+        routes=[
+            Route("/api/fast", fast),
+            Route("/api/slow", slow),
+            Route("/api/broken", broken),
+            Route("/api/health", slow),
+        ]
+    )
+    return TestClient(
+        ServerTimingMiddleware(TailSamplingMiddleware(inner, slow_ms=50), enabled=server_timing)
+    )
+
+
+def test_route_rates():
+    assert route_rate("/api/health") == 0.0
+    assert route_rate("/metrics") == 0.0
+    assert route_rate("/app.js") == 0.0
+    assert route_rate("/api/products/3") == sentry_sampling.CATALOG_RATE
+    assert route_rate("/api/search") == sentry_sampling.DEFAULT_RATE
+
+
+def test_sampler_honours_parent_except_for_dropped_routes():
+    def context(path: str, parent: bool | None) -> dict:
+        return {"asgi_scope": {"path": path}, "parent_sampled": parent}
+
+    assert traces_sampler(context("/api/search", True)) == 1.0
+    assert traces_sampler(context("/api/search", False)) == 0.0
+    assert traces_sampler(context("/api/search", None)) == sentry_sampling.DEFAULT_RATE
+    assert traces_sampler(context("/api/health", True)) == 0.0
+
+
+def test_slow_request_is_upgraded_with_its_spans(sentry_transport):
+    with _traced_app() as client:
+        client.get("/api/fast")
+        client.get("/api/slow")
+        client.get("/api/health")
+    sentry_sdk.flush()
+
+    (transaction,) = sentry_transport.transactions
+    assert transaction["tags"]["sampling"] == "tail_slow"
+    assert [s["op"] for s in transaction["spans"]] == ["voxstore.llm_call"]
+    assert transaction["spans"][0]["description"] == "test-model"
+    assert sentry_sampling.sampling_stats()["tail_slow"] == 1
+
+
+def test_tail_transaction_keeps_spans_without_server_timing_header(sentry_transport):
+    with _traced_app(server_timing=False) as client:
+        response = client.get("/api/slow")
+    sentry_sdk.flush()
+
+    assert "server-timing" not in response.headers
+    (transaction,) = sentry_transport.transactions
+    assert [s["op"] for s in transaction["spans"]] == ["voxstore.llm_call"]
+
+
+def test_failed_request_is_upgraded(sentry_transport):
+    with _traced_app() as client:
+        client.get("/api/broken")
+    sentry_sdk.flush()
+
+    (transaction,) = sentry_transport.transactions
+    assert transaction["tags"]["sampling"] == "tail_error"
+    assert transaction["contexts"]["trace"]["status"] == "internal_error"
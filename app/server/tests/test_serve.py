@@ -0,0 +1,53 @@
+import os
+from unittest.mock import patch
+
+import serve
+
+
+def test_options_from_environment():
+    env = {"PORT": "9000", "WEB_CONCURRENCY": "4", "KEEPALIVE_SECONDS": "30"}
+    with patch.dict(os.environ, env), patch.object(serve, "_installed", return_value=False):
+        options = serve.uvicorn_options()
+
+    assert options["port"] == 9000
+    assert options["workers"] == 4
+    assert options["timeout_keep_alive"] == 30
+    assert options["loop"] == "asyncio"
+    assert options["http"] == "h11"
+    assert options["reload"] is False
+
+
+def test_uses_uvloop_and_httptools_when_installed():
+    with patch.object(serve, "_installed", return_value=True):
+        options = serve.uvicorn_options()
+    assert options["loop"] == "uvloop"
+    assert options["http"] == "httptools"
+
+
+def test_metrics_dir_is_shared_and_emptied_for_multiple_workers(tmp_path):
+    stale = tmp_path / "worker-1.json"
+    stale.write_text("{}")
+    with patch.dict(os.environ, {"METRICS_DIR": str(tmp_path)}):
+        serve.prepare_metrics_dir(4)
+        assert os.environ["METRICS_DIR"] == str(tmp_path)
+    assert not stale.exists()
+
+    with patch.dict(os.environ, {"METRICS_DIR": ""}):
+        serve.prepare_metrics_dir(1)
+        assert os.environ["METRICS_DIR"] == ""
+        serve.prepare_metrics_dir(2)
+        assert os.path.isdir(os.environ["METRICS_DIR"])
+
+
+def test_main_prepares_database_but_not_embeddings_before_workers():
+    calls: list[str] = []
+    with (
+        patch("core.db.init_db", side_effect=lambda: calls.append("init_db")),
+        patch("core.embeddings.init_embeddings", side_effect=lambda p: calls.append("embed")),
+        patch.object(serve.uvicorn, "run", side_effect=lambda *a, **k: calls.append("run")),
+        patch.object(serve, "load_dotenv"),
+        patch.dict(os.environ, {"WEB_CONCURRENCY": "1"}),
+    ):
+        serve.main()
+
+    assert calls == ["init_db", "run"]
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_distinct_keys_run_separately():
+    flight: SingleFlight[str] = SingleFlight()
+
+    async def work(value: str) -> str:
+        await asyncio.sleep(0)
+        return value
+
+    results = await asyncio.gather(
+        flight.do("a", lambda: work("a")), flight.do("b", lambda: work("b"))
+    )
+    assert results == ["a", "b"]
+    assert flight.stats() == {"executions": 2, "coalesced": 0, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight: SingleFlight[int] = SingleFlight()
+    release = asyncio.Event()
+
+    async def work() -> int:
+        await release.wait()
+        return 7
+
+    leader = asyncio.create_task(flight.do("k", work))
+    follower = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == 7
+    assert leader.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_last_waiter_cancellation_cancels_call():
+    flight: SingleFlight[int] = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def work() -> int:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return 1
+
+    task = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+    task.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    await asyncio.sleep(0)
+    assert flight.in_flight() == 0
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from core import startup
+from core.startup import measure_imports, parse_importtime
+
+# Generous for slow CI machines; importing litellm at startup alone blows it
+IMPORT_BUDGET_MS = float(os.environ.get("STARTUP_IMPORT_BUDGET_MS", "2000"))
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _io
+import time:      2000 |       5000 |   fastapi
+import time:       300 |       9000 | server
+"""
+
+
+def test_parse_importtime():
+    entries = parse_importtime(SAMPLE)
+    assert [(e.module, e.depth) for e in entries] == [("_io", 2), ("fastapi", 1), ("server", 0)]
+    assert entries[1].self_us == 2000
+    assert entries[2].cumulative_us == 9000
+
+
+def test_server_import_skips_heavy_dependencies():
+    heavy = ", ".join(repr(m) for m in startup.WARMUP_MODULES)
+    code = f"import sys, server; print([m for m in ({heavy}) if m in sys.modules])"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_server_import_within_budget():
+    entries = measure_imports("server")
+    total_ms = next(e.cumulative_us for e in entries if e.module == "server") / 1000
+    slowest = sorted((e for e in entries if e.depth == 1), key=lambda e: -e.cumulative_us)[:5]
+    assert total_ms <= IMPORT_BUDGET_MS, f"import server took {total_ms:.0f} ms; " + ", ".join(
+        f"{e.module} {e.cumulative_us / 1000:.0f} ms" for e in slowest
+    )
+
+
+@pytest.mark.asyncio
+async def test_warmup_imports_in_background():
+    with (
+        patch.object(startup, "WARMUP_ENABLED", True),
+        patch.object(startup, "WARMUP_MODULES", ("json", "decimal")),
+        patch.dict(startup._imports, clear=True),
+    ):
+        warmed = []
+        startup.start_warmup(lambda: warmed.append(True))
+        assert startup._warmup is not None
+        await asyncio.wrap_future(startup._warmup)
+        stats = startup.startup_stats()
+
+    assert stats["warmup_done"] is True
+    assert warmed == [True]
+    assert set(stats["warmup_imports_ms"]) == {"json", "decimal"}  # type: ignore[arg-type]
+
+
+@pytest.mark.asyncio
+async def test_warmup_is_not_restarted_while_the_last_one_runs():
+    with (
+        patch.object(startup, "WARMUP_ENABLED", True),
+        patch.object(startup, "WARMUP_MODULES", ("json", "decimal")),
+        patch.object(startup, "_warm", wraps=startup._warm) as warm,
+    ):
+        # The next lifespan starts while the last one's warmup waits to import
+        with startup.import_lock:
+            startup.start_warmup()
+            first = startup._warmup
+            startup.start_warmup()
+            assert startup._warmup is first
+        assert first is not None
+        await asyncio.wait_for(asyncio.wrap_future(first), timeout=5)
+        assert warm.call_count == 1
+
+        # Once it has finished, the next lifespan warms up again
+        startup.start_warmup()
+        second = startup._warmup
+        assert second is not None and second is not first
+        await asyncio.wrap_future(second)
+        assert warm.call_count == 2
+    assert startup.startup_stats()["warmup_done"] is True
@@ -0,0 +1,80 @@
+import os
+import re
+import subprocess
+import sys
+from unittest.mock import patch
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from core import embeddings
+from core.models import VoiceSearchExtraction
+from core.tracing import ServerTimingMiddleware, format_server_timing, span
+
+
+def _timing_names(header: str) -> list[str]:
+    return [entry.split(";")[0] for entry in header.split(", ")]
+
+
+def test_span_is_noop_outside_a_request():
+    assert span("embed") is span("score")
+
+
+def test_format_server_timing():
+    header = format_server_timing(
+        [("embed", None, 0.0, 12.345), ("llm_call", "gemini", 0.1, 250.0)]
+    )
+    assert header == 'embed;dur=12.3, llm_call;desc="gemini";dur=250.0'
+
+
+def test_search_reports_stage_timings(client):
+    vec = np.array([1.0, 0.0], dtype=np.float32)
+    with (
+        patch.object(embeddings, "_index_state", "ready"),
+        patch.dict(embeddings._product_embeddings, {1: vec}, clear=True),
+        patch.object(embeddings, "embed_query", return_value=vec),
+    ):
+        res = client.get("/api/search?q=headphones")
+
+    assert res.status_code == 200
+    assert res.json()["total"] == 1
+    assert _timing_names(res.headers["Server-Timing"]) == ["embed", "score", "hydrate", "total"]
+    assert re.search(r"total;dur=\d+\.\d", res.headers["Server-Timing"])
+
+
+def test_voice_extract_reports_llm_call(client):
+    async def fake_extract(transcript: str):
+        with span("llm_call", "test-model"):
+            return VoiceSearchExtraction(query=transcript)
+
+    with patch("server.extract_voice_search", side_effect=fake_extract):
+        res = client.post("/api/voice/extract", json={"transcript": "lamp"})
+
+    assert 'llm_call;desc="test-model"' in res.headers["Server-Timing"]
+
+
+def test_disabled_middleware_adds_no_header():
+    async def endpoint(request):
+        with span("embed"):
+            return PlainTextResponse("ok")
+
+    inner = Starlette(routes=[Route("/", endpoint)])
+    with TestClient(ServerTimingMiddleware(inner, enabled=False)) as c:
+        res = c.get("/")
+    assert "Server-Timing" not in res.headers
+
+
+def test_server_timing_is_off_by_default():
+    env = {k: v for k, v in os.environ.items() if k != "SERVER_TIMING_ENABLED"}
+    result = subprocess.run(
+        [sys.executable, "-c", "from core import tracing; print(tracing.SERVER_TIMING_ENABLED)"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
@@ -1,3 +1,4 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
@@ -23,10 +24,10 @@ def _mock_response(status_code: int, json_data: dict | None = None, text: str =
 async def test_transcribe_audio_success():
     mock_response = _mock_response(200, {"text": "hello world"})
 
-    with patch("core.transcribe.httpx.AsyncClient") as mock_client_cls:
+    with patch("core.transcribe._get_http_client") as mock_get_client:
         instance = AsyncMock()
         instance.post.return_value = mock_response
-        mock_client_cls.return_value.__aenter__.return_value = instance
+        mock_get_client.return_value = instance
 
         with patch.dict("os.environ", {"ELEVENLABS_API_KEY": "test-key"}):
             result = await transcribe_audio(b"fake-audio", "audio/webm")
@@ -45,10 +46,10 @@ async def test_transcribe_audio_no_api_key():
 async def test_transcribe_audio_invalid_key():
     mock_response = _mock_response(401)
 
-    with patch("core.transcribe.httpx.AsyncClient") as mock_client_cls:
+    with patch("core.transcribe._get_http_client") as mock_get_client:
         instance = AsyncMock()
         instance.post.return_value = mock_response
-        mock_client_cls.return_value.__aenter__.return_value = instance
+        mock_get_client.return_value = instance
 
         with patch.dict("os.environ", {"ELEVENLABS_API_KEY": "bad-key"}):
             with pytest.raises(TranscriptionError, match="Invalid.*API key"):
@@ -62,10 +63,10 @@ async def test_transcribe_audio_quota_exceeded():
         text='{"detail":{"status":"quota_exceeded","message":"quota exceeded"}}',
     )
 
-    with patch("core.transcribe.httpx.AsyncClient") as mock_client_cls:
+    with patch("core.transcribe._get_http_client") as mock_get_client:
         instance = AsyncMock()
         instance.post.return_value = mock_response
-        mock_client_cls.return_value.__aenter__.return_value = instance
+        mock_get_client.return_value = instance
 
         with patch.dict("os.environ", {"ELEVENLABS_API_KEY": "test-key"}):
             with pytest.raises(TranscriptionError, match="quota exceeded"):
@@ -76,10 +77,10 @@ async def test_transcribe_audio_quota_exceeded():
 async def test_transcribe_audio_api_error():
     mock_response = _mock_response(500, text="Internal Server Error")
 
-    with patch("core.transcribe.httpx.AsyncClient") as mock_client_cls:
+    with patch("core.transcribe._get_http_client") as mock_get_client:
         instance = AsyncMock()
         instance.post.return_value = mock_response
-        mock_client_cls.return_value.__aenter__.return_value = instance
+        mock_get_client.return_value = instance
 
         with patch.dict("os.environ", {"ELEVENLABS_API_KEY": "test-key"}):
             with pytest.raises(TranscriptionError, match="API error: 500"):
@@ -88,10 +89,10 @@ async def test_transcribe_audio_api_error():
 
 @pytest.mark.asyncio
 async def test_transcribe_audio_timeout():
-    with patch("core.transcribe.httpx.AsyncClient") as mock_client_cls:
+    with patch("core.transcribe._get_http_client") as mock_get_client:
         instance = AsyncMock()
         instance.post.side_effect = httpx.TimeoutException("timeout")
-        mock_client_cls.return_value.__aenter__.return_value = instance
+        mock_get_client.return_value = instance
 
         with patch.dict("os.environ", {"ELEVENLABS_API_KEY": "test-key"}):
             with pytest.raises(TranscriptionError, match="timed out"):
@@ -102,10 +103,10 @@ async def test_transcribe_audio_timeout():
 async def test_transcribe_audio_empty_response():
     mock_response = _mock_response(200, {"text": ""})
 
-    with patch("core.transcribe.httpx.AsyncClient") as mock_client_cls:
+    with patch("core.transcribe._get_http_client") as mock_get_client:
         instance = AsyncMock()
         instance.post.return_value = mock_response
-        mock_client_cls.return_value.__aenter__.return_value = instance
+        mock_get_client.return_value = instance
 
         with patch.dict("os.environ", {"ELEVENLABS_API_KEY": "test-key"}):
             with pytest.raises(TranscriptionError, match="No speech detected"):
@@ -169,10 +170,10 @@ async def test_get_websocket_token_success():
 
     mock_response = _mock_response(200, {"token": "test-token-123"})
 
-    with patch("core.transcribe.httpx.AsyncClient") as mock_client_cls:
+    with patch("core.transcribe._get_http_client") as mock_get_client:
         instance = AsyncMock()
         instance.post.return_value = mock_response
-        mock_client_cls.return_value.__aenter__.return_value = instance
+        mock_get_client.return_value = instance
 
         with patch.dict("os.environ", {"ELEVENLABS_API_KEY": "test-key"}):
             result = await get_websocket_token()
@@ -198,10 +199,10 @@ async def test_get_websocket_token_invalid_key():
 
     mock_response = _mock_response(401)
 
-    with patch("core.transcribe.httpx.AsyncClient") as mock_client_cls:
+    with patch("core.transcribe._get_http_client") as mock_get_client:
         instance = AsyncMock()
         instance.post.return_value = mock_response
-        mock_client_cls.return_value.__aenter__.return_value = instance
+        mock_get_client.return_value = instance
 
         with patch.dict("os.environ", {"ELEVENLABS_API_KEY": "bad-key"}):
             with pytest.raises(TranscriptionError, match="Invalid.*API key"):
@@ -212,10 +213,10 @@ async def test_get_websocket_token_invalid_key():
 async def test_get_websocket_token_timeout():
     from core.transcribe import get_websocket_token
 
-    with patch("core.transcribe.httpx.AsyncClient") as mock_client_cls:
+    with patch("core.transcribe._get_http_client") as mock_get_client:
         instance = AsyncMock()
         instance.post.side_effect = httpx.TimeoutException("timeout")
-        mock_client_cls.return_value.__aenter__.return_value = instance
+        mock_get_client.return_value = instance
 
         with patch.dict("os.environ", {"ELEVENLABS_API_KEY": "test-key"}):
             with pytest.raises(TranscriptionError, match="timed out"):
@@ -226,7 +227,7 @@ async def test_get_websocket_token_timeout():
 
 
 def test_token_endpoint_success(client):
-    with patch("server.get_websocket_token", new_callable=AsyncMock) as mock:
+    with patch("server.acquire_websocket_token", new_callable=AsyncMock) as mock:
         mock.return_value = {"token": "abc", "ws_url": "wss://example.com"}
         res = client.post("/api/transcribe/token")
 
@@ -237,8 +238,182 @@ def test_token_endpoint_success(client):
 
 
 def test_token_endpoint_error(client):
-    with patch("server.get_websocket_token", new_callable=AsyncMock) as mock:
+    with patch("server.acquire_websocket_token", new_callable=AsyncMock) as mock:
         mock.side_effect = TranscriptionError("ELEVENLABS_API_KEY not configured")
         res = client.post("/api/transcribe/token")
 
     assert res.status_code == 500
+
+
+# --- Connection pooling against a local stub server ---
+
+
+async def _stub_token_server(connections: list[int]):
+    """Minimal keep-alive HTTP/1.1 server answering every request with a token."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        connections.append(1)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode().split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                await reader.readexactly(length)
+                body = b'{"token": "stub-token"}'
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+@pytest.mark.asyncio
+async def test_shared_client_reuses_connections():
+    from core import transcribe
+    from core.transcribe import get_websocket_token
+
+    connections: list[int] = []
+    server = await _stub_token_server(connections)
+    port = server.sockets[0].getsockname()[1]
+    transcribe.reset_connection_stats()
+    try:
+        with (
+            patch.object(transcribe, "ELEVENLABS_TOKEN_URL", f"http://127.0.0.1:{port}/token"),
+            patch.dict("os.environ", {"ELEVENLABS_API_KEY": "test-key"}),
+        ):
+            for _ in range(5):
+                result = await get_websocket_token()
+                assert result["token"] == "stub-token"
+    finally:
+        await transcribe.close_http_client()
+        server.close()
+        await server.wait_closed()
+
+    assert len(connections) == 1
+    stats = transcribe.connection_stats()
+    assert stats["requests"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 4
+    assert stats["handshake_ms_saved"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_shared_client_is_not_replaced_across_event_loops():
+    from core import transcribe
+
+    other_loop = asyncio.new_event_loop()
+    try:
+        client = transcribe._get_http_client()
+        with patch.object(transcribe, "_http_client_loop", other_loop):
+            with pytest.raises(RuntimeError, match="another event loop"):
+                transcribe._get_http_client()
+        assert transcribe._get_http_client() is client
+    finally:
+        await transcribe.close_http_client()
+        other_loop.close()
+
+    assert client.is_closed
+    assert transcribe._get_http_client() is not client
+    await transcribe.close_http_client()
+
+
+# --- Prefetched token pool ---
+
+
+def _token_minter():
+    counter = iter(range(1, 1000))
+
+    async def mint():
+        n = next(counter)
+        return {"token": f"tok-{n}", "ws_url": f"wss://example.com?token=tok-{n}"}
+
+    return AsyncMock(side_effect=mint)
+
+
+async def _wait_for(predicate, timeout: float = 1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_token_pool_serves_prefetched_tokens_and_refills():
+    from core.transcribe import TokenPool
+
+    pool = TokenPool(size=2, max_age=60)
+    with patch("core.transcribe.get_websocket_token", _token_minter()) as mint:
+        pool.start()
+        try:
+            await _wait_for(lambda: pool.stats()["available"] == 2)
+            token = await pool.acquire()
+            assert token["token"] == "tok-1"
+            await _wait_for(lambda: pool.stats()["available"] == 2)
+        finally:
+            await pool.stop()
+
+    assert mint.await_count == 3
+    stats = pool.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 0
+    assert stats["hit_rate"] == 1.0
+    assert stats["refills"] == 3
+
+
+@pytest.mark.asyncio
+async def test_token_pool_replaces_expired_tokens():
+    from core.transcribe import TokenPool
+
+    pool = TokenPool(size=1, max_age=0.05)
+    with patch("core.transcribe.get_websocket_token", _token_minter()):
+        pool.start()
+        try:
+            await _wait_for(lambda: pool.stats()["expired"] >= 1)
+            await _wait_for(lambda: pool.stats()["available"] == 1)
+            token = await pool.acquire()
+        finally:
+            await pool.stop()
+
+    assert token["token"] != "tok-1"
+
+
+@pytest.mark.asyncio
+async def test_token_pool_mints_inline_when_empty():
+    from core.transcribe import TokenPool
+
+    pool = TokenPool(size=2, max_age=60)
+    with patch("core.transcribe.get_websocket_token", _token_minter()):
+        token = await pool.acquire()
+
+    assert token["token"] == "tok-1"
+    stats = pool.stats()
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_token_pool_counts_refill_errors():
+    from core import transcribe
+    from core.transcribe import TokenPool
+
+    pool = TokenPool(size=1, max_age=60)
+    failing = AsyncMock(side_effect=TranscriptionError("Token request timed out"))
+    with (
+        patch("core.transcribe.get_websocket_token", failing),
+        patch.object(transcribe, "TOKEN_REFILL_RETRY_SECONDS", 0.01),
+    ):
+        pool.start()
+        try:
+            await _wait_for(lambda: pool.stats()["refill_errors"] >= 2)
+        finally:
+            await pool.stop()
+
+    assert pool.stats()["available"] == 0
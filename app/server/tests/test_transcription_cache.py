@@ -0,0 +1,122 @@
+import asyncio
+import sqlite3
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import server
+from core import transcription_cache
+from core.transcribe import TranscriptionError, transcribe_audio
+
+
+def _stt_client(text: str = "hello world", delay: float = 0.0):
+    async def post(*args, **kwargs):
+        await asyncio.sleep(delay)
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {"text": text}
+        return response
+
+    instance = AsyncMock()
+    instance.post.side_effect = post
+    return instance
+
+
+@pytest.fixture(autouse=True)
+def api_key():
+    with patch.dict("os.environ", {"ELEVENLABS_API_KEY": "test-key"}):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_identical_audio_is_transcribed_once():
+    instance = _stt_client()
+    with patch("core.transcribe._get_http_client", return_value=instance):
+        first = await transcribe_audio(b"clip-1", "audio/webm")
+        second = await transcribe_audio(b"clip-1", "audio/webm")
+        await transcribe_audio(b"clip-1", "audio/wav")
+
+    assert first == second == "hello world"
+    # Same bytes with a different content type are a separate entry
+    assert instance.post.await_count == 2
+    stats = transcription_cache.cache_stats()
+    assert stats["hits"] == 1
+    assert stats["entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_uploads_share_one_call():
+    instance = _stt_client(delay=0.05)
+    with patch("core.transcribe._get_http_client", return_value=instance):
+        results = await asyncio.gather(*(transcribe_audio(b"clip", "audio/webm") for _ in range(3)))
+
+    assert results == ["hello world"] * 3
+    assert instance.post.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached():
+    failing = AsyncMock()
+    failing.post.side_effect = [MagicMock(status_code=500, text="boom")]
+    with patch("core.transcribe._get_http_client", return_value=failing):
+        with pytest.raises(TranscriptionError):
+            await transcribe_audio(b"clip", "audio/webm")
+
+    with patch("core.transcribe._get_http_client", return_value=_stt_client()):
+        assert await transcribe_audio(b"clip", "audio/webm") == "hello world"
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entries_are_evicted():
+    with patch.object(transcription_cache, "MAX_ENTRIES", 2):
+        await transcription_cache.put("a", "first")
+        await transcription_cache.put("b", "second")
+        assert await transcription_cache.get("a") == "first"
+        await transcription_cache.put("c", "third")
+
+    assert await transcription_cache.get("b") is None
+    assert await transcription_cache.get("a") == "first"
+    assert await transcription_cache.get("c") == "third"
+    assert transcription_cache.cache_stats()["evictions"] == 1
+    assert transcription_cache.cache_stats()["entries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_eviction_counts_rows_written_by_other_workers():
+    await transcription_cache.put("a", "first")
+    await transcription_cache.put("a", "replaced")
+
+    # Another worker process writes to the same file through its own connection
+    other = sqlite3.connect(transcription_cache.CACHE_DB_PATH)
+    other.execute(
+        "INSERT INTO transcription_cache (key, text, last_used) VALUES ('b', 'second', 0)"
+    )
+    other.commit()
+    other.close()
+
+    with patch.object(transcription_cache, "MAX_ENTRIES", 2):
+        await transcription_cache.put("c", "third")
+
+    assert await transcription_cache.get("b") is None
+    assert await transcription_cache.get("a") == "replaced"
+    stats = transcription_cache.cache_stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_repeated_upload_skips_admission_and_preprocessing(client):
+    files = {"file": ("rec.webm", b"same-recording", "audio/webm")}
+    with (
+        patch("core.transcribe._get_http_client", return_value=_stt_client()),
+        patch("server.prepare_audio", wraps=server.prepare_audio) as prepare,
+        patch.object(
+            server._admission["transcribe"], "slot", wraps=server._admission["transcribe"].slot
+        ) as slot,
+    ):
+        first = client.post("/api/transcribe", files=files).json()
+        second = client.post("/api/transcribe", files=files).json()
+
+    assert first["text"] == second["text"] == "hello world"
+    assert prepare.call_count == 1
+    assert slot.call_count == 1
+    assert transcription_cache.cache_stats()["hits"] == 1
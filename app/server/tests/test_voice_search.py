@@ -0,0 +1,118 @@
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+
+from core.llm_extraction import LLMExtractionError
+from core.models import VoiceSearchExtraction
+from core.text import normalize_query
+
+_FAKE_VEC = np.ones(4, dtype=np.float32)
+
+
+def _mock_semantic_search(query, threshold=0.6, max_results=10, query_vec=None):
+    # Headphones (ids 1, 27, 28) and a speaker (id 3)
+    return [(1, 0.9), (27, 0.85), (28, 0.8), (3, 0.7)]
+
+
+def test_normalize_query():
+    assert normalize_query("  Wireless Headphones! ") == "wireless headphones"
+    assert normalize_query("USB-C hub, please.") == "usb-c hub please"
+
+
+@patch("core.embeddings._index_state", "ready")
+@patch("core.search.is_available", return_value=True)
+@patch("core.voice_search.is_available", return_value=True)
+@patch("core.voice_search.embed_query", return_value=_FAKE_VEC)
+@patch("core.search.semantic_search", side_effect=_mock_semantic_search)
+def test_voice_search_reuses_speculative_embedding(
+    mock_search, mock_embed, mock_avail, mock_search_avail, client
+):
+    extraction = VoiceSearchExtraction(query="headphones")
+    with patch("core.voice_search.extract_voice_search", new_callable=AsyncMock) as mock_extract:
+        mock_extract.return_value = extraction
+        res = client.post("/api/voice/search", json={"transcript": "Headphones."})
+
+    assert res.status_code == 200
+    data = res.json()
+    assert data["extraction"]["query"] == "headphones"
+    assert data["embedding_reused"] is True
+    assert data["total"] == 4
+    mock_embed.assert_called_once_with("Headphones.")
+    assert mock_search.call_args.kwargs["query_vec"] is _FAKE_VEC
+    for stage in ("extract", "speculative_embed", "search", "total"):
+        assert stage in data["timings"]
+
+
+@patch("core.embeddings._index_state", "ready")
+@patch("core.search.is_available", return_value=True)
+@patch("core.voice_search.is_available", return_value=True)
+@patch("core.voice_search.embed_query", return_value=_FAKE_VEC)
+@patch("core.search.semantic_search", side_effect=_mock_semantic_search)
+def test_voice_search_applies_filters(
+    mock_search, mock_embed, mock_avail, mock_search_avail, client
+):
+    extraction = VoiceSearchExtraction(
+        query="headphones", category="Electronics", min_rating=4.5, sort="price_asc"
+    )
+    with patch("core.voice_search.extract_voice_search", new_callable=AsyncMock) as mock_extract:
+        mock_extract.return_value = extraction
+        res = client.post(
+            "/api/voice/search", json={"transcript": "best headphones sorted by price"}
+        )
+
+    assert res.status_code == 200
+    data = res.json()
+    # Extracted query differs from the transcript, so the query is re-embedded
+    assert data["embedding_reused"] is False
+    assert "query_vec" not in mock_search.call_args.kwargs
+    products = data["products"]
+    assert [p["id"] for p in products] == [1, 28]
+    assert all(p["rating"] >= 4.5 for p in products)
+
+
+def test_voice_search_without_query_lists_catalog(client):
+    extraction = VoiceSearchExtraction(category="Books", sort="price_asc")
+    with patch("core.voice_search.extract_voice_search", new_callable=AsyncMock) as mock_extract:
+        mock_extract.return_value = extraction
+        res = client.post("/api/voice/search", json={"transcript": "cheap books"})
+
+    assert res.status_code == 200
+    products = res.json()["products"]
+    assert len(products) > 0
+    assert all(p["category"] == "Books" for p in products)
+    prices = [p["price"] for p in products]
+    assert prices == sorted(prices)
+
+
+@patch("core.embeddings._index_state", "ready")
+@patch("core.search.is_available", return_value=True)
+@patch("core.search.semantic_search", side_effect=_mock_semantic_search)
+def test_voice_search_falls_back_to_transcript(mock_search, mock_avail, client):
+    with patch("core.voice_search.extract_voice_search", new_callable=AsyncMock) as mock_extract:
+        mock_extract.side_effect = LLMExtractionError("all models failed")
+        res = client.post("/api/voice/search", json={"transcript": "headphones"})
+
+    assert res.status_code == 200
+    data = res.json()
+    assert data["extraction"]["query"] == "headphones"
+    assert data["total"] == 4
+
+
+def test_voice_search_empty_transcript(client):
+    res = client.post("/api/voice/search", json={"transcript": "  "})
+    assert res.status_code == 400
+
+
+@patch("core.embeddings._index_state", "building")
+@patch("core.search.semantic_search")
+def test_voice_search_uses_keywords_while_index_builds(mock_search, client):
+    extraction = VoiceSearchExtraction(query="headphones", category="Electronics")
+    with patch("core.voice_search.extract_voice_search", new_callable=AsyncMock) as mock_extract:
+        mock_extract.return_value = extraction
+        res = client.post("/api/voice/search", json={"transcript": "headphones"})
+
+    data = res.json()
+    assert data["degraded"] is True
+    assert data["total"] > 0
+    assert all("headphones" in p["name"].lower() for p in data["products"][:3])
+    mock_search.assert_not_called()
@@ -2,6 +2,12 @@
 
 SERVER_PORT=${BACKEND_PORT:-8000}
 
+# --dev: single process with auto-reload; default: multi-worker launcher
+ENTRYPOINT=serve.py
+if [ "$1" = "--dev" ]; then
+    ENTRYPOINT=server.py
+fi
+
 GREEN='\033[0;32m'
 BLUE='\033[0;34m'
 RED='\033[0;31m'
@@ -41,7 +47,7 @@ fi
 # Start server (serves both API and static frontend)
 echo -e "${GREEN}Starting server on port $SERVER_PORT...${NC}"
 cd "$PROJECT_ROOT/app/server"
-uv run python server.py &
+uv run python $ENTRYPOINT &
 
 sleep 2
 
@@ -1,14 +1,11 @@
 const { test, expect } = require("@playwright/test");
 
-// Mock the /api/transcribe/token endpoint and WebSocket connection.
-// When the frontend fetches a token, we return a fake one.
-// When it opens a WebSocket, our mock accepts audio chunks and
-// returns a committed_transcript after a short delay.
+// Mock the WebSocket connection to the /api/transcribe/stream relay.
+// The mock accepts binary audio frames and returns a
+// committed_transcript after a short delay.
 function mockWebSocketTranscription(page, transcript) {
     return page.addInitScript(
         ([text]) => {
-            // Mock the token endpoint response will be handled by page.route
-
             // Mock WebSocket
             const OriginalWebSocket = window.WebSocket;
             class MockWebSocket {
@@ -38,35 +35,32 @@ function mockWebSocketTranscription(page, transcript) {
 
                 send(data) {
                     if (this.readyState !== 1) return;
-                    try {
-                        var msg = JSON.parse(data);
-                        if (msg.message_type === "input_audio_chunk" && !this._audioReceived) {
-                            this._audioReceived = true;
-                            // Send partial transcript
-                            setTimeout(() => {
-                                if (this.onmessage) {
-                                    this.onmessage({
-                                        data: JSON.stringify({
-                                            message_type: "partial_transcript",
-                                            text: text.substring(0, Math.ceil(text.length / 2)),
-                                        }),
-                                    });
-                                }
-                            }, 100);
-                            // Send committed transcript
-                            setTimeout(() => {
-                                if (this.onmessage) {
-                                    this.onmessage({
-                                        data: JSON.stringify({
-                                            message_type: "committed_transcript",
-                                            text: text,
-                                        }),
-                                    });
-                                }
-                            }, 300);
-                        }
-                    } catch (e) {
-                        // ignore parse errors
+                    // Audio is sent as binary PCM frames, control messages as JSON
+                    var isAudio = typeof data !== "string";
+                    if (isAudio && !this._audioReceived) {
+                        this._audioReceived = true;
+                        // Send partial transcript
+                        setTimeout(() => {
+                            if (this.onmessage) {
+                                this.onmessage({
+                                    data: JSON.stringify({
+                                        message_type: "partial_transcript",
+                                        text: text.substring(0, Math.ceil(text.length / 2)),
+                                    }),
+                                });
+                            }
+                        }, 100);
+                        // Send committed transcript
+                        setTimeout(() => {
+                            if (this.onmessage) {
+                                this.onmessage({
+                                    data: JSON.stringify({
+                                        message_type: "committed_transcript",
+                                        text: text,
+                                    }),
+                                });
+                            }
+                        }, 300);
                     }
                 }
 
@@ -113,6 +107,29 @@ function mockWebSocketTranscription(page, transcript) {
     );
 }
 
+// Mock /api/voice/search with a plain extraction for `query`, serving
+// the products from the real /api/search endpoint.
+function mockVoiceSearch(page, query) {
+    return page.route("**/api/voice/search", async (route) => {
+        const searchUrl = new URL(route.request().url());
+        searchUrl.pathname = "/api/search";
+        searchUrl.search = "?q=" + encodeURIComponent(query);
+        const res = await route.fetch({ url: searchUrl.toString(), method: "GET" });
+        const data = await res.json();
+        await route.fulfill({
+            status: 200,
+            contentType: "application/json",
+            body: JSON.stringify({
+                extraction: { query: query, min_rating: null, sort: null, category: null },
+                products: data.products,
+                total: data.total,
+                embedding_reused: true,
+                timings: {},
+            }),
+        });
+    });
+}
+
 // Mock that forces WebSocket to fail, falling back to MediaRecorder + REST
 function mockMediaRecorderFallback(page) {
     return page.addInitScript(() => {
@@ -219,31 +236,8 @@ test.describe("Voice Search", () => {
 
         await mockWebSocketTranscription(page, "headphones");
 
-        // Mock the token endpoint
-        await page.route("**/api/transcribe/token", async (route) => {
-            await route.fulfill({
-                status: 200,
-                contentType: "application/json",
-                body: JSON.stringify({
-                    token: "fake-token",
-                    ws_url: "wss://fake.elevenlabs.io/v1/stt",
-                }),
-            });
-        });
-
-        // Mock the voice extraction endpoint
-        await page.route("**/api/voice/extract", async (route) => {
-            await route.fulfill({
-                status: 200,
-                contentType: "application/json",
-                body: JSON.stringify({
-                    query: "headphones",
-                    min_rating: null,
-                    sort: null,
-                    category: null,
-                }),
-            });
-        });
+        // Mock the combined voice search endpoint
+        await mockVoiceSearch(page, "headphones");
 
         await page.goto("/");
         await page.waitForSelector('[data-testid="product-card"]');
@@ -277,30 +271,8 @@ test.describe("Voice Search", () => {
         test.skip(browserName === "firefox", "WebSocket mock unreliable in Firefox");
         await mockWebSocketTranscription(page, "keyboard");
 
-        await page.route("**/api/transcribe/token", async (route) => {
-            await route.fulfill({
-                status: 200,
-                contentType: "application/json",
-                body: JSON.stringify({
-                    token: "fake-token",
-                    ws_url: "wss://fake.elevenlabs.io/v1/stt",
-                }),
-            });
-        });
-
-        // Mock the voice extraction endpoint
-        await page.route("**/api/voice/extract", async (route) => {
-            await route.fulfill({
-                status: 200,
-                contentType: "application/json",
-                body: JSON.stringify({
-                    query: "keyboard",
-                    min_rating: null,
-                    sort: null,
-                    category: null,
-                }),
-            });
-        });
+        // Mock the combined voice search endpoint
+        await mockVoiceSearch(page, "keyboard");
 
         await page.goto("/");
         await page.waitForSelector('[data-testid="product-card"]');
@@ -325,16 +297,7 @@ test.describe("Voice Search", () => {
     test("falls back to MediaRecorder when WebSocket fails", async ({ page }) => {
         await mockMediaRecorderFallback(page);
 
-        // Token endpoint fails
-        await page.route("**/api/transcribe/token", async (route) => {
-            await route.fulfill({
-                status: 500,
-                contentType: "application/json",
-                body: JSON.stringify({ detail: "No API key" }),
-            });
-        });
-
-        // But REST transcribe works
+        // REST transcribe works
         await page.route("**/api/transcribe", async (route) => {
             if (route.request().method() === "POST") {
                 await route.fulfill({
@@ -364,30 +327,8 @@ test.describe("Voice Search", () => {
     test("manual stop works during WebSocket recording", async ({ page }) => {
         await mockWebSocketTranscription(page, "monitor");
 
-        await page.route("**/api/transcribe/token", async (route) => {
-            await route.fulfill({
-                status: 200,
-                contentType: "application/json",
-                body: JSON.stringify({
-                    token: "fake-token",
-                    ws_url: "wss://fake.elevenlabs.io/v1/stt",
-                }),
-            });
-        });
-
-        // Mock voice extraction endpoint
-        await page.route("**/api/voice/extract", async (route) => {
-            await route.fulfill({
-                status: 200,
-                contentType: "application/json",
-                body: JSON.stringify({
-                    query: "monitor",
-                    min_rating: null,
-                    sort: null,
-                    category: null,
-                }),
-            });
-        });
+        // Mock the combined voice search endpoint
+        await mockVoiceSearch(page, "monitor");
 
         await page.goto("/");
         await page.waitForSelector('[data-testid="product-card"]');
@@ -412,29 +353,7 @@ test.describe("Alt Push-to-Talk", () => {
     test("alt key starts and stops recording", async ({ page }) => {
         await mockWebSocketTranscription(page, "laptop");
 
-        await page.route("**/api/transcribe/token", async (route) => {
-            await route.fulfill({
-                status: 200,
-                contentType: "application/json",
-                body: JSON.stringify({
-                    token: "fake-token",
-                    ws_url: "wss://fake.elevenlabs.io/v1/stt",
-                }),
-            });
-        });
-
-        await page.route("**/api/voice/extract", async (route) => {
-            await route.fulfill({
-                status: 200,
-                contentType: "application/json",
-                body: JSON.stringify({
-                    query: "laptop",
-                    min_rating: null,
-                    sort: null,
-                    category: null,
-                }),
-            });
-        });
+        await mockVoiceSearch(page, "laptop");
 
         await page.goto("/");
         await page.waitForSelector('[data-testid="product-card"]');
@@ -455,29 +374,7 @@ test.describe("Alt Push-to-Talk", () => {
     test("alt key works when search input is focused", async ({ page }) => {
         await mockWebSocketTranscription(page, "tablet");
 
-        await page.route("**/api/transcribe/token", async (route) => {
-            await route.fulfill({
-                status: 200,
-                contentType: "application/json",
-                body: JSON.stringify({
-                    token: "fake-token",
-                    ws_url: "wss://fake.elevenlabs.io/v1/stt",
-                }),
-            });
-        });
-
-        await page.route("**/api/voice/extract", async (route) => {
-            await route.fulfill({
-                status: 200,
-                contentType: "application/json",
-                body: JSON.stringify({
-                    query: "tablet",
-                    min_rating: null,
-                    sort: null,
-                    category: null,
-                }),
-            });
-        });
+        await mockVoiceSearch(page, "tablet");
 
         await page.goto("/");
         await page.waitForSelector('[data-testid="product-card"]');